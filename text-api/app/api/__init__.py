@@ -1,9 +1,22 @@
-from .sessions import router as sessions_router
-from .texts import router as texts_router
-from .feedback import router as feedback_router
-from .history import router as history_router
-from .vocabulary import router as vocabulary_router
-from .metrics import router as metrics_router
-from .examples import router as examples_router
+import importlib
 
-__all__ = ["sessions_router", "texts_router", "feedback_router", "history_router", "vocabulary_router", "metrics_router", "examples_router"]
\ No newline at end of file
+# Routers are imported on first access, so a deployment only pays for the routers it mounts
+_ROUTER_MODULES = {
+    "sessions_router": "sessions",
+    "texts_router": "texts",
+    "feedback_router": "feedback",
+    "history_router": "history",
+    "vocabulary_router": "vocabulary",
+    "metrics_router": "metrics",
+    "examples_router": "examples",
+    "prompts_router": "prompts",
+    "profiling_router": "profiling",
+    "events_router": "events"
+}
+
+def __getattr__(name):
+    if name in _ROUTER_MODULES:
+        return importlib.import_module(f".{_ROUTER_MODULES[name]}", __name__).router
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+__all__ = list(_ROUTER_MODULES)
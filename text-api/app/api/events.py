@@ -0,0 +1,147 @@
+import asyncio
+import json
+from typing import Dict, Optional, Set
+from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from ..utils import JSONStorage
+from ..utils.events import EVENT_TYPES, event_bus, several_workers
+
+router = APIRouter(prefix="/api/v1/events", tags=["events"])
+storage = JSONStorage()
+
+# A write is published only in the worker that handled it; with several workers,
+# one watcher per worker finds the writes of the others on disk for all its streams
+if several_workers():
+    event_bus.watch(storage)
+
+# Seconds without events before an SSE keep-alive comment / WebSocket heartbeat is sent
+HEARTBEAT_INTERVAL = 15
+
+def _parse_types(types: Optional[str]) -> Optional[Set[str]]:
+    """Event types from a comma-separated filter, None for all"""
+    if not types:
+        return None
+    selected = {t.strip() for t in types.split(",") if t.strip()}
+    unknown = selected - set(EVENT_TYPES)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown event types {sorted(unknown)}; use {list(EVENT_TYPES)}")
+    return selected
+
+def _snapshot(session_id: str) -> Dict:
+    """First event of a session stream: the state the following events apply to"""
+    current = storage.get_current_data(session_id)
+    best = current["best_attempt"] if current else None
+    return {
+        "type": "snapshot",
+        "session_id": session_id,
+        "state_version": storage.get_state_version(session_id),
+        "data": {
+            "attempt_number": current["attempt_number"] if current else 1,
+            "text": {"id": current["text"]["id"], "version": current["text"]["version"]} if current else None,
+            "has_feedback": current is not None and current["feedback"] is not None,
+            "best_attempt": {"id": best["id"], "version": best["version"]} if best else None
+        }
+    }
+
+def _sse(event: Dict) -> str:
+    lines = f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+    return f"id: {event['id']}\n{lines}" if "id" in event else lines
+
+async def _sse_stream(session_id: Optional[str], types: Optional[Set[str]]):
+    with event_bus.subscription(session_id) as subscriber:
+        await subscriber.prime()
+        if session_id is not None:
+            yield _sse(_snapshot(session_id))
+        while True:
+            try:
+                event = await asyncio.wait_for(subscriber.next(), HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if types is None or event["type"] not in EVENT_TYPES or event["type"] in types:
+                yield _sse(event)
+
+async def _until_disconnect(websocket: WebSocket):
+    """Read and ignore client messages until the client disconnects"""
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+
+async def _websocket_stream(websocket: WebSocket, session_id: Optional[str], types: Optional[Set[str]]):
+    await websocket.accept()
+    with event_bus.subscription(session_id) as subscriber:
+        # Clients have nothing to send; receiving only tells us when they disconnect
+        closed = asyncio.ensure_future(_until_disconnect(websocket))
+        try:
+            await subscriber.prime()
+            if session_id is not None:
+                await websocket.send_json(_snapshot(session_id))
+            while True:
+                next_event = asyncio.ensure_future(subscriber.next())
+                done, _ = await asyncio.wait({next_event, closed}, timeout=HEARTBEAT_INTERVAL,
+                                             return_when=asyncio.FIRST_COMPLETED)
+                if closed in done:
+                    next_event.cancel()
+                    return
+                if next_event not in done:
+                    next_event.cancel()
+                    await websocket.send_json({"type": "heartbeat"})
+                    continue
+                event = next_event.result()
+                if types is None or event["type"] not in EVENT_TYPES or event["type"] in types:
+                    await websocket.send_json(event)
+        except WebSocketDisconnect:
+            return
+        finally:
+            closed.cancel()
+
+@router.get("/stream")
+async def stream_all_events(types: Optional[str] = Query(None, description="Comma-separated event types, default all")):
+    """
+    Server-Sent Events stream of the events of every session
+    
+    Events: text_update, feedback, best_attempt_changed, and lagged when this
+    client fell behind and events were dropped.
+    """
+    return StreamingResponse(_sse_stream(None, _parse_types(types)), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.get("/{session_id}/stream")
+async def stream_session_events(session_id: str, types: Optional[str] = Query(None, description="Comma-separated event types, default all")):
+    """
+    Server-Sent Events stream of one session, starting with a snapshot of its state
+    """
+    if not storage.session_exists(session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    return StreamingResponse(_sse_stream(session_id, _parse_types(types)), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.websocket("/ws")
+async def websocket_all_events(websocket: WebSocket, types: Optional[str] = None):
+    """WebSocket variant of /stream: one JSON message per event"""
+    try:
+        selected = _parse_types(types)
+    except HTTPException:
+        await websocket.close(code=1008)
+        return
+    await _websocket_stream(websocket, None, selected)
+
+@router.websocket("/{session_id}/ws")
+async def websocket_session_events(websocket: WebSocket, session_id: str, types: Optional[str] = None):
+    """WebSocket variant of /{session_id}/stream: one JSON message per event"""
+    try:
+        selected = _parse_types(types)
+    except HTTPException:
+        await websocket.close(code=1008)
+        return
+    if not storage.session_exists(session_id):
+        await websocket.close(code=1008)
+        return
+    await _websocket_stream(websocket, session_id, selected)
+
+@router.get("/stats")
+async def get_event_stats():
+    """Number of stream clients connected to this worker"""
+    return {"subscribers": event_bus.subscriber_count()}
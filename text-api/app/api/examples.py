@@ -2,10 +2,10 @@ from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import PlainTextResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict
-import json
 from pathlib import Path
 import random
 import logging
+from ..utils.example_store import ExampleStore
 
 logger = logging.getLogger(__name__)
 
@@ -13,9 +13,10 @@ router = APIRouter()
 
 # Cache for trial data
 trial_data_cache = None
+example_retriever = None
 
-def load_trial_data():
-    """Load and cache the trial data"""
+def load_trial_data() -> ExampleStore:
+    """Load and cache the trial data as an indexed, memory-mapped example store"""
     global trial_data_cache
     
     if trial_data_cache is None:
@@ -25,17 +26,33 @@ def load_trial_data():
             raise FileNotFoundError(f"Trial data file not found at {trial_data_path}")
         
         logger.info(f"Loading trial data from {trial_data_path}")
-        trial_data_cache = []
-        
-        with open(trial_data_path, 'r', encoding='utf-8') as f:
-            for line in f:
-                if line.strip():
-                    trial_data_cache.append(json.loads(line))
+        trial_data_cache = ExampleStore(trial_data_path)
         
         logger.info(f"Loaded {len(trial_data_cache)} examples from trial data")
     
     return trial_data_cache
 
+def get_example_retriever():
+    """Build the similarity index over the trial data on first use"""
+    global example_retriever
+    
+    if example_retriever is None:
+        from ..utils.example_retriever import ExampleRetriever
+        example_retriever = ExampleRetriever(load_trial_data())
+    
+    return example_retriever
+
+def format_examples(examples: List[Dict]) -> str:
+    """Format examples as numbered natural language blocks"""
+    response_text = ""
+    for i, example in enumerate(examples, 1):
+        response_text += f"Example {i}:\n"
+        response_text += f"original: {example['original']}\n"
+        response_text += f"translation: {example['reference']}\n"
+        if i < len(examples):  # Add blank line between examples except after the last one
+            response_text += "\n"
+    return response_text
+
 class ExampleData(BaseModel):
     dataset_id: str
     text_id: str
@@ -51,7 +68,9 @@ class SimpleExampleData(BaseModel):
 async def get_examples(
     count: int = Query(..., ge=1, le=20, description="Number of examples to return (1-20)"),
     text_id: Optional[str] = Query("", description="Text ID to exclude from results"),
-    target_cefr: str = Query(..., description="Target CEFR level (a2 or b1)")
+    target_cefr: str = Query(..., description="Target CEFR level (a2 or b1)"),
+    mode: str = Query("random", description="Selection mode: 'random' or 'similar'"),
+    source_text: Optional[str] = Query(None, description="Text being simplified (required for mode=similar)")
 ) -> str:
     """
     Get examples from the trial data based on criteria.
@@ -60,6 +79,9 @@ async def get_examples(
     - count: Number of examples to return (1-20)
     - text_id: Optional text ID to exclude from results
     - target_cefr: Target CEFR level to filter by (a2 or b1)
+    - mode: 'random' samples examples; 'similar' returns the examples whose
+      original is most similar (TF-IDF cosine) to source_text, most similar first
+    - source_text: The text being simplified, used by mode=similar
     
     Returns examples in natural language format with numbered examples, original text and translation.
     """
@@ -69,45 +91,49 @@ async def get_examples(
         if target_cefr not in ['a2', 'b1']:
             raise HTTPException(status_code=400, detail="target_cefr must be 'a2' or 'b1'")
         
+        mode = mode.lower()
+        if mode not in ['random', 'similar']:
+            raise HTTPException(status_code=400, detail="mode must be 'random' or 'similar'")
+        
+        if mode == 'similar':
+            if not source_text or not source_text.strip():
+                raise HTTPException(status_code=400, detail="source_text is required when mode is 'similar'")
+            
+            selected_examples = get_example_retriever().top_k(source_text, target_cefr, count, text_id)
+            return format_examples(selected_examples)
+        
         # Load trial data
         trial_data = load_trial_data()
         
-        # Filter by target_cefr
-        filtered_examples = [
-            example for example in trial_data 
-            if example.get('target_cefr', '').lower() == target_cefr
-        ]
+        # Filter by target_cefr using the level index
+        candidates = trial_data.level_positions(target_cefr)
         
         # Exclude text_id if provided
         if text_id and text_id.strip():
-            filtered_examples = [
-                example for example in filtered_examples 
-                if example.get('text_id', '') != text_id
-            ]
+            excluded = set(trial_data.positions_of(text_id))
+            if excluded:
+                candidates = [position for position in candidates if position not in excluded]
         
         # Limit to requested count
-        total_available = len(filtered_examples)
+        total_available = len(candidates)
         
         # If we have more examples than requested, randomly sample
         if total_available > count:
-            selected_examples = random.sample(filtered_examples, count)
+            selected = random.sample(candidates, count)
         else:
-            selected_examples = filtered_examples
+            selected = candidates
         
-        # Convert to natural language format
-        response_text = ""
-        for i, example in enumerate(selected_examples, 1):
-            response_text += f"Example {i}:\n"
-            response_text += f"original: {example['original']}\n"
-            response_text += f"translation: {example['reference']}\n"
-            if i < len(selected_examples):  # Add blank line between examples except after the last one
-                response_text += "\n"
+        # Decode only the selected records
+        selected_examples = [trial_data[position] for position in selected]
         
-        return response_text
+        # Convert to natural language format
+        return format_examples(selected_examples)
         
     except FileNotFoundError as e:
         logger.error(f"Trial data file not found: {e}")
         raise HTTPException(status_code=500, detail="Trial data file not found")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting examples: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error getting examples: {str(e)}")
@@ -127,15 +153,15 @@ async def get_example_by_id(text_id: str) -> ExampleData:
         trial_data = load_trial_data()
         
         # Find the example with matching text_id
-        for example in trial_data:
-            if example.get('text_id', '') == text_id:
-                return ExampleData(
-                    dataset_id=example['dataset_id'],
-                    text_id=example['text_id'],
-                    original=example['original'],
-                    target_cefr=example['target_cefr'],
-                    reference=example['reference']
-                )
+        example = trial_data.get(text_id)
+        if example is not None:
+            return ExampleData(
+                dataset_id=example['dataset_id'],
+                text_id=example['text_id'],
+                original=example['original'],
+                target_cefr=example['target_cefr'],
+                reference=example['reference']
+            )
         
         # If not found
         raise HTTPException(status_code=404, detail=f"Example with text_id '{text_id}' not found")
@@ -160,26 +186,13 @@ async def get_stats() -> Dict:
         # Load trial data
         trial_data = load_trial_data()
         
-        # Count by CEFR level
+        # Counts are precomputed when the store is indexed
         stats = {
-            'total': len(trial_data),
-            'by_cefr': {}
+            'total': trial_data.stats['total'],
+            'by_cefr': dict(trial_data.stats['by_cefr']),
+            'unique_texts': trial_data.stats['unique_texts']
         }
         
-        for example in trial_data:
-            cefr = example.get('target_cefr', 'unknown').lower()
-            stats['by_cefr'][cefr] = stats['by_cefr'].get(cefr, 0) + 1
-        
-        # Get unique text IDs (without CEFR suffix)
-        unique_texts = set()
-        for example in trial_data:
-            text_id = example.get('text_id', '')
-            if '-' in text_id:
-                base_id = text_id.rsplit('-', 1)[0]
-                unique_texts.add(base_id)
-        
-        stats['unique_texts'] = len(unique_texts)
-        
         return stats
         
     except FileNotFoundError as e:
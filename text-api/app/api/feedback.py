@@ -1,6 +1,7 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
 from ..models import FeedbackCreate, Feedback, MetricsEvaluation
 from ..utils import JSONStorage
+from ..utils.http_caching import check_session_etag
 
 router = APIRouter(prefix="/api/v1/feedback", tags=["feedback"])
 storage = JSONStorage()
@@ -10,11 +11,6 @@ async def create_feedback(feedback_data: FeedbackCreate):
     if not storage.session_exists(feedback_data.session_id):
         raise HTTPException(status_code=404, detail="Session not found")
     
-    current = storage.get_current(feedback_data.session_id)
-    
-    if not current or not current.text:
-        raise HTTPException(status_code=400, detail="No text found to evaluate")
-    
     # Create metrics object if any metric fields are provided
     metrics = None
     if feedback_data.cefr_compliance or feedback_data.bertscore or feedback_data.meaningbert:
@@ -32,7 +28,14 @@ async def create_feedback(feedback_data: FeedbackCreate):
         metrics=metrics
     )
     
-    storage.save_feedback(feedback_data.session_id, feedback)
+    # The feedback applies to the text that is current while the session lock is held
+    with storage.session_lock(feedback_data.session_id):
+        current = storage.get_current(feedback_data.session_id)
+        
+        if not current or not current.text:
+            raise HTTPException(status_code=400, detail="No text found to evaluate")
+        
+        storage.save_feedback(feedback_data.session_id, feedback)
     
     return {
         "session_id": feedback_data.session_id,
@@ -42,40 +45,45 @@ async def create_feedback(feedback_data: FeedbackCreate):
     }
 
 @router.get("/{session_id}/current")
-async def get_current_feedback(session_id: str):
+async def get_current_feedback(session_id: str, request: Request, response: Response):
     if not storage.session_exists(session_id):
         raise HTTPException(status_code=404, detail="Session not found")
     
-    current = storage.get_current(session_id)
+    check_session_etag(storage, session_id, request, response)
     
-    if not current or not current.feedback:
+    current = storage.get_current_data(session_id)
+    
+    if not current or not current["feedback"]:
         raise HTTPException(status_code=404, detail="No feedback found for current text")
     
     return {
         "session_id": session_id,
-        "feedback": current.feedback.model_dump(),
-        "text_version": current.text.version if current.text else None
+        "feedback": current["feedback"],
+        "text_version": current["text"]["version"]
     }
 
 @router.get("/{session_id}/all")
-async def get_all_feedback(session_id: str):
+async def get_all_feedback(session_id: str, request: Request, response: Response):
     if not storage.session_exists(session_id):
         raise HTTPException(status_code=404, detail="Session not found")
     
-    history = storage.get_history(session_id)
+    check_session_etag(storage, session_id, request, response)
+    
+    history = storage.get_history_data(session_id)
     
     if not history:
         return {"feedbacks": []}
     
     feedbacks = []
-    for msg in history.messages:
-        if msg.metadata and msg.metadata.get("action") == "feedback":
+    for msg in history["messages"]:
+        metadata = msg.get("metadata")
+        if metadata and metadata.get("action") == "feedback":
             feedbacks.append({
-                "feedback_id": msg.metadata.get("feedback_id"),
-                "timestamp": msg.timestamp,
-                "grade": msg.metadata.get("grade"),
-                "approval": msg.metadata.get("approval"),
-                "feedback_text": msg.metadata.get("feedback_text")
+                "feedback_id": metadata.get("feedback_id"),
+                "timestamp": msg["timestamp"],
+                "grade": metadata.get("grade"),
+                "approval": metadata.get("approval"),
+                "feedback_text": metadata.get("feedback_text")
             })
     
     return {"session_id": session_id, "feedbacks": feedbacks}
\ No newline at end of file
@@ -1,63 +1,72 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
 from ..utils import JSONStorage
+from ..utils.http_caching import check_session_etag
 
 router = APIRouter(prefix="/api/v1/history", tags=["history"])
 storage = JSONStorage()
 
 @router.get("/{session_id}")
-async def get_history(session_id: str):
+async def get_history(session_id: str, request: Request, response: Response):
     if not storage.session_exists(session_id):
         raise HTTPException(status_code=404, detail="Session not found")
     
-    history = storage.get_history(session_id)
+    etag = check_session_etag(storage, session_id, request, response)
+    
+    history = storage.get_history_data(session_id)
     
     if not history:
         raise HTTPException(status_code=404, detail="No history found for this session")
     
-    return history.model_dump()
+    # Already JSON data: skip the response encoding pass, the slowest part for long histories
+    return JSONResponse(history, headers={"ETag": etag})
 
 @router.get("/{session_id}/llm-format")
-async def get_history_llm_format(session_id: str):
+async def get_history_llm_format(session_id: str, request: Request, response: Response):
     if not storage.session_exists(session_id):
         raise HTTPException(status_code=404, detail="Session not found")
     
-    history = storage.get_history(session_id)
+    etag = check_session_etag(storage, session_id, request, response)
+    
+    history = storage.get_history_data(session_id)
     
     if not history:
         raise HTTPException(status_code=404, detail="No history found for this session")
     
     conversation = []
-    for msg in history.messages:
+    for msg in history["messages"]:
         conversation.append({
-            "role": msg.role,
-            "content": msg.content
+            "role": msg["role"],
+            "content": msg["content"]
         })
     
-    return {
+    return JSONResponse({
         "session_id": session_id,
         "conversation": conversation,
         "total_messages": len(conversation)
-    }
+    }, headers={"ETag": etag})
 
 @router.get("/{session_id}/messages")
-async def get_messages_only(session_id: str):
+async def get_messages_only(session_id: str, request: Request, response: Response):
     if not storage.session_exists(session_id):
         raise HTTPException(status_code=404, detail="Session not found")
     
-    history = storage.get_history(session_id)
+    etag = check_session_etag(storage, session_id, request, response)
+    
+    history = storage.get_history_data(session_id)
     
     if not history:
         return {"messages": []}
     
     messages = []
-    for msg in history.messages:
+    for msg in history["messages"]:
         messages.append({
-            "timestamp": msg.timestamp,
-            "role": msg.role,
-            "content": msg.content
+            "timestamp": msg["timestamp"],
+            "role": msg["role"],
+            "content": msg["content"]
         })
     
-    return {
+    return JSONResponse({
         "session_id": session_id,
         "messages": messages
-    }
\ No newline at end of file
+    }, headers={"ETag": etag})
\ No newline at end of file
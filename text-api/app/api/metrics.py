@@ -1,13 +1,13 @@
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import Dict, Any
-import numpy as np
-from transformers import pipeline
-import evaluate
+from pydantic import BaseModel, Field
+from typing import Dict, Any, List, Optional
+import importlib.metadata
 import asyncio
 import logging
 import os
 import warnings
+from ..utils.batching import token_lengths, run_bucketed, PaddingReport
+from ..utils.profiling import timed
 
 # Suppress specific warnings
 warnings.filterwarnings("ignore", category=FutureWarning)
@@ -17,22 +17,44 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Models behind the metrics; stored metrics are stamped with this config (see metrics_config)
+CEFR_MODEL_NAMES = [
+    "AbdullahBarayan/ModernBERT-base-doc_en-Cefr",
+    "AbdullahBarayan/ModernBERT-base-doc_sent_en-Cefr",
+    "AbdullahBarayan/ModernBERT-base-reference_AllLang2-Cefr2"
+]
+MEANINGBERT_MODEL = "davebulaval/meaningbert"
+BERTSCORE_MODEL = "bertscore"
+
+# Padded tokens per length bucket in batch evaluation (CPU models)
+TOKEN_BUDGET = 4096
+# Fixed batch size the padding report compares against
+FIXED_BATCH_SIZE = 8
+
 # Initialize models and metrics (lazy loading)
 cefr_models = None
 meaning_bert = None
 bertscore = None
+bertscore_device = None
 
 def initialize_models():
-    """Initialize models on first use"""
+    """
+    Initialize models on first use
+    transformers, evaluate and torch are imported here rather than at module level,
+    so the API starts without the ML stack and only pays for it on the first metrics call.
+    """
     global cefr_models, meaning_bert, bertscore
     
+    if cefr_models is None or meaning_bert is None or bertscore is None:
+        from transformers import pipeline
+        import evaluate
+    
     if cefr_models is None:
         logger.info("Loading CEFR models...")
         try:
             cefr_models = [
-                pipeline(task="text-classification", model="AbdullahBarayan/ModernBERT-base-doc_en-Cefr", device=-1),
-                pipeline(task="text-classification", model="AbdullahBarayan/ModernBERT-base-doc_sent_en-Cefr", device=-1),
-                pipeline(task="text-classification", model="AbdullahBarayan/ModernBERT-base-reference_AllLang2-Cefr2", device=-1)
+                pipeline(task="text-classification", model=model_name, device=-1)
+                for model_name in CEFR_MODEL_NAMES
             ]
             logger.info("CEFR models loaded")
         except Exception as e:
@@ -42,7 +64,7 @@ def initialize_models():
     if meaning_bert is None:
         logger.info("Loading MeaningBERT...")
         try:
-            meaning_bert = evaluate.load("davebulaval/meaningbert")
+            meaning_bert = evaluate.load(MEANINGBERT_MODEL)
             logger.info("MeaningBERT loaded")
         except Exception as e:
             logger.error(f"Error loading MeaningBERT: {e}")
@@ -51,12 +73,49 @@ def initialize_models():
     if bertscore is None:
         logger.info("Loading BERTScore...")
         try:
-            bertscore = evaluate.load("bertscore")
+            bertscore = evaluate.load(BERTSCORE_MODEL)
             logger.info("BERTScore loaded")
         except Exception as e:
             logger.error(f"Error loading BERTScore: {e}")
             raise
 
+def select_device() -> str:
+    """
+    Torch device for BERTScore on this host: "cuda", else "mps" (Apple silicon), else "cpu"
+    Picked once, on first use, so importing this module does not import torch.
+    """
+    global bertscore_device
+    
+    if bertscore_device is None:
+        try:
+            import torch
+            if torch.cuda.is_available():
+                bertscore_device = "cuda"
+            elif getattr(torch.backends, "mps", None) is not None and torch.backends.mps.is_available():
+                bertscore_device = "mps"
+            else:
+                bertscore_device = "cpu"
+        except ImportError:
+            bertscore_device = "cpu"
+        logger.info(f"BERTScore runs on {bertscore_device}")
+    return bertscore_device
+
+def _package_version(name: str) -> Optional[str]:
+    """Installed version of a package, read from its metadata without importing it"""
+    try:
+        return importlib.metadata.version(name)
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+def metrics_config() -> Dict[str, Any]:
+    """Models and library version the metrics are computed with"""
+    return {
+        "cefr_models": CEFR_MODEL_NAMES,
+        "meaningbert": MEANINGBERT_MODEL,
+        "bertscore": BERTSCORE_MODEL,
+        "transformers": _package_version("transformers")
+    }
+
 def get_cefr_label(text: str) -> str:
     """Get CEFR label for a single text"""
     if cefr_models is None:
@@ -76,11 +135,11 @@ def get_bertscore(simplified: str, original: str) -> float:
             references=[original], 
             predictions=[simplified], 
             lang="en",
-            device="mps",
+            device=select_device(),
             batch_size=1,
             verbose=False
         )
-        return round(float(np.mean(result["f1"])), 4)
+        return round(float(sum(result["f1"]) / len(result["f1"])), 4)
     except Exception as e:
         logger.error(f"Error calculating BERTScore: {e}")
         # Return a default value if BERTScore fails
@@ -102,6 +161,77 @@ def get_meaningbert_score(simplified: str, original: str) -> float:
         # Return a default value if MeaningBERT fails
         return 0.0
 
+def get_batch_metrics(simplified: List[str], original: List[str], strict: bool = False) -> Dict[str, Any]:
+    """
+    Calculate the three metrics for many (simplified, original) pairs
+    
+    Every model runs on length buckets under TOKEN_BUDGET instead of batches
+    in arrival order; outputs are returned in input order.
+    A failing MeaningBERT or BERTScore call scores the batch 0.0, or raises if strict.
+    """
+    initialize_models()
+    report = PaddingReport()
+    
+    # Lengths from the first CEFR classifier's tokenizer, used for all models
+    tokenizer = cefr_models[0].tokenizer
+    simplified_lengths = token_lengths(tokenizer, simplified)
+    original_lengths = token_lengths(tokenizer, original)
+    pairs = list(zip(simplified, original))
+    
+    def classify(model):
+        outputs = run_bucketed(simplified, simplified_lengths,
+                               lambda batch: model(batch, batch_size=len(batch), truncation=True),
+                               TOKEN_BUDGET, report=report, fixed_batch_size=FIXED_BATCH_SIZE)
+        return [output if isinstance(output, dict) else output[0] for output in outputs]
+    
+    predictions = [classify(model) for model in cefr_models]
+    cefr_labels = [max(preds, key=lambda d: d["score"])["label"] for preds in zip(*predictions)]
+    
+    try:
+        # MeaningBERT encodes both texts as one sequence
+        meaningbert_scores = run_bucketed(
+            pairs, [s + o for s, o in zip(simplified_lengths, original_lengths)],
+            lambda batch: meaning_bert.compute(predictions=[s for s, _ in batch], references=[o for _, o in batch])["scores"],
+            TOKEN_BUDGET, report=report, fixed_batch_size=FIXED_BATCH_SIZE)
+        meaningbert_scores = [round(score / 100, 4) for score in meaningbert_scores]
+    except Exception as e:
+        logger.error(f"Error calculating MeaningBERT: {e}")
+        if strict:
+            raise
+        meaningbert_scores = [0.0] * len(pairs)
+    
+    try:
+        # BERTScore pads each side on its own
+        bertscore_scores = run_bucketed(
+            pairs, [max(s, o) for s, o in zip(simplified_lengths, original_lengths)],
+            lambda batch: bertscore.compute(
+                references=[o for _, o in batch],
+                predictions=[s for s, _ in batch],
+                lang="en",
+                device=select_device(),
+                batch_size=len(batch),
+                verbose=False
+            )["f1"],
+            TOKEN_BUDGET, report=report, fixed_batch_size=FIXED_BATCH_SIZE)
+        bertscore_scores = [round(float(score), 4) for score in bertscore_scores]
+    except Exception as e:
+        logger.error(f"Error calculating BERTScore: {e}")
+        if strict:
+            raise
+        bertscore_scores = [0.0] * len(pairs)
+    
+    padding = report.summary()
+    logger.info(f"Batch metrics for {len(pairs)} texts: padding {padding['bucketed_padding_ratio']:.1%} "
+                f"vs {padding['fixed_padding_ratio']:.1%} with fixed batches of {FIXED_BATCH_SIZE}")
+    
+    return {
+        "results": [
+            {"cefr_compliance": label, "bertscore": bs, "meaningbert": mb}
+            for label, bs, mb in zip(cefr_labels, bertscore_scores, meaningbert_scores)
+        ],
+        "padding": padding
+    }
+
 class TextMetricsRequest(BaseModel):
     simplified_text: str
     original_text: str
@@ -111,6 +241,13 @@ class TextMetricsResponse(BaseModel):
     bertscore: float
     meaningbert: float
 
+class TextMetricsBatchRequest(BaseModel):
+    items: List[TextMetricsRequest] = Field(..., min_length=1)
+
+class TextMetricsBatchResponse(BaseModel):
+    results: List[TextMetricsResponse]
+    padding: Dict[str, Any]
+
 @router.post("/evaluate", response_model=TextMetricsResponse)
 async def evaluate_text_metrics(request: TextMetricsRequest) -> TextMetricsResponse:
     """
@@ -126,9 +263,10 @@ async def evaluate_text_metrics(request: TextMetricsRequest) -> TextMetricsRespo
         initialize_models()
         
         # Calculate metrics sequentially to avoid threading issues with tqdm
-        cefr_result = get_cefr_label(request.simplified_text)
-        bert_result = get_bertscore(request.simplified_text, request.original_text)
-        meaning_result = get_meaningbert_score(request.simplified_text, request.original_text)
+        with timed("inference_ms"):
+            cefr_result = get_cefr_label(request.simplified_text)
+            bert_result = get_bertscore(request.simplified_text, request.original_text)
+            meaning_result = get_meaningbert_score(request.simplified_text, request.original_text)
         
         return TextMetricsResponse(
             cefr_compliance=cefr_result,
@@ -142,6 +280,29 @@ async def evaluate_text_metrics(request: TextMetricsRequest) -> TextMetricsRespo
         logger.error(f"Traceback: {traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=f"Error evaluating metrics: {str(e)}")
 
+@router.post("/evaluate-batch", response_model=TextMetricsBatchResponse)
+async def evaluate_text_metrics_batch(request: TextMetricsBatchRequest) -> TextMetricsBatchResponse:
+    """
+    Evaluate many simplifications in one request.
+    
+    Returns the same three metrics as /evaluate for each item, in request order.
+    Texts are batched by tokenized length, so short and long texts are not padded
+    together; `padding` reports the padding ratio against fixed-size batches.
+    """
+    try:
+        with timed("inference_ms"):
+            metrics = get_batch_metrics(
+                [item.simplified_text for item in request.items],
+                [item.original_text for item in request.items]
+            )
+        return TextMetricsBatchResponse(**metrics)
+        
+    except Exception as e:
+        logger.error(f"Error evaluating batch metrics: {str(e)}")
+        import traceback
+        logger.error(f"Traceback: {traceback.format_exc()}")
+        raise HTTPException(status_code=500, detail=f"Error evaluating metrics: {str(e)}")
+
 @router.get("/health")
 async def health_check() -> Dict[str, Any]:
     """Check if the metrics endpoint is healthy and models are loaded"""
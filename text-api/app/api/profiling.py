@@ -0,0 +1,40 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from ..utils.profiling import route_stats, profile_summary
+
+router = APIRouter(prefix="/api/v1/profiling", tags=["profiling"])
+
+@router.get("/routes")
+async def get_route_stats():
+    """
+    Per-route request time and storage counters since startup (or the last reset)
+    per_request holds the mean storage work per request: files opened, bytes read
+    and written, models validated and the time spent reading, parsing, validating,
+    writing and in model inference.
+    """
+    return {"routes": route_stats.summary()}
+
+@router.delete("/routes")
+async def reset_route_stats():
+    route_stats.reset()
+    return {"message": "Route statistics reset"}
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(
+    profile_id: str,
+    limit: int = Query(40, ge=1, le=500, description="Number of functions to list"),
+    sort: str = Query("cumulative", description="pstats sort key: cumulative, tottime, calls...")
+):
+    """Report of a profile taken with the X-Profile header"""
+    if not profile_id.isalnum():
+        raise HTTPException(status_code=400, detail="Invalid profile id")
+    
+    try:
+        summary = profile_summary(profile_id, limit, sort)
+    except KeyError:
+        raise HTTPException(status_code=400, detail=f"Invalid sort key: {sort}")
+    
+    if summary is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    
+    return summary
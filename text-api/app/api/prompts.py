@@ -0,0 +1,117 @@
+from fastapi import APIRouter, HTTPException
+from pathlib import Path
+from typing import Callable, Dict
+import json
+import logging
+from ..models import PromptRenderRequest
+from ..utils import JSONStorage
+from ..utils.prompt_templates import PromptTemplates, split_sections
+from .vocabulary import get_vocab_processor, build_tag_response
+from .examples import get_example_retriever, format_examples
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/v1/prompts", tags=["prompts"])
+storage = JSONStorage()
+templates = PromptTemplates(Path(__file__).parent.parent.parent.parent / "prompts")
+
+def _to_json(value) -> str:
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+def _examples(request: PromptRenderRequest, target_cefr: str) -> str:
+    if request.example_count == 0 or target_cefr.lower() not in ['a2', 'b1']:
+        return ""
+    try:
+        examples = get_example_retriever().top_k(request.original_text, target_cefr, request.example_count, request.text_id)
+    except FileNotFoundError as e:
+        logger.error(f"Trial data file not found: {e}")
+        return ""
+    return format_examples(examples)
+
+@router.get("/templates")
+async def list_templates():
+    """
+    List the available prompt templates and their placeholders
+    """
+    result = []
+    for name in templates.names():
+        template = templates.get(name)
+        if template is not None:
+            result.append({"name": name, "placeholders": template.placeholders})
+    return {"templates": result}
+
+@router.post("/render")
+async def render_prompt(request: PromptRenderRequest):
+    """
+    Render a prompt template for a session in one call
+    
+    Fills the template placeholders from the session and the request:
+    - original_text, keywords: from the request
+    - target_cefr: from the session
+    - current_text / previous_text: the session's current text
+    - evaluators_feedback: the latest feedback on the current text
+    - tagged_words: vocabulary tags of the text being worked on (the current
+      text if there is one, otherwise the original), grouped by level
+    - vocabulary_profile: level profile of that text against the target level
+    - trial_data_examples: the trial examples most similar to the original text
+    - metrics_computation: metrics from the request, for evaluator templates
+    - best_attempt: text of the session's best attempt so far
+    
+    Only the placeholders used by the template are computed. The rendered
+    prompt is returned whole and split into system and query prompts.
+    """
+    template = templates.get(request.template)
+    if template is None:
+        raise HTTPException(status_code=404, detail=f"Template '{request.template}' not found. Available templates: {templates.names()}")
+    
+    if not storage.session_exists(request.session_id):
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    try:
+        current = storage.get_current(request.session_id)
+        session_info = storage.get_session_info(request.session_id) or {}
+        target_cefr = session_info.get("target_cefr") or ""
+        
+        current_text = current.text.text_translated if current and current.text else ""
+        working_text = current_text or request.original_text
+        
+        keywords = request.keywords
+        if isinstance(keywords, list):
+            keywords = _to_json(keywords)
+        
+        builders: Dict[str, Callable[[], str]] = {
+            "original_text": lambda: request.original_text,
+            "target_cefr": lambda: target_cefr,
+            "current_text": lambda: current_text,
+            "previous_text": lambda: current_text,
+            "keywords": lambda: keywords or "",
+            "evaluators_feedback": lambda: _to_json(current.feedback.model_dump()) if current and current.feedback else "",
+            "tagged_words": lambda: _to_json(build_tag_response(working_text).tagged_words),
+            "vocabulary_profile": lambda: _to_json(get_vocab_processor().profile_text(working_text, target_cefr)) if target_cefr else "",
+            "trial_data_examples": lambda: _examples(request, target_cefr),
+            "metrics_computation": lambda: _to_json(request.metrics) if request.metrics else "",
+            "best_attempt": lambda: current.best_attempt.text_translated if current and current.best_attempt else ""
+        }
+        
+        values = {}
+        missing = []
+        for placeholder in template.placeholders:
+            builder = builders.get(placeholder)
+            values[placeholder] = builder() if builder else ""
+            if not values[placeholder]:
+                missing.append(placeholder)
+        
+        prompt = template.render(values)
+        
+        return {
+            "session_id": request.session_id,
+            "template": template.name,
+            "target_cefr": target_cefr,
+            "prompt": prompt,
+            **split_sections(prompt),
+            "empty_placeholders": missing
+        }
+    
+    except Exception as e:
+        logger.error(f"Error rendering prompt: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error rendering prompt: {str(e)}")
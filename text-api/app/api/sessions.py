@@ -1,6 +1,8 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from ..models import SessionResponse, SessionCreate
 from ..utils import JSONStorage
+from ..utils.http_caching import check_session_etag
+from ..utils.leaderboard import DEFAULT_RANKING, LEADERBOARD_SIZE, RANKINGS, top_entries
 import uuid
 
 router = APIRouter(prefix="/api/v1/sessions", tags=["sessions"])
@@ -13,46 +15,52 @@ async def create_session(request: SessionCreate):
     return SessionResponse(**session_data)
 
 @router.get("/{session_id}/status")
-async def get_session_status(session_id: str):
+async def get_session_status(session_id: str, request: Request, response: Response):
     if not storage.session_exists(session_id):
         raise HTTPException(status_code=404, detail="Session not found")
     
-    history = storage.get_history(session_id)
-    current = storage.get_current(session_id)
+    check_session_etag(storage, session_id, request, response)
+    
+    history = storage.get_history_data(session_id)
+    current = storage.get_current_data(session_id)
     session_info = storage.get_session_info(session_id)
     
     return {
         "session_id": session_id,
         "exists": True,
-        "created_at": history.created_at if history else None,
+        "created_at": history["created_at"] if history else None,
         "target_cefr": session_info.get("target_cefr") if session_info else None,
-        "has_current_text": current is not None and current.text is not None,
-        "has_feedback": current is not None and current.feedback is not None,
-        "message_count": len(history.messages) if history else 0,
-        "attempt_number": current.attempt_number if current else 1
+        "has_current_text": current is not None,
+        "has_feedback": current is not None and current["feedback"] is not None,
+        "message_count": len(history["messages"]) if history else 0,
+        "attempt_number": current["attempt_number"] if current else 1
     }
 
 @router.get("/{session_id}/attempt-number")
-async def get_attempt_number(session_id: str):
+async def get_attempt_number(session_id: str, request: Request, response: Response):
     if not storage.session_exists(session_id):
         raise HTTPException(status_code=404, detail="Session not found")
     
-    current = storage.get_current(session_id)
+    check_session_etag(storage, session_id, request, response)
+    
+    current = storage.get_current_data(session_id)
     
     return {
         "session_id": session_id,
-        "attempt_number": current.attempt_number if current else 1
+        "attempt_number": current["attempt_number"] if current else 1
     }
 
 @router.get("/{session_id}/best-attempt")
-async def get_best_attempt(session_id: str):
+async def get_best_attempt(session_id: str, request: Request, response: Response):
     if not storage.session_exists(session_id):
         raise HTTPException(status_code=404, detail="Session not found")
     
-    current = storage.get_current(session_id)
+    check_session_etag(storage, session_id, request, response)
+    
+    current = storage.get_current_data(session_id)
     session_info = storage.get_session_info(session_id)
     
-    if not current or not current.best_attempt:
+    if not current or not current["best_attempt"]:
         return {
             "session_id": session_id,
             "has_best_attempt": False,
@@ -64,5 +72,37 @@ async def get_best_attempt(session_id: str):
         "session_id": session_id,
         "has_best_attempt": True,
         "target_cefr": session_info.get("target_cefr") if session_info else None,
-        "best_attempt": current.best_attempt.model_dump() if current.best_attempt else None
-    }
\ No newline at end of file
+        "best_attempt": current["best_attempt"]
+    }
+
+@router.get("/{session_id}/leaderboard")
+async def get_leaderboard(
+    session_id: str,
+    request: Request,
+    response: Response,
+    k: int = Query(5, ge=1, le=LEADERBOARD_SIZE, description="Number of attempts"),
+    rank_by: str = Query(DEFAULT_RANKING, description="Score ranked after the target CEFR match: meaningbert, bertscore or grade")
+):
+    """
+    Best attempts of the session, best first
+    
+    Attempts matching the target CEFR level rank first, then by rank_by.
+    Each text version appears once, with its latest feedback. The leaderboard
+    is kept up to date on every feedback, so this does not read the history.
+    """
+    if rank_by not in RANKINGS:
+        raise HTTPException(status_code=400, detail=f"rank_by must be one of {list(RANKINGS)}")
+    
+    leaderboard = storage.get_leaderboard(session_id)
+    if leaderboard is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    check_session_etag(storage, session_id, request, response)
+    entries = top_entries(leaderboard, rank_by, k)
+    
+    return {
+        "session_id": session_id,
+        "target_cefr": leaderboard["target_cefr"],
+        "rank_by": rank_by,
+        "attempts": [{"rank": rank, **entry} for rank, entry in enumerate(entries, 1)]
+    }
@@ -1,6 +1,8 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
 from ..models import TextCreate, TextUpdate, Text, CurrentState
 from ..utils import JSONStorage
+from ..utils.http_caching import check_session_etag
 import uuid
 
 router = APIRouter(prefix="/api/v1/texts", tags=["texts"])
@@ -16,20 +18,22 @@ async def create_or_update_text(text_data: TextCreate):
     elif not storage.session_exists(session_id):
         storage.create_session(session_id)
     
-    current = storage.get_current(session_id)
-    version = 1
-    
-    if current and current.text:
-        version = current.text.version + 1
-    
-    text = Text(
-        cefr_level=text_data.cefr_level,
-        text_id=text_data.text_id,
-        text_translated=text_data.text_translated,
-        version=version
-    )
-    
-    storage.save_text(session_id, text)
+    # Hold the session lock so concurrent workers cannot assign the same version
+    with storage.session_lock(session_id):
+        current = storage.get_current(session_id)
+        version = 1
+        
+        if current and current.text:
+            version = current.text.version + 1
+        
+        text = Text(
+            cefr_level=text_data.cefr_level,
+            text_id=text_data.text_id,
+            text_translated=text_data.text_translated,
+            version=version
+        )
+        
+        storage.save_text(session_id, text)
     
     return {
         "session_id": session_id,
@@ -38,36 +42,39 @@ async def create_or_update_text(text_data: TextCreate):
     }
 
 @router.get("/{session_id}/current")
-async def get_current_text(session_id: str):
+async def get_current_text(session_id: str, request: Request, response: Response):
     if not storage.session_exists(session_id):
         raise HTTPException(status_code=404, detail="Session not found")
     
-    current = storage.get_current(session_id)
+    etag = check_session_etag(storage, session_id, request, response)
+    
+    current = storage.get_current_data(session_id)
     
-    if not current or not current.text:
+    if not current:
         raise HTTPException(status_code=404, detail="No text found for this session")
     
-    return current.model_dump()
+    return JSONResponse(current, headers={"ETag": etag})
 
 @router.put("/{session_id}/update")
 async def update_text(session_id: str, update_data: TextUpdate):
     if not storage.session_exists(session_id):
         raise HTTPException(status_code=404, detail="Session not found")
     
-    current = storage.get_current(session_id)
-    
-    if not current or not current.text:
-        raise HTTPException(status_code=404, detail="No text found to update")
-    
-    text = Text(
-        id=str(uuid.uuid4()),
-        cefr_level=current.text.cefr_level,
-        text_id=current.text.text_id,
-        text_translated=update_data.text_translated,
-        version=current.text.version + 1
-    )
-    
-    storage.save_text(session_id, text)
+    with storage.session_lock(session_id):
+        current = storage.get_current(session_id)
+        
+        if not current or not current.text:
+            raise HTTPException(status_code=404, detail="No text found to update")
+        
+        text = Text(
+            id=str(uuid.uuid4()),
+            cefr_level=current.text.cefr_level,
+            text_id=current.text.text_id,
+            text_translated=update_data.text_translated,
+            version=current.text.version + 1
+        )
+        
+        storage.save_text(session_id, text)
     
     return {
         "session_id": session_id,
@@ -76,23 +83,26 @@ async def update_text(session_id: str, update_data: TextUpdate):
     }
 
 @router.get("/{session_id}/versions")
-async def get_text_versions(session_id: str):
+async def get_text_versions(session_id: str, request: Request, response: Response):
     if not storage.session_exists(session_id):
         raise HTTPException(status_code=404, detail="Session not found")
     
-    history = storage.get_history(session_id)
+    check_session_etag(storage, session_id, request, response)
+    
+    history = storage.get_history_data(session_id)
     
     if not history:
         return {"versions": []}
     
     versions = []
-    for msg in history.messages:
-        if msg.metadata and msg.metadata.get("action") == "text_update":
+    for msg in history["messages"]:
+        metadata = msg.get("metadata")
+        if metadata and metadata.get("action") == "text_update":
             versions.append({
-                "version": msg.metadata.get("version"),
-                "timestamp": msg.timestamp,
-                "cefr_level": msg.metadata.get("cefr_level"),
-                "text_id": msg.metadata.get("text_id")
+                "version": metadata.get("version"),
+                "timestamp": msg["timestamp"],
+                "cefr_level": metadata.get("cefr_level"),
+                "text_id": metadata.get("text_id")
             })
     
     return {"session_id": session_id, "versions": versions}
\ No newline at end of file
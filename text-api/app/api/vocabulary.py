@@ -1,12 +1,67 @@
-from fastapi import APIRouter, HTTPException
-from ..models import TextTagRequest, TextTagResponse, TaggedWord
-from ..utils.vocabulary_processor import VocabularyProcessor
-from typing import Dict
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Query
+from ..models import TextTagRequest, TextTagResponse, TextTagBatchRequest, TextTagBatchResponse, TaggedWord, WordCheckBatchRequest, LevelProfileResponse
+from ..utils.vocabulary_processor import VocabularyProcessor, CEFR_LEVELS
+from typing import Dict, Optional
 
 router = APIRouter(prefix="/api/v1/vocabulary", tags=["vocabulary"])
 
-# Initialize vocabulary processor once
-vocab_processor = VocabularyProcessor()
+# Vocabulary processor, loaded on first use (see get_vocab_processor)
+vocab_processor = None
+
+LEVELS = ["A1", "A2", "B1", "B2", "C1"]
+
+# Longest word /suggest accepts: the longest vocabulary forms have under 20
+# letters, plus the edit distance; suggestion cost grows with the word length
+MAX_SUGGEST_LENGTH = 24
+
+def get_vocab_processor() -> VocabularyProcessor:
+    """Load the vocabulary once, on the first request that needs it"""
+    global vocab_processor
+    
+    if vocab_processor is None:
+        vocab_processor = VocabularyProcessor()
+    
+    return vocab_processor
+
+def build_tag_response(text: str) -> TextTagResponse:
+    """Tag a text and group the tagged words by level"""
+    tagged_words_raw = get_vocab_processor().tag_text(text)
+    
+    # Group words by level; dicts keep insertion order and dedup in O(1)
+    grouped = {level: {} for level in LEVELS}
+    inflected_words = {}
+    
+    # Populate the groups
+    for tw in tagged_words_raw:
+        level = tw["level"]
+        if tw["lemma"] != tw["word"]:
+            inflected_words[tw["word"]] = tw["lemma"]
+        word_entry = f"{tw['word']} -> {tw['tagged_as']}" if tw['word'] != tw['tagged_as'].lower() else tw['word']
+        
+        if level in grouped:
+            grouped[level][word_entry] = None
+    
+    tagged_by_level = {level: list(words) for level, words in grouped.items()}
+    
+    # Calculate statistics
+    level_counts = {}
+    total_words = 0
+    for level, words in tagged_by_level.items():
+        if words:  # Only count non-empty levels
+            level_counts[level] = len(words)
+            total_words += len(words)
+    
+    stats = {
+        "total_tagged": total_words,
+        "by_level": level_counts
+    }
+    
+    return TextTagResponse(
+        text=text,
+        tagged_words=tagged_by_level,
+        inflected_words=inflected_words,
+        stats=stats
+    )
 
 @router.post("/tag", response_model=TextTagResponse)
 async def tag_text(request: TextTagRequest):
@@ -22,48 +77,61 @@ async def tag_text(request: TextTagRequest):
     - Words with slashes (a/an, step over/in/on/out of)
     - Words with parentheses (stick (piece of wood), forward(s))
     - Multiple forms (doctor / Dr, OK / okay)
+    - Inflected forms (animals -> animal, coming -> come, saw -> see)
     """
     try:
-        # Tag the text
-        tagged_words_raw = vocab_processor.tag_text(request.text)
-        
-        # Group words by level
-        tagged_by_level = {
-            "A1": [],
-            "A2": [],
-            "B1": [],
-            "B2": [],
-            "C1": []
-        }
-        
-        # Populate the groups
-        for tw in tagged_words_raw:
-            level = tw["level"]
-            word_entry = f"{tw['word']} -> {tw['tagged_as']}" if tw['word'] != tw['tagged_as'].lower() else tw['word']
-            
-            if level in tagged_by_level:
-                # Avoid duplicates within each level
-                if word_entry not in tagged_by_level[level]:
-                    tagged_by_level[level].append(word_entry)
-        
-        # Calculate statistics
-        level_counts = {}
-        total_words = 0
-        for level, words in tagged_by_level.items():
-            if words:  # Only count non-empty levels
-                level_counts[level] = len(words)
-                total_words += len(words)
+        return build_tag_response(request.text)
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing text: {str(e)}")
+
+@router.post("/tag-batch", response_model=TextTagBatchResponse)
+async def tag_text_batch(request: TextTagBatchRequest):
+    """
+    Tag many texts in one request
+    
+    Returns one /tag result per text, in request order. Texts repeated
+    within the batch (e.g. the same original or examples) are tagged once.
+    """
+    try:
+        cache = {}
+        results = []
+        for text in request.texts:
+            if text not in cache:
+                cache[text] = build_tag_response(text)
+            results.append(cache[text])
         
         stats = {
-            "total_tagged": total_words,
-            "by_level": level_counts
+            "total_texts": len(results),
+            "unique_texts": len(cache)
         }
         
-        return TextTagResponse(
-            text=request.text,
-            tagged_words=tagged_by_level,
-            stats=stats
-        )
+        return TextTagBatchResponse(results=results, stats=stats)
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error processing texts: {str(e)}")
+
+@router.post("/profile", response_model=LevelProfileResponse)
+async def profile_text(
+    request: TextTagRequest,
+    target: str = Query(..., description="Target CEFR level (A1-C2)"),
+    suggest: bool = Query(False, description="Suggest the closest vocabulary word for unknown words")
+):
+    """
+    Lexical level profile of a text against a target CEFR level
+    
+    Returns, in one pass over the text:
+    - Coverage ratio of tokens per vocabulary level (each word at its lowest listed level)
+    - Ratio of tokens within the target level and of unknown tokens
+    - Words above the target level with their character spans
+    - Optionally, the closest vocabulary word for each unknown word
+    """
+    if target.upper() not in CEFR_LEVELS:
+        raise HTTPException(status_code=400, detail=f"target must be one of {CEFR_LEVELS}")
+    
+    try:
+        profile = get_vocab_processor().profile_text(request.text, target, suggest=suggest)
+        return LevelProfileResponse(text=request.text, **profile)
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing text: {str(e)}")
@@ -73,11 +141,55 @@ async def get_vocabulary_stats():
     """
     Get statistics about the loaded vocabulary
     """
-    stats = vocab_processor.get_vocabulary_stats()
+    processor = get_vocab_processor()
+    stats = processor.get_vocabulary_stats()
     return {
         "vocabulary_stats": stats,
         "levels": list(stats.keys())[:-1],  # Exclude 'total'
-        "total_words": stats.get("total", 0)
+        "total_words": stats.get("total", 0),
+        "source_hash": processor.source_hash
+    }
+
+@router.post("/admin/reload", status_code=202)
+async def reload_vocabulary(background_tasks: BackgroundTasks):
+    """
+    Hot-reload an edited vocabulary.json
+    
+    The new index is built in the background and swapped into the live
+    processor once complete; requests keep using the current index meanwhile.
+    """
+    processor = get_vocab_processor()
+    if processor.reload_lock.locked():
+        raise HTTPException(status_code=409, detail="A vocabulary reload is already running")
+    
+    background_tasks.add_task(processor.reload)
+    return {
+        "status": "scheduled",
+        "source_hash": processor.source_hash
+    }
+
+@router.get("/admin/reload")
+async def get_reload_status():
+    """
+    Get the result of the last vocabulary reload
+    """
+    processor = get_vocab_processor()
+    return {
+        "running": processor.reload_lock.locked(),
+        "source_hash": processor.source_hash,
+        "last_reload": processor.last_reload
+    }
+
+def _check_word(word: str) -> Dict:
+    found_in = [
+        {"level": level, "form": form}
+        for level, form in get_vocab_processor().check_word(word)
+    ]
+    
+    return {
+        "word": word,
+        "found": len(found_in) > 0,
+        "occurrences": found_in
     }
 
 @router.post("/check-word")
@@ -85,47 +197,78 @@ async def check_word(word: str) -> Dict:
     """
     Check if a specific word exists in the vocabulary and at what level(s)
     """
-    word_lower = word.lower().strip()
-    
-    found_in = []
-    for level, words in vocab_processor.vocabulary.items():
-        for vocab_word in words:
-            # Check direct match
-            if vocab_word.lower() == word_lower:
-                found_in.append({"level": level, "form": vocab_word})
-                continue
-            
-            # Check if it's a variation
-            if '/' in vocab_word:
-                variations = vocab_processor._expand_slash_variations(vocab_word)
-                if word_lower in [v.lower() for v in variations]:
-                    found_in.append({"level": level, "form": vocab_word})
-            
-            # Check if it's the main word in parenthetical expression
-            if '(' in vocab_word:
-                main_word = vocab_processor._extract_main_word(vocab_word)
-                if main_word.lower() == word_lower:
-                    found_in.append({"level": level, "form": vocab_word})
+    return _check_word(word)
+
+@router.post("/check-words")
+async def check_words(request: WordCheckBatchRequest) -> Dict:
+    """
+    Check many words in one request, same result per word as /check-word
+    """
+    results = [_check_word(word) for word in request.words]
     
+    return {
+        "results": results,
+        "total": len(results),
+        "found_count": sum(1 for r in results if r["found"])
+    }
+
+@router.get("/search")
+async def search_words(
+    prefix: str = Query(..., min_length=1, description="Word prefix"),
+    limit: int = Query(20, ge=1, le=200)
+):
+    """
+    Find vocabulary forms starting with a prefix
+    """
+    processor = get_vocab_processor()
+    forms = processor.search_prefix(prefix, limit)
+    return {
+        "prefix": prefix,
+        "results": [
+            {
+                "form": form,
+                "occurrences": [{"level": level, "form": original} for level, original in processor.check_word(form)]
+            }
+            for form in forms
+        ]
+    }
+
+@router.get("/suggest")
+async def suggest_words(
+    word: str = Query(..., min_length=1, max_length=MAX_SUGGEST_LENGTH),
+    max_distance: int = Query(1, ge=0, le=2, description="Maximum edit distance"),
+    limit: int = Query(5, ge=1, le=50)
+):
+    """
+    Suggest the closest in-vocabulary words for a misspelled or unknown word
+    """
     return {
         "word": word,
-        "found": len(found_in) > 0,
-        "occurrences": found_in
+        "suggestions": get_vocab_processor().suggest(word, max_distance, limit)
     }
 
 @router.get("/level/{level}")
-async def get_words_by_level(level: str):
+async def get_words_by_level(
+    level: str,
+    cursor: Optional[str] = Query(None, description="Last word of the previous page"),
+    limit: int = Query(100, ge=1, le=1000)
+):
     """
-    Get all words for a specific CEFR level
+    Get the words for a specific CEFR level, in alphabetical order
+    
+    Pass the returned next_cursor to get the following page.
     """
+    processor = get_vocab_processor()
     level = level.upper()
-    if level not in vocab_processor.vocabulary:
-        raise HTTPException(status_code=404, detail=f"Level {level} not found. Available levels: {list(vocab_processor.vocabulary.keys())}")
+    if level not in processor.vocabulary:
+        raise HTTPException(status_code=404, detail=f"Level {level} not found. Available levels: {list(processor.vocabulary.keys())}")
     
-    words = vocab_processor.vocabulary[level]
+    words, next_cursor = processor.list_level(level, cursor, limit)
+    word_count = len(processor.vocabulary[level])
     return {
         "level": level,
-        "word_count": len(words),
-        "words": words[:100],  # Return first 100 words
-        "message": f"Showing first 100 words of {len(words)} total words for level {level}"
-    }
\ No newline at end of file
+        "word_count": word_count,
+        "words": words,
+        "next_cursor": next_cursor,
+        "message": f"Showing {len(words)} of {word_count} total words for level {level}"
+    }
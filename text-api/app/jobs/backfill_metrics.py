@@ -0,0 +1,287 @@
+"""
+Offline backfill of the metrics of stored session attempts
+
+Streams every text version from data/sessions/*/history.json and scores the
+versions whose metrics are missing or were computed with another metrics config,
+in large length-bucketed batches on a process pool. The metrics are written back
+to the history (the saved text and its feedback messages) and to current.json,
+and best_attempt and the leaderboard are recomputed over all scored versions of each session.
+
+Progress is checkpointed per session, so an interrupted run resumes where it stopped.
+Scoring is strict: if a metrics model fails, the sessions of that batch are neither
+written nor checkpointed, and the next run retries them.
+
+Usage (from text-api/):
+    python -m app.jobs.backfill_metrics --originals ../tsar2025_test.jsonl --workers 4
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from ..models import History, MetricsEvaluation, Text
+from ..utils.example_store import DEFAULT_ORIGINALS, load_originals
+from ..utils.leaderboard import read_attempts
+from ..utils.storage import JSONStorage, is_better_attempt
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINT = "data/backfill_metrics.checkpoint.jsonl"
+
+
+def config_id(config: Dict) -> str:
+    """Short stable id of a metrics config"""
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+def recompute_best_attempt(history: History, attempts: List[Dict], target_cefr: str) -> Optional[Text]:
+    """Replay the best attempt selection of save_feedback over every scored version"""
+    best = None
+    for attempt in attempts:
+        metrics = (history.messages[attempt["text_index"]].metadata or {}).get("metrics")
+        if not metrics:
+            continue
+        metrics = MetricsEvaluation(**metrics)
+        if is_better_attempt(metrics, best, target_cefr):
+            best = Text(
+                id=attempt["text_uuid"],
+                cefr_level=attempt["cefr_level"],
+                text_id=attempt["text_id"],
+                text_translated=attempt["text"],
+                version=attempt["version"],
+                created_at=attempt["timestamp"],
+                updated_at=attempt["timestamp"],
+                metrics_meaningbert=metrics.meaningbert,
+                metrics_cefr_compliance=metrics.cefr_compliance
+            )
+    return best
+
+
+class Checkpoint:
+    """Append-only log of the sessions completed under a metrics config"""
+
+    def __init__(self, path: str, config: str, restart: bool = False):
+        self.path = Path(path)
+        self.config = config
+        self.done: Set[str] = set()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if restart and self.path.exists():
+            self.path.unlink()
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        if entry.get("config") == config:
+                            self.done.add(entry["session_id"])
+        self.file = open(self.path, "a", encoding="utf-8")
+
+    def mark(self, session_id: str, **info):
+        self.file.write(json.dumps({"session_id": session_id, "config": self.config, **info}) + "\n")
+        self.file.flush()
+        self.done.add(session_id)
+
+    def close(self):
+        self.file.close()
+
+
+# Worker side: each process loads the metrics models once
+def _init_worker(threads: int):
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except Exception:
+        pass
+    from ..api import metrics
+    metrics.initialize_models()
+
+
+def score_batch(batch: List[Tuple[str, List[int], List[str], str]]) -> List[Tuple[str, List[int], List[Dict]]]:
+    """
+    Score the pending versions of a batch of sessions in one bucketed metrics call
+    Raises if a metrics model fails, rather than storing 0.0 scores for the batch.
+    """
+    from ..api import metrics
+    texts = [text for _, _, session_texts, _ in batch for text in session_texts]
+    originals = [original for _, _, session_texts, original in batch for _ in session_texts]
+    results = metrics.get_batch_metrics(texts, originals, strict=True)["results"]
+
+    scored = []
+    position = 0
+    for session_id, text_indexes, session_texts, _ in batch:
+        scored.append((session_id, text_indexes, results[position:position + len(session_texts)]))
+        position += len(session_texts)
+    return scored
+
+
+class BackfillJob:
+    """
+    Re-score stored attempts and recompute best_attempt session by session
+    Examples:
+    - BackfillJob(JSONStorage("data/sessions"), originals, config).run(workers=4)
+    """
+
+    def __init__(self, storage: JSONStorage, originals: Dict[str, str], config: Dict,
+                 checkpoint: Checkpoint, force: bool = False, batch_texts: int = 256):
+        self.storage = storage
+        self.originals = originals
+        self.config = config
+        self.config_id = config_id(config)
+        self.checkpoint = checkpoint
+        self.force = force
+        self.batch_texts = batch_texts
+        self.stats = {"sessions": 0, "skipped_no_original": 0, "skipped_changed": 0,
+                      "scored_texts": 0, "best_attempt_updated": 0, "failed_sessions": 0}
+
+    def session_ids(self) -> Iterator[str]:
+        for path in sorted(self.storage.base_path.iterdir()):
+            if path.is_dir() and (path / "history.json").exists() and path.name not in self.checkpoint.done:
+                yield path.name
+
+    def pending(self, session_id: str) -> Optional[Tuple[str, List[int], List[str], str]]:
+        """The versions of a session that need scoring, or None if it has no known original"""
+        history = self.storage.get_history(session_id)
+        attempts = read_attempts(history) if history else []
+        if not attempts:
+            return (session_id, [], [], "")
+        original = self.originals.get(attempts[0]["text_id"])
+        if original is None:
+            return None
+        todo = [
+            attempt for attempt in attempts
+            if self.force or (history.messages[attempt["text_index"]].metadata or {}).get("metrics_config") != self.config_id
+        ]
+        return (session_id, [a["text_index"] for a in todo], [a["text"] for a in todo], original)
+
+    def batches(self) -> Iterator[List[Tuple[str, List[int], List[str], str]]]:
+        batch, size = [], 0
+        for session_id in self.session_ids():
+            item = self.pending(session_id)
+            if item is None:
+                self.stats["skipped_no_original"] += 1
+                continue
+            batch.append(item)
+            size += len(item[2])
+            if size >= self.batch_texts:
+                yield batch
+                batch, size = [], 0
+        if batch:
+            yield batch
+
+    def apply(self, session_id: str, text_indexes: List[int], results: List[Dict]):
+        """Write the metrics of a session back and recompute its best attempt"""
+        # Locked, so the API can keep serving the session while the job runs
+        with self.storage.session_lock(session_id):
+            self._apply(session_id, text_indexes, results)
+
+    def _apply(self, session_id: str, text_indexes: List[int], results: List[Dict]):
+        history = self.storage.get_history(session_id)
+        attempts = read_attempts(history) if history else []
+        by_index = {attempt["text_index"]: attempt for attempt in attempts}
+
+        # Re-read: skip the session if it changed since the texts were collected
+        if any(index not in by_index for index in text_indexes):
+            self.stats["skipped_changed"] += 1
+            return
+
+        for index, result in zip(text_indexes, results):
+            attempt = by_index[index]
+            metrics = MetricsEvaluation(**result).model_dump()
+            for message_index in [index] + attempt["feedback_indexes"]:
+                message = history.messages[message_index]
+                message.metadata = {**(message.metadata or {}), "metrics": metrics, "metrics_config": self.config_id}
+
+        current = self.storage.get_current(session_id)
+        session_info = self.storage.get_session_info(session_id)
+        target_cefr = (session_info or {}).get("target_cefr") or (attempts[-1]["cefr_level"] if attempts else None)
+        best = recompute_best_attempt(history, attempts, target_cefr) if target_cefr else None
+
+        if current is not None:
+            latest = attempts[-1] if attempts else None
+            if current.feedback is not None and latest and latest["text_uuid"] == current.text.id:
+                latest_metrics = (history.messages[latest["text_index"]].metadata or {}).get("metrics")
+                if latest_metrics:
+                    current.feedback.metrics = MetricsEvaluation(**latest_metrics)
+            if best is not None:
+                if current.best_attempt is None or current.best_attempt.id != best.id:
+                    self.stats["best_attempt_updated"] += 1
+                current.best_attempt = best
+        self.storage.replace_scored_history(session_id, history, current, target_cefr)
+
+        self.stats["scored_texts"] += len(text_indexes)
+        self.stats["sessions"] += 1
+        self.checkpoint.mark(session_id, scored=len(text_indexes), best_version=best.version if best else None)
+
+    def apply_batch(self, scored: List[Tuple[str, List[int], List[Dict]]]):
+        for session_id, text_indexes, results in scored:
+            self.apply(session_id, text_indexes, results)
+        logger.info(f"Backfill progress: {self.stats}")
+
+    def apply_scored(self, batch: List[Tuple[str, List[int], List[str], str]], score: Callable[[], List]):
+        """Apply the scores of a batch; if scoring failed, its sessions stay unmarked and the next run retries them"""
+        try:
+            scored = score()
+        except Exception as e:
+            logger.error(f"Scoring failed for {len(batch)} sessions, left for the next run: {e}")
+            self.stats["failed_sessions"] += len(batch)
+            return
+        self.apply_batch(scored)
+
+    def run(self, workers: int = 1) -> Dict:
+        if workers <= 1:
+            _init_worker(os.cpu_count() or 1)
+            for batch in self.batches():
+                self.apply_scored(batch, lambda: score_batch(batch))
+            return self.stats
+
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(threads,)) as pool:
+            in_flight = {}    # future -> batch
+            for batch in self.batches():
+                # Keep a bounded number of batches in flight
+                if len(in_flight) >= workers * 2:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        self.apply_scored(in_flight.pop(future), future.result)
+                in_flight[pool.submit(score_batch, batch)] = batch
+            for future, batch in in_flight.items():
+                self.apply_scored(batch, future.result)
+        return self.stats
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Re-score stored session attempts and recompute best_attempt")
+    parser.add_argument("--sessions", default="data/sessions", help="Session storage folder")
+    parser.add_argument("--originals", action="append", default=None,
+                        help="JSONL file with text_id/original records (repeatable; default: gold and trial data)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--batch-texts", type=int, default=256, help="Texts scored per metrics call")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT)
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and process every session again")
+    parser.add_argument("--force", action="store_true", help="Re-score versions already scored with the current config")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    from ..api import metrics
+    config = metrics.metrics_config()
+    originals = load_originals([Path(p) for p in args.originals] if args.originals else DEFAULT_ORIGINALS)
+    logger.info(f"Loaded {len(originals)} originals; metrics config {config_id(config)}")
+
+    checkpoint = Checkpoint(args.checkpoint, config_id(config), restart=args.restart)
+    try:
+        job = BackfillJob(JSONStorage(args.sessions), originals, config, checkpoint,
+                          force=args.force, batch_texts=args.batch_texts)
+        stats = job.run(workers=args.workers)
+    finally:
+        checkpoint.close()
+    logger.info(f"Backfill finished: {stats}")
+    return stats
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,13 @@
+import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api import sessions_router, texts_router, feedback_router, history_router, vocabulary_router, metrics_router, examples_router
+from app import api
+from app.utils.http_caching import PathGZipMiddleware
+from app.utils.profiling import ProfilingMiddleware
+
+# TEXT_API_MODE=storage serves sessions, texts, feedback and history only: the vocabulary,
+# metrics, examples and prompts routers are not imported, so nothing ML-related loads
+STORAGE_ONLY = os.environ.get("TEXT_API_MODE", "full") == "storage"
 
 app = FastAPI(
     title="Text Management API",
@@ -16,13 +23,41 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.include_router(sessions_router)
-app.include_router(texts_router)
-app.include_router(feedback_router)
-app.include_router(history_router)
-app.include_router(vocabulary_router)
-app.include_router(metrics_router, prefix="/api/v1/metrics", tags=["metrics"])
-app.include_router(examples_router, prefix="/api/v1/examples", tags=["examples"])
+# Long histories and example sets are compressed for clients that accept gzip
+app.add_middleware(PathGZipMiddleware, prefixes=("/api/v1/history", "/api/v1/examples"))
+
+# Per-request timing and storage counters (see /api/v1/profiling/routes)
+app.add_middleware(ProfilingMiddleware)
+
+app.include_router(api.sessions_router)
+app.include_router(api.texts_router)
+app.include_router(api.feedback_router)
+app.include_router(api.history_router)
+app.include_router(api.profiling_router)
+app.include_router(api.events_router)
+
+if not STORAGE_ONLY:
+    # The metrics models and the vocabulary index load on first use, not here
+    app.include_router(api.vocabulary_router)
+    app.include_router(api.metrics_router, prefix="/api/v1/metrics", tags=["metrics"])
+    app.include_router(api.examples_router, prefix="/api/v1/examples", tags=["examples"])
+    app.include_router(api.prompts_router)
+
+ENDPOINTS = {
+    "sessions": "/api/v1/sessions",
+    "texts": "/api/v1/texts",
+    "feedback": "/api/v1/feedback",
+    "history": "/api/v1/history",
+    "profiling": "/api/v1/profiling",
+    "events": "/api/v1/events"
+}
+if not STORAGE_ONLY:
+    ENDPOINTS.update({
+        "vocabulary": "/api/v1/vocabulary",
+        "metrics": "/api/v1/metrics",
+        "examples": "/api/v1/examples",
+        "prompts": "/api/v1/prompts"
+    })
 
 @app.get("/")
 async def root():
@@ -30,15 +65,8 @@ async def root():
         "message": "Text Management API",
         "version": "1.1.0",
         "docs": "/docs",
-        "endpoints": {
-            "sessions": "/api/v1/sessions",
-            "texts": "/api/v1/texts",
-            "feedback": "/api/v1/feedback",
-            "history": "/api/v1/history",
-            "vocabulary": "/api/v1/vocabulary",
-            "metrics": "/api/v1/metrics",
-            "examples": "/api/v1/examples"
-        }
+        "mode": "storage" if STORAGE_ONLY else "full",
+        "endpoints": ENDPOINTS
     }
 
 @app.get("/health")
@@ -117,6 +117,7 @@ class CurrentState(BaseModel):
     feedback: Optional[Feedback] = None
     attempt_number: int = 1
     best_attempt: Optional[Text] = None
+    state_version: int = 0  # Increased on every write of current.json
 
 class LLMMessage(BaseModel):
     role: Literal["user", "assistant", "system"]
@@ -157,4 +158,46 @@ class TextTagRequest(BaseModel):
 class TextTagResponse(BaseModel):
     text: str
     tagged_words: Dict[str, List[str]]  # {level: [words]}
-    stats: dict
\ No newline at end of file
+    inflected_words: Dict[str, str] = {}  # {inflected word: matched lemma}
+    stats: dict
+
+class TextTagBatchRequest(BaseModel):
+    texts: List[str]
+
+class TextTagBatchResponse(BaseModel):
+    results: List[TextTagResponse]
+    stats: dict
+
+class AboveTargetWord(BaseModel):
+    word: str
+    lemma: str
+    level: str
+    start: int
+    end: int
+
+class WordSuggestion(BaseModel):
+    word: str
+    distance: int
+    level: Optional[str] = None
+
+class LevelProfileResponse(BaseModel):
+    text: str
+    target: str
+    total_tokens: int
+    coverage: Dict[str, float]  # {level: ratio of tokens}
+    within_target_ratio: float
+    unknown_ratio: float
+    above_target: List[AboveTargetWord]
+    suggestions: Dict[str, Optional[WordSuggestion]] = {}  # {unknown word: closest vocabulary word}
+
+class WordCheckBatchRequest(BaseModel):
+    words: List[str]
+
+class PromptRenderRequest(BaseModel):
+    session_id: str
+    template: str  # e.g. "a2_writer", "b1_rewriter", "a2_evaluator"
+    original_text: str
+    text_id: Optional[str] = None  # Excluded from the retrieved examples
+    keywords: Optional[Union[str, List[str]]] = None
+    metrics: Optional[dict] = None  # Metrics of the text being evaluated, for evaluator templates
+    example_count: int = Field(default=10, ge=0, le=20)
@@ -0,0 +1,102 @@
+from typing import Callable, Dict, List, Optional, Sequence
+
+
+def token_lengths(tokenizer, texts: Sequence[str], max_length: Optional[int] = None) -> List[int]:
+    """Tokenized length of each text, special tokens included, capped at max_length"""
+    encoded = tokenizer(list(texts), add_special_tokens=True,
+                        truncation=max_length is not None, max_length=max_length)["input_ids"]
+    return [len(ids) for ids in encoded]
+
+
+def length_buckets(lengths: Sequence[int], token_budget: int, max_batch_size: Optional[int] = None) -> List[List[int]]:
+    """
+    Group item indices into batches of similar length
+    Items are sorted longest first and a batch is closed when its padded size
+    (items x longest item) would exceed token_budget. An item longer than the
+    budget gets a batch of its own.
+    Examples:
+    - length_buckets([40, 500, 45, 480], token_budget=1000) -> [[1, 3], [2, 0]]
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+    buckets = []
+    current = []
+    longest = 0
+    for i in order:
+        # Sorted longest first, so the bucket's first item sets its padded length
+        if current and ((len(current) + 1) * longest > token_budget
+                        or (max_batch_size and len(current) >= max_batch_size)):
+            buckets.append(current)
+            current = []
+        if not current:
+            longest = lengths[i]
+        current.append(i)
+    if current:
+        buckets.append(current)
+    return buckets
+
+
+def padded_tokens(lengths: Sequence[int], batches: Sequence[Sequence[int]]) -> int:
+    """Tokens fed to the model, padding included, when running these batches"""
+    return sum(len(batch) * max(lengths[i] for i in batch) for batch in batches if batch)
+
+
+class PaddingReport:
+    """
+    Compares the padding of length-bucketed batches with fixed-size batches in arrival order
+    """
+
+    def __init__(self):
+        self.real_tokens = 0
+        self.fixed_padded_tokens = 0
+        self.bucketed_padded_tokens = 0
+        self.batches = 0
+
+    def add(self, lengths: Sequence[int], buckets: List[List[int]], fixed_batch_size: int):
+        fixed = [list(range(start, min(start + fixed_batch_size, len(lengths))))
+                 for start in range(0, len(lengths), fixed_batch_size)]
+        self.real_tokens += sum(lengths)
+        self.fixed_padded_tokens += padded_tokens(lengths, fixed)
+        self.bucketed_padded_tokens += padded_tokens(lengths, buckets)
+        self.batches += len(buckets)
+
+    def merge(self, other: "PaddingReport"):
+        """Add the counts of another report, e.g. one filled in a worker process"""
+        self.real_tokens += other.real_tokens
+        self.fixed_padded_tokens += other.fixed_padded_tokens
+        self.bucketed_padded_tokens += other.bucketed_padded_tokens
+        self.batches += other.batches
+
+    def summary(self) -> Dict:
+        def padding_ratio(padded):
+            return round(1 - self.real_tokens / padded, 4) if padded else 0.0
+        saved = self.fixed_padded_tokens - self.bucketed_padded_tokens
+        return {
+            "batches": self.batches,
+            "real_tokens": self.real_tokens,
+            "fixed_padded_tokens": self.fixed_padded_tokens,
+            "bucketed_padded_tokens": self.bucketed_padded_tokens,
+            "fixed_padding_ratio": padding_ratio(self.fixed_padded_tokens),
+            "bucketed_padding_ratio": padding_ratio(self.bucketed_padded_tokens),
+            "saved_ratio": round(saved / self.fixed_padded_tokens, 4) if self.fixed_padded_tokens else 0.0
+        }
+
+
+def run_bucketed(items: Sequence, lengths: Sequence[int], fn: Callable[[List], List], token_budget: int,
+                 max_batch_size: Optional[int] = None, report: Optional[PaddingReport] = None,
+                 fixed_batch_size: int = 32) -> List:
+    """
+    Call fn once per length bucket of items and return its outputs in the original item order
+    fn takes a list of items and returns one output per item. When a report is given,
+    the padding is compared against fixed batches of fixed_batch_size in arrival order.
+    Examples:
+    - run_bucketed(texts, token_lengths(pipe.tokenizer, texts), lambda b: pipe(b, batch_size=len(b)), 8192)
+    """
+    buckets = length_buckets(lengths, token_budget, max_batch_size)
+    outputs = [None] * len(items)
+    for bucket in buckets:
+        results = fn([items[i] for i in bucket])
+        for i, result in zip(bucket, results):
+            outputs[i] = result
+    if report is not None:
+        report.add(lengths, buckets, fixed_batch_size)
+    return outputs
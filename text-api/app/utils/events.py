@@ -0,0 +1,336 @@
+import asyncio
+import itertools
+import logging
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Events kept per subscriber; when full, the oldest event is dropped
+EVENT_QUEUE_SIZE = 256
+EVENT_TYPES = ("text_update", "feedback", "best_attempt_changed")
+# Seconds between checks for session writes made by other worker processes
+POLL_INTERVAL = 1.0
+# Number of worker processes (uvicorn and gunicorn take their default worker count from it);
+# above 1, the event streams watch the session files for the writes of the other workers
+WORKERS_ENV = "WEB_CONCURRENCY"
+# Keys of recently delivered events kept per subscriber, to drop the same event seen twice
+RECENT_EVENTS = 1024
+
+def several_workers() -> bool:
+    """Check whether the API runs in several worker processes (see WORKERS_ENV)"""
+    try:
+        return int(os.environ.get(WORKERS_ENV, "1")) > 1
+    except ValueError:
+        return False
+
+def event_key(event: Dict) -> Optional[Tuple[str, str]]:
+    """
+    Identity of a session event, the same whether it was published or rebuilt from disk
+    Examples:
+    - event_key({"type": "feedback", "data": {"feedback_id": "f1", ...}}) -> ("feedback", "f1")
+    """
+    data = event.get("data") or {}
+    key = data.get("feedback_id") if event["type"] == "feedback" else data.get("id")
+    return (event["type"], key) if event["type"] in EVENT_TYPES and key else None
+
+def state_events(previous: Optional[Dict], current: Optional[Dict]) -> List[Tuple[str, Dict]]:
+    """
+    (type, data) of the events that turn one stored session state into another
+    Both are current.json data; the events carry the same data as the ones storage
+    publishes, so a client cannot tell a rebuilt event from a published one.
+    """
+    if current is None or current.get("text") is None:
+        return []
+    previous = previous or {}
+    events = []
+    text = current["text"]
+    if (previous.get("text") or {}).get("id") != text["id"]:
+        events.append(("text_update", {
+            "id": text["id"],
+            "text_id": text["text_id"],
+            "version": text["version"],
+            "cefr_level": text["cefr_level"],
+            "text_translated": text["text_translated"],
+            "attempt_number": current["attempt_number"]
+        }))
+    feedback = current.get("feedback")
+    if feedback is not None and (previous.get("feedback") or {}).get("id") != feedback["id"]:
+        events.append(("feedback", {
+            "feedback_id": feedback["id"],
+            "grade": feedback["grade"],
+            "approval": feedback["approval"],
+            "metrics": feedback.get("metrics"),
+            "text": {"id": text["id"], "version": text["version"]}
+        }))
+    best = current.get("best_attempt")
+    if best is not None and (previous.get("best_attempt") or {}).get("id") != best["id"]:
+        events.append(("best_attempt_changed", {
+            "id": best["id"],
+            "version": best["version"],
+            "text_translated": best["text_translated"],
+            "metrics_cefr_compliance": best.get("metrics_cefr_compliance"),
+            "metrics_meaningbert": best.get("metrics_meaningbert")
+        }))
+    return events
+
+class SessionWatcher:
+    """
+    Finds the session writes made by other worker processes, for every stream of this process
+    Events are published in the process that handled the write. The event bus owns one
+    watcher, whose thread runs while there are subscribers: every POLL_INTERVAL it compares
+    the state_version of each subscribed session (or, while some client subscribes to all
+    sessions, the current.json modification time of every session) with the last state it
+    saw, and publishes the events of the writes in between. Several writes between two
+    polls give one event per type, for the latest state.
+    Examples:
+    - event_bus.watch(storage)
+    """
+    
+    def __init__(self, storage, bus: "EventBus", interval: float = POLL_INTERVAL):
+        self.storage = storage
+        self.bus = bus
+        self.interval = interval
+        self.states: Dict[str, Dict] = {}      # last seen current.json data by session
+        self.mtimes: Dict[str, int] = {}       # current.json mtime by session, for the global scan
+        self.scanning = False                  # mtimes cover every session
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()       # set when the polling thread stops; a new one per run
+        self.stopped.set()
+    
+    def _scan(self) -> List[str]:
+        """Sessions whose current.json changed since the last scan"""
+        changed = []
+        for path in self.storage.base_path.glob("*/current.json"):
+            try:
+                mtime = path.stat().st_mtime_ns
+            except FileNotFoundError:
+                continue
+            session_id = path.parent.name
+            if self.mtimes.get(session_id) != mtime:
+                self.mtimes[session_id] = mtime
+                changed.append(session_id)
+        return changed
+    
+    def _events(self, session_id: str, current: Dict) -> List[Tuple[str, str, Optional[int], Dict]]:
+        return [(session_id, event_type, current.get("state_version"), data)
+                for event_type, data in state_events(self.states.get(session_id), current)]
+    
+    def _publish(self, events: List[Tuple[str, str, Optional[int], Dict]]) -> None:
+        # Under the lock, so the events of a session reach every subscriber in order
+        for session_id, event_type, state_version, data in events:
+            self.bus.publish(session_id, event_type, data, state_version)
+    
+    def watch(self, subscriber: "Subscriber") -> None:
+        """
+        Start watching the session of a new subscriber (or every session) from its state on disk now
+        Call after subscribing and before reading a snapshot; it blocks on disk reads, so
+        streams run it in a thread. Writes the watcher had not reported yet go to the
+        other subscribers only. Starts the polling thread if it is stopped.
+        """
+        with self.lock:
+            if self.stopped.is_set():
+                # States seen by an earlier run are stale
+                self.states.clear()
+                self.mtimes.clear()
+                self.scanning = False
+                self.stopped = threading.Event()
+                threading.Thread(target=self._run, args=(self.stopped,), name="session-watcher", daemon=True).start()
+            if subscriber.session_id is None:
+                # A running scan is joined as it is, not repeated per stream: with no snapshot
+                # to line up with, a global stream may get writes of the last interval
+                if self.scanning:
+                    return
+                sessions = self._scan()
+                self.scanning = True
+            else:
+                sessions = [subscriber.session_id]
+            
+            events = []
+            for session_id in sessions:
+                current = self.storage.get_current_data(session_id) or {}
+                if session_id in self.states:
+                    events += self._events(session_id, current)
+                self.states[session_id] = current
+            subscriber.skip(events)
+            self._publish(events)
+    
+    def _run(self, stopped: threading.Event):
+        while not stopped.wait(self.interval):
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Session watcher poll failed: {e}")
+    
+    def _changed_sessions(self, sessions: Set[str], everything: bool) -> List[str]:
+        if everything and self.scanning:
+            return self._scan()
+        
+        if self.scanning:
+            # Nobody subscribes to every session any more
+            self.scanning = False
+            self.mtimes.clear()
+        for session_id in list(self.states):
+            if session_id not in sessions:
+                del self.states[session_id]
+        return [session_id for session_id, seen in self.states.items()
+                if self.storage.get_state_version(session_id) != seen.get("state_version", 0)]
+    
+    def poll(self) -> List[Tuple[str, str, Optional[int], Dict]]:
+        """Publish the events since the last poll; returns them as (session_id, type, state_version, data)"""
+        events = []
+        with self.lock:
+            sessions, everything = self.bus.subscribed()
+            if not sessions and not everything:
+                # Started again by the next subscriber
+                self.stopped.set()
+                return events
+            for session_id in self._changed_sessions(sessions, everything):
+                current = self.storage.get_current_data(session_id)
+                if current is None:
+                    continue
+                events += self._events(session_id, current)
+                self.states[session_id] = current
+            self._publish(events)
+        return events
+
+class Subscriber:
+    """
+    Bounded event queue of one stream client, bound to the event loop that serves it
+    A slow client does not hold back publishers: when its queue is full the oldest
+    event is dropped, and the next event it reads is a "lagged" event with the count.
+    An event both published here and found on disk by the watcher is delivered once.
+    """
+    
+    def __init__(self, session_id: Optional[str], maxsize: int = EVENT_QUEUE_SIZE,
+                 watcher: Optional[SessionWatcher] = None):
+        self.session_id = session_id
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.dropped = 0
+        self.watcher = watcher
+        self.recent: OrderedDict = OrderedDict()
+    
+    def _put(self, event: Dict):
+        key = event_key(event)
+        if key is not None:
+            if key in self.recent:
+                return
+            self.recent[key] = None
+            if len(self.recent) > RECENT_EVENTS:
+                self.recent.popitem(last=False)
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+    
+    def deliver(self, event: Dict):
+        """Queue an event from any thread"""
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        
+        if running is self.loop:
+            self._put(event)
+        else:
+            self.loop.call_soon_threadsafe(self._put, event)
+    
+    def _skip(self, keys: List[Tuple[str, str]]):
+        for key in keys:
+            self.recent[key] = None
+    
+    def skip(self, events: List[Tuple[str, str, Optional[int], Dict]]):
+        """From any thread: drop these watcher events when they arrive, as they predate the subscription"""
+        keys = [event_key({"type": event_type, "data": data}) for _, event_type, _, data in events]
+        if keys:
+            self.loop.call_soon_threadsafe(self._skip, keys)
+    
+    async def prime(self):
+        """Have the watcher, if any, start from the state on disk now; call before reading a snapshot"""
+        if self.watcher is not None:
+            await asyncio.to_thread(self.watcher.watch, self)
+    
+    async def next(self) -> Dict:
+        if self.dropped:
+            dropped, self.dropped = self.dropped, 0
+            return {"type": "lagged", "session_id": self.session_id, "data": {"dropped": dropped}}
+        return await self.queue.get()
+
+class EventBus:
+    """
+    Publish/subscribe of session events, per session or for all sessions
+    Storage publishes as it writes, to the subscribers of this worker process. After
+    watch(storage), a shared SessionWatcher also publishes the writes of other worker
+    processes; without it (a single worker), nothing polls the disk.
+    Examples:
+    - with event_bus.subscription(session_id) as subscriber: await subscriber.prime(); event = await subscriber.next()
+    """
+    
+    def __init__(self, queue_size: int = EVENT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        # Subscribers by session id; None subscribes to every session
+        self.subscribers: Dict[Optional[str], Set[Subscriber]] = {}
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.watcher: Optional[SessionWatcher] = None
+    
+    def watch(self, storage, interval: float = POLL_INTERVAL) -> SessionWatcher:
+        """Also publish the writes other worker processes make to storage, found by one shared watcher"""
+        self.watcher = SessionWatcher(storage, self, interval)
+        return self.watcher
+    
+    @contextmanager
+    def subscription(self, session_id: Optional[str] = None):
+        subscriber = Subscriber(session_id, self.queue_size, self.watcher)
+        with self.lock:
+            self.subscribers.setdefault(session_id, set()).add(subscriber)
+        try:
+            yield subscriber
+        finally:
+            with self.lock:
+                subscribers = self.subscribers.get(session_id)
+                if subscribers is not None:
+                    subscribers.discard(subscriber)
+                    if not subscribers:
+                        del self.subscribers[session_id]
+    
+    def subscribed(self) -> Tuple[Set[str], bool]:
+        """Session ids with subscribers, and whether some subscriber listens to every session"""
+        with self.lock:
+            return {session_id for session_id in self.subscribers if session_id is not None}, None in self.subscribers
+    
+    def subscriber_count(self) -> int:
+        with self.lock:
+            return sum(len(subscribers) for subscribers in self.subscribers.values())
+    
+    def _event(self, session_id: str, event_type: str, data: Dict, state_version: Optional[int]) -> Dict:
+        return {
+            "id": next(self.ids),
+            "type": event_type,
+            "session_id": session_id,
+            "state_version": state_version,
+            "timestamp": datetime.now().isoformat(),
+            "data": data
+        }
+    
+    def publish(self, session_id: str, event_type: str, data: Dict, state_version: Optional[int] = None):
+        """Send an event to the subscribers of the session and of all sessions; no-op without subscribers"""
+        with self.lock:
+            subscribers = list(self.subscribers.get(session_id, ())) + list(self.subscribers.get(None, ()))
+        if not subscribers:
+            return
+        
+        event = self._event(session_id, event_type, data, state_version)
+        for subscriber in subscribers:
+            try:
+                subscriber.deliver(event)
+            except RuntimeError:
+                # The subscriber's event loop is closed; it is removed when its stream ends
+                logger.debug(f"Dropped event {event['id']} for a closed subscriber")
+
+event_bus = EventBus()
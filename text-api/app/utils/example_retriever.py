@@ -0,0 +1,55 @@
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+import logging
+from .example_store import ExampleStore
+
+logger = logging.getLogger(__name__)
+
+
+class ExampleRetriever:
+    """
+    TF-IDF similarity index over the `original` field of an example store, one per target level
+    Examples:
+    - retriever.top_k("The asteroid exploded above the city...", "a2", 5, exclude_text_id="01-a2")
+    """
+
+    def __init__(self, examples: ExampleStore, cache_size: int = 512):
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        self.examples = examples
+        self.indexes = {}  # {level: (vectorizer, matrix, example positions)}
+
+        for level, positions in examples.by_level.items():
+            vectorizer = TfidfVectorizer(lowercase=True, stop_words='english', sublinear_tf=True)
+            matrix = vectorizer.fit_transform([examples[i].get('original', '') for i in positions])
+            self.indexes[level] = (vectorizer, matrix, positions)
+            logger.info(f"Built similarity index for level {level} ({len(positions)} examples)")
+
+        self._ranked = lru_cache(maxsize=cache_size)(self._rank)
+
+    def _rank(self, text: str, level: str, k: int, exclude_text_id: str) -> Tuple[int, ...]:
+        """Positions in the store of the k most similar examples, most similar first"""
+        if level not in self.indexes:
+            return ()
+
+        vectorizer, matrix, positions = self.indexes[level]
+        # TF-IDF rows are L2-normalized, so the dot product is the cosine similarity
+        scores = (matrix @ vectorizer.transform([text]).T).toarray().ravel()
+
+        ranked = []
+        for row in scores.argsort(kind='stable')[::-1]:
+            position = positions[row]
+            if exclude_text_id and self.examples[position].get('text_id', '') == exclude_text_id:
+                continue
+            ranked.append(position)
+            if len(ranked) == k:
+                break
+        return tuple(ranked)
+
+    def top_k(self, text: str, level: str, k: int, exclude_text_id: Optional[str] = None) -> List[Dict]:
+        """Return the k examples of a level most similar to text, excluding exclude_text_id"""
+        positions = self._ranked(text, level.lower(), k, exclude_text_id or '')
+        return [self.examples[i] for i in positions]
+
+    def cache_info(self):
+        return self._ranked.cache_info()
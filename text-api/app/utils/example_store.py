@@ -0,0 +1,117 @@
+import json
+import mmap
+from array import array
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+REPO_ROOT = Path(__file__).parent.parent.parent.parent
+# Gold and trial data, where the originals of stored sessions are looked up by text_id
+DEFAULT_ORIGINALS = [REPO_ROOT / "tsar2025_test.jsonl", REPO_ROOT / "tsar2025_trialdata.jsonl"]
+
+
+def load_originals(paths: List[Path]) -> Dict[str, str]:
+    """Original text by text_id, streamed from JSONL files with text_id/original fields"""
+    originals = {}
+    for path in paths:
+        if not Path(path).exists():
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    if "text_id" in record and "original" in record:
+                        originals.setdefault(record["text_id"], record["original"])
+    return originals
+
+
+class ExampleStore:
+    """
+    Read-only, memory-mapped view of a JSONL example corpus
+    Only byte offsets per line plus id and level indexes are kept in memory;
+    records are decoded from the mapped file when they are accessed.
+    Examples:
+    - store.get("01-a2") -> {"text_id": "01-a2", "original": ..., ...}
+    - store.level_positions("a2") -> [0, 2, 4, ...]
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.starts = array('q')
+        self.ends = array('q')
+        self.by_id: Dict[str, List[int]] = {}
+        self.by_level: Dict[str, List[int]] = {}
+        self.stats: Dict = {}
+
+        self._file = open(self.path, 'rb')
+        if self.path.stat().st_size > 0:
+            self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._data = b''  # mmap cannot map an empty file
+        self._build_indexes()
+
+    def _build_indexes(self) -> None:
+        """Scan the file once to record line offsets, indexes and statistics"""
+        data = self._data
+        by_cefr = {}
+        unique_texts = set()
+        position = 0
+        start = 0
+        size = len(data)
+
+        while start < size:
+            end = data.find(b'\n', start)
+            if end == -1:
+                end = size
+            line = data[start:end]
+            if line.strip():
+                record = json.loads(line)
+                text_id = record.get('text_id', '')
+                level = record.get('target_cefr', 'unknown').lower()
+
+                self.starts.append(start)
+                self.ends.append(end)
+                self.by_id.setdefault(text_id, []).append(position)
+                self.by_level.setdefault(level, []).append(position)
+
+                by_cefr[level] = by_cefr.get(level, 0) + 1
+                # Unique text IDs without the CEFR suffix
+                if '-' in text_id:
+                    unique_texts.add(text_id.rsplit('-', 1)[0])
+                position += 1
+            start = end + 1
+
+        self.stats = {
+            'total': position,
+            'by_cefr': by_cefr,
+            'unique_texts': len(unique_texts)
+        }
+        logger.info(f"Indexed {position} examples from {self.path}")
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, position: int) -> Dict:
+        return json.loads(self._data[self.starts[position]:self.ends[position]])
+
+    def __iter__(self) -> Iterator[Dict]:
+        for position in range(len(self)):
+            yield self[position]
+
+    def get(self, text_id: str) -> Optional[Dict]:
+        """First record with the given text_id"""
+        positions = self.by_id.get(text_id)
+        return self[positions[0]] if positions else None
+
+    def positions_of(self, text_id: str) -> List[int]:
+        return self.by_id.get(text_id, [])
+
+    def level_positions(self, level: str) -> List[int]:
+        return self.by_level.get(level.lower(), [])
+
+    def close(self) -> None:
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
@@ -0,0 +1,89 @@
+from itertools import combinations
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+def levenshtein(a: str, b: str, max_distance: Optional[int] = None) -> int:
+    """
+    Edit distance between two strings
+    When max_distance is given, stops early and returns max_distance + 1
+    as soon as the distance is known to exceed it.
+    """
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    if max_distance is not None and len(a) - len(b) > max_distance:
+        return max_distance + 1
+
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1,
+                               current[j - 1] + 1,
+                               previous[j - 1] + (ca != cb)))
+        if max_distance is not None and min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+def deletion_variants(word: str, max_deletes: int) -> Set[str]:
+    """
+    All strings obtained by deleting up to max_deletes characters
+    Examples:
+    - deletion_variants("cat", 1) -> {"cat", "at", "ct", "ca"}
+    """
+    variants = {word}
+    for n in range(1, min(max_deletes, len(word)) + 1):
+        for positions in combinations(range(len(word)), n):
+            variants.add("".join(c for i, c in enumerate(word) if i not in positions))
+    return variants
+
+
+class DeletionIndex:
+    """
+    Symmetric-delete index for edit-distance lookups
+    Two words within edit distance d share a variant with at most d deletions,
+    so a query only probes the dict with its own deletion variants and then
+    verifies the few candidates, instead of comparing against every word.
+    Examples:
+    - index.search("bananna", 2) -> [(1, "banana")]
+    """
+
+    def __init__(self, words: Iterable[str] = (), max_distance: int = 2):
+        self.max_distance = max_distance
+        self.variants: Dict[str, List[str]] = {}
+        # Length of the longest indexed word; longer queries cannot match
+        self.longest = 0
+        for word in words:
+            self.add(word)
+
+    def add(self, word: str) -> None:
+        self.longest = max(self.longest, len(word))
+        for variant in deletion_variants(word, self.max_distance):
+            bucket = self.variants.setdefault(variant, [])
+            if not bucket or bucket[-1] != word:
+                bucket.append(word)
+
+    def search(self, word: str, max_distance: Optional[int] = None) -> List[Tuple[int, str]]:
+        """Return (distance, word) pairs within max_distance, closest first"""
+        if max_distance is None or max_distance > self.max_distance:
+            max_distance = self.max_distance
+        # Deletion variants grow with len(word)**max_distance, so a long query
+        # that no indexed word can reach is rejected before expanding it
+        if len(word) - max_distance > self.longest:
+            return []
+
+        candidates = set()
+        for variant in deletion_variants(word, max_distance):
+            candidates.update(self.variants.get(variant, ()))
+
+        results = []
+        for candidate in candidates:
+            distance = levenshtein(word, candidate, max_distance)
+            if distance <= max_distance:
+                results.append((distance, candidate))
+
+        results.sort()
+        return results
@@ -0,0 +1,67 @@
+from typing import Optional, Tuple
+from fastapi import HTTPException, Request, Response
+from starlette.datastructures import MutableHeaders
+from starlette.middleware.gzip import GZipMiddleware
+from .storage import JSONStorage
+
+# Added to the ETag of a gzip-encoded response, which is a different representation
+GZIP_ETAG_SUFFIX = "-gzip"
+# Responses smaller than this are sent uncompressed
+GZIP_MIN_SIZE = 1024
+
+def _matching_tag(if_none_match: Optional[str], etag: str) -> Optional[str]:
+    """The If-None-Match entry matching etag in either encoding (weak comparison), or None"""
+    if not if_none_match:
+        return None
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*":
+            return etag
+        if tag.removeprefix("W/") in (etag, etag[:-1] + GZIP_ETAG_SUFFIX + '"'):
+            return tag
+    return None
+
+def check_session_etag(storage: JSONStorage, session_id: str, request: Request, response: Response) -> str:
+    """
+    Answer 304 if the client has the current version of a session read, else set its ETag
+    The ETag comes from the session's state_version, which increases on every write, so
+    an unchanged session is answered before the endpoint reads history or current state.
+    Endpoints that return their own Response must pass the ETag on themselves.
+    Examples:
+    - etag = check_session_etag(storage, session_id, request, response)
+    - return JSONResponse(data, headers={"ETag": etag})
+    """
+    etag = f'"v{storage.get_state_version(session_id)}"'
+    tag = _matching_tag(request.headers.get("if-none-match"), etag)
+    if tag is not None:
+        raise HTTPException(status_code=304, headers={"ETag": tag})
+    
+    response.headers["ETag"] = etag
+    return etag
+
+class PathGZipMiddleware:
+    """
+    GZip for the responses of some path prefixes only, above a minimum size
+    Compressed responses get GZIP_ETAG_SUFFIX in their ETag, as strong ETags
+    must differ between encodings.
+    """
+    
+    def __init__(self, app, prefixes: Tuple[str, ...], minimum_size: int = GZIP_MIN_SIZE, compresslevel: int = 6):
+        self.app = app
+        self.prefixes = prefixes
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size, compresslevel=compresslevel)
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefixes):
+            await self.app(scope, receive, send)
+            return
+        
+        async def send_with_etag(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                etag = headers.get("etag")
+                if etag and headers.get("content-encoding") == "gzip" and etag.endswith('"'):
+                    headers["ETag"] = etag[:-1] + GZIP_ETAG_SUFFIX + '"'
+            await send(message)
+        
+        await self.gzip(scope, receive, send_with_etag)
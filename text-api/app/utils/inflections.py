@@ -0,0 +1,343 @@
+import re
+from typing import Dict, List, Set
+
+VOWELS = set("aeiou")
+
+# Irregular forms that the suffix rules cannot produce: {lemma: [forms]}
+IRREGULAR_FORMS: Dict[str, List[str]] = {
+    # Verbs
+    "be": ["am", "is", "are", "was", "were", "been", "being"],
+    "have": ["has", "had", "having"],
+    "do": ["does", "did", "done", "doing"],
+    "go": ["goes", "went", "gone"],
+    "arise": ["arose", "arisen"],
+    "awake": ["awoke", "awoken"],
+    "bear": ["bore", "borne"],
+    "beat": ["beaten"],
+    "become": ["became"],
+    "begin": ["began", "begun"],
+    "bend": ["bent"],
+    "bet": [],
+    "bite": ["bit", "bitten"],
+    "bleed": ["bled"],
+    "blow": ["blew", "blown"],
+    "break": ["broke", "broken"],
+    "breed": ["bred"],
+    "bring": ["brought"],
+    "broadcast": [],
+    "build": ["built"],
+    "burn": ["burnt"],
+    "burst": [],
+    "buy": ["bought"],
+    "catch": ["caught"],
+    "choose": ["chose", "chosen"],
+    "cling": ["clung"],
+    "come": ["came"],
+    "cost": [],
+    "creep": ["crept"],
+    "cut": [],
+    "deal": ["dealt"],
+    "dig": ["dug"],
+    "draw": ["drew", "drawn"],
+    "dream": ["dreamt"],
+    "drink": ["drank", "drunk"],
+    "drive": ["drove", "driven"],
+    "eat": ["ate", "eaten"],
+    "fall": ["fell", "fallen"],
+    "feed": ["fed"],
+    "feel": ["felt"],
+    "fight": ["fought"],
+    "find": ["found"],
+    "flee": ["fled"],
+    "fly": ["flew", "flown", "flies"],
+    "forbid": ["forbade", "forbidden"],
+    "forget": ["forgot", "forgotten"],
+    "forgive": ["forgave", "forgiven"],
+    "freeze": ["froze", "frozen"],
+    "get": ["got", "gotten"],
+    "give": ["gave", "given"],
+    "grow": ["grew", "grown"],
+    "hang": ["hung"],
+    "hear": ["heard"],
+    "hide": ["hid", "hidden"],
+    "hit": [],
+    "hold": ["held"],
+    "hurt": [],
+    "keep": ["kept"],
+    "kneel": ["knelt"],
+    "know": ["knew", "known"],
+    "lay": ["laid"],
+    "lead": ["led"],
+    "lean": ["leant"],
+    "learn": ["learnt"],
+    "leave": ["left"],
+    "lend": ["lent"],
+    "let": [],
+    "lie": ["lay", "lain", "lying"],
+    "light": ["lit"],
+    "lose": ["lost"],
+    "make": ["made"],
+    "mean": ["meant"],
+    "meet": ["met"],
+    "mistake": ["mistook", "mistaken"],
+    "pay": ["paid"],
+    "put": [],
+    "quit": [],
+    "read": [],
+    "ride": ["rode", "ridden"],
+    "ring": ["rang", "rung"],
+    "rise": ["rose", "risen"],
+    "run": ["ran"],
+    "say": ["said"],
+    "see": ["saw", "seen"],
+    "seek": ["sought"],
+    "sell": ["sold"],
+    "send": ["sent"],
+    "set": [],
+    "sew": ["sewn"],
+    "shake": ["shook", "shaken"],
+    "shine": ["shone"],
+    "shoot": ["shot"],
+    "show": ["shown"],
+    "shrink": ["shrank", "shrunk"],
+    "shut": [],
+    "sing": ["sang", "sung"],
+    "sink": ["sank", "sunk"],
+    "sit": ["sat"],
+    "sleep": ["slept"],
+    "slide": ["slid"],
+    "smell": ["smelt"],
+    "speak": ["spoke", "spoken"],
+    "speed": ["sped"],
+    "spell": ["spelt"],
+    "spend": ["spent"],
+    "spill": ["spilt"],
+    "spin": ["spun"],
+    "split": [],
+    "spoil": ["spoilt"],
+    "spread": [],
+    "spring": ["sprang", "sprung"],
+    "stand": ["stood"],
+    "steal": ["stole", "stolen"],
+    "stick": ["stuck"],
+    "sting": ["stung"],
+    "strike": ["struck"],
+    "swear": ["swore", "sworn"],
+    "sweep": ["swept"],
+    "swim": ["swam", "swum"],
+    "swing": ["swung"],
+    "take": ["took", "taken"],
+    "teach": ["taught"],
+    "tear": ["tore", "torn"],
+    "tell": ["told"],
+    "think": ["thought"],
+    "throw": ["threw", "thrown"],
+    "understand": ["understood"],
+    "upset": [],
+    "wake": ["woke", "woken"],
+    "wear": ["wore", "worn"],
+    "weep": ["wept"],
+    "win": ["won"],
+    "wind": ["wound"],
+    "withdraw": ["withdrew", "withdrawn"],
+    "write": ["wrote", "written"],
+    # Nouns
+    "child": ["children"],
+    "man": ["men"],
+    "woman": ["women"],
+    "person": ["people"],
+    "foot": ["feet"],
+    "tooth": ["teeth"],
+    "goose": ["geese"],
+    "mouse": ["mice"],
+    "ox": ["oxen"],
+    "knife": ["knives"],
+    "wife": ["wives"],
+    "life": ["lives"],
+    "leaf": ["leaves"],
+    "half": ["halves"],
+    "wolf": ["wolves"],
+    "shelf": ["shelves"],
+    "thief": ["thieves"],
+    "loaf": ["loaves"],
+    "calf": ["calves"],
+    "crisis": ["crises"],
+    "analysis": ["analyses"],
+    "phenomenon": ["phenomena"],
+    "criterion": ["criteria"],
+    "potato": ["potatoes"],
+    "tomato": ["tomatoes"],
+    "hero": ["heroes"],
+    # Adjectives and adverbs
+    "good": ["better", "best"],
+    "well": ["better", "best"],
+    "bad": ["worse", "worst"],
+    "badly": ["worse", "worst"],
+    "far": ["farther", "farthest", "further", "furthest"],
+    "little": ["less", "least"],
+    "much": ["more", "most"],
+    "many": ["more", "most"],
+}
+
+# Lemmas whose final consonant is not doubled even though they look like CVC
+_NO_DOUBLING = {"open", "visit", "listen", "happen", "offer", "answer", "enter", "order", "travel",
+                "cancel", "label", "model", "level", "signal", "total", "deliver", "remember",
+                "consider", "suffer", "wonder", "discover", "cover", "gather", "limit", "edit",
+                "credit", "benefit", "profit", "develop", "market", "target", "budget"}
+
+# Closed-class words (pronouns, determiners, conjunctions, modals, prepositions and
+# other function words) do not take the suffix rules: "we" has no "wed", "can" no "cans"
+CLOSED_CLASS_WORDS = {
+    # Pronouns
+    "i", "me", "my", "mine", "myself", "you", "your", "yours", "yourself", "yourselves",
+    "he", "him", "his", "himself", "she", "her", "hers", "herself", "it", "its", "itself",
+    "we", "us", "our", "ours", "ourselves", "they", "them", "their", "theirs", "themselves",
+    "who", "whom", "whose", "which", "what", "whatever", "whoever", "whichever",
+    "someone", "somebody", "something", "anyone", "anybody", "anything", "everyone",
+    "everybody", "everything", "nobody", "nothing", "none", "oneself",
+    # Determiners and quantifiers
+    "a", "an", "the", "this", "that", "these", "those", "some", "any", "no", "every", "each",
+    "either", "neither", "both", "all", "few", "several", "such", "another", "enough",
+    "little", "much", "many", "more", "most", "less", "least",
+    # Conjunctions
+    "and", "or", "but", "nor", "so", "yet", "if", "because", "although", "though", "unless",
+    "while", "whereas", "whether", "since", "until", "till", "than", "as", "once",
+    # Modals
+    "can", "could", "may", "might", "must", "shall", "should", "will", "would", "ought",
+    # Prepositions
+    "about", "above", "across", "after", "against", "along", "among", "around", "at", "before",
+    "behind", "below", "beneath", "beside", "besides", "between", "beyond", "by", "despite",
+    "down", "during", "except", "for", "from", "in", "inside", "into", "of",
+    "off", "on", "onto", "opposite", "out", "outside", "over", "past", "per", "round", "through",
+    "throughout", "to", "toward", "towards", "under", "underneath", "unlike", "up", "upon",
+    "via", "with", "within", "without",
+    # Other function words
+    "not", "there", "here", "where", "when", "why", "how", "then", "now", "also", "too", "very",
+    "just", "only", "even", "still", "already", "ever", "never", "always", "often", "yes",
+    "please", "hello", "hi", "goodbye", "bye", "ok", "okay", "oh",
+}
+
+# Adjectives (and a few adverbs) that take -er/-est; the vocabulary has no part of
+# speech, so the comparative rules are limited to this list: "rub" has no "rubber"
+COMPARABLE_WORDS = {
+    "able", "angry", "big", "bitter", "black", "blue", "bold", "brave", "brief", "bright",
+    "broad", "brown", "busy", "calm", "cheap", "clean", "clear", "clever", "close", "cloudy", "cold",
+    "cool", "costly", "cosy", "crazy", "cruel", "curly", "cute", "damp", "dark", "deadly", "deep",
+    "dirty", "dry", "dull", "dusty", "early", "easy", "empty", "fair", "fancy", "fast", "fat",
+    "fine", "firm", "flat", "foggy", "free", "fresh", "friendly", "full", "funny", "gentle",
+    "glad", "grand", "gray", "great", "green", "grey", "guilty", "handy", "happy", "hard", "harsh",
+    "healthy", "heavy", "high", "holy", "hot", "huge", "humble", "hungry", "icy", "kind", "large",
+    "late", "lazy", "lengthy", "light", "likely", "lively", "lonely", "long", "loose", "loud",
+    "lovely", "low", "lucky", "mad", "mean", "messy", "mild", "modest", "narrow", "nasty",
+    "naughty", "near", "neat", "new", "nice", "noisy", "odd", "old", "pale", "plain", "polite",
+    "poor", "pretty", "proud", "pure", "quick", "quiet", "rainy", "rare", "raw", "ready", "red",
+    "rich", "risky", "rough", "round", "rude", "sad", "safe", "scary", "shallow", "sharp", "shiny",
+    "short", "shy", "sick", "silly", "simple", "slim", "slow", "small", "smart", "smooth", "snowy",
+    "soft", "solid", "soon", "sore", "sour", "spicy", "steady", "sticky", "strange", "strict",
+    "strong", "stupid", "sunny", "sure", "sweet", "tall", "tasty", "thick", "thin", "thirsty",
+    "tidy", "tight", "tiny", "tired", "tough", "true", "ugly", "unhappy", "warm", "weak",
+    "wealthy", "weird", "wet", "white", "wide", "wild", "windy", "wise", "worthy", "yellow",
+    "young",
+}
+
+_WORD_PATTERN = re.compile(r"^[a-z]+$")
+
+
+def _double_final_consonant(word: str) -> bool:
+    """Check whether the final consonant doubles before a vowel suffix (stop -> stopped)"""
+    if len(word) < 3 or word in _NO_DOUBLING:
+        return False
+    c1, v, c2 = word[-3], word[-2], word[-1]
+    return (c1 not in VOWELS and v in VOWELS and c2 not in VOWELS
+            and c2 not in "wxy" and not (len(word) > 4 and word[-4] in VOWELS))
+
+
+def _ends_with_consonant_y(word: str) -> bool:
+    return len(word) > 1 and word[-1] == "y" and word[-2] not in VOWELS
+
+
+def _plural(word: str) -> str:
+    """
+    Plural / third person singular
+    Examples:
+    - "animal" -> "animals"
+    - "watch" -> "watches"
+    - "city" -> "cities"
+    """
+    if word.endswith(("s", "x", "z", "ch", "sh")):
+        return word + "es"
+    if _ends_with_consonant_y(word):
+        return word[:-1] + "ies"
+    return word + "s"
+
+
+def _past(word: str) -> str:
+    """
+    Regular past tense / past participle
+    Examples:
+    - "live" -> "lived"
+    - "study" -> "studied"
+    - "stop" -> "stopped"
+    """
+    if word.endswith("e"):
+        return word + "d"
+    if _ends_with_consonant_y(word):
+        return word[:-1] + "ied"
+    if _double_final_consonant(word):
+        return word + word[-1] + "ed"
+    return word + "ed"
+
+
+def _gerund(word: str) -> str:
+    """
+    Present participle
+    Examples:
+    - "come" -> "coming"
+    - "die" -> "dying"
+    - "run" -> "running"
+    """
+    if word.endswith("ie"):
+        return word[:-2] + "ying"
+    if word.endswith("e") and not word.endswith(("ee", "ye", "oe")) and len(word) > 2:
+        return word[:-1] + "ing"
+    if _double_final_consonant(word):
+        return word + word[-1] + "ing"
+    return word + "ing"
+
+
+def _comparatives(word: str) -> List[str]:
+    """
+    Comparative and superlative
+    Examples:
+    - "big" -> ["bigger", "biggest"]
+    - "happy" -> ["happier", "happiest"]
+    - "nice" -> ["nicer", "nicest"]
+    """
+    if word.endswith("e"):
+        return [word + "r", word + "st"]
+    if _ends_with_consonant_y(word):
+        return [word[:-1] + "ier", word[:-1] + "iest"]
+    if _double_final_consonant(word):
+        return [word + word[-1] + "er", word + word[-1] + "est"]
+    return [word + "er", word + "est"]
+
+
+def generate_inflections(lemma: str) -> Set[str]:
+    """
+    Generate the inflected forms of a single-word lemma from suffix rules
+    plus the irregular forms table. The lemma itself is not included.
+    Closed-class words only get their irregular forms ("much" -> "more", "most"),
+    and only COMPARABLE_WORDS get comparatives.
+    """
+    lemma = lemma.lower().strip()
+    forms = set(IRREGULAR_FORMS.get(lemma, []))
+
+    if _WORD_PATTERN.match(lemma) and len(lemma) > 1 and lemma not in CLOSED_CLASS_WORDS:
+        forms.add(_plural(lemma))
+        forms.add(_past(lemma))
+        forms.add(_gerund(lemma))
+        if lemma in COMPARABLE_WORDS:
+            forms.update(_comparatives(lemma))
+
+    forms.discard(lemma)
+    return forms
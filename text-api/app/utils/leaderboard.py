@@ -0,0 +1,133 @@
+import heapq
+from typing import Dict, List, Optional, Tuple
+from ..models import History
+
+# Scores an attempt can be ranked by, after matching the target CEFR level
+RANKINGS = ("meaningbert", "bertscore", "grade")
+DEFAULT_RANKING = "meaningbert"
+# Attempts kept per ranking
+LEADERBOARD_SIZE = 10
+SAVED_PREFIX = "Text saved: "
+
+def rank_key(cefr_level: Optional[str], score: Optional[float], target_cefr: Optional[str]) -> Tuple[bool, float]:
+    """
+    Ranking of an attempt: matching the target CEFR level first, then the higher score
+    Examples:
+    - rank_key("A2", 0.8, "A2") > rank_key("B1", 0.9, "A2")
+    """
+    matches = cefr_level is not None and target_cefr is not None and cefr_level.upper() == target_cefr.upper()
+    return (matches, score if score is not None else float("-inf"))
+
+def read_attempts(history: History) -> List[Dict]:
+    """
+    Text versions of a session in history order
+    Each attempt holds the indexes of its "Text saved" message and of the feedback
+    messages received while it was the current text.
+    """
+    attempts = []
+    pending = None
+    for index, message in enumerate(history.messages):
+        metadata = message.metadata or {}
+        if metadata.get("action") == "text_update":
+            pending = metadata
+        elif message.role == "assistant" and pending is not None and message.content.startswith(SAVED_PREFIX):
+            attempts.append({
+                "text_index": index,
+                "text": message.content[len(SAVED_PREFIX):],
+                "text_uuid": metadata.get("text_id"),
+                "text_id": pending.get("text_id"),
+                "version": metadata.get("version", pending.get("version")),
+                "cefr_level": pending.get("cefr_level"),
+                "timestamp": message.timestamp,
+                "feedback_indexes": []
+            })
+            pending = None
+        elif metadata.get("action") == "feedback" and attempts:
+            attempts[-1]["feedback_indexes"].append(index)
+    return attempts
+
+def top_entries(data: Dict, ranking: str, k: int) -> List[Dict]:
+    """
+    Best k entries of a stored leaderboard (see Leaderboard.to_dict), best first, in O(k)
+    Entries are copies without the internal "seq" tie-break.
+    """
+    return [{key: value for key, value in entry.items() if key != "seq"} for entry in data["rankings"][ranking][-k:][::-1]]
+
+class Leaderboard:
+    """
+    Top attempts of a session under every ranking, updated one feedback at a time
+    Each ranking is a min-heap bounded to size entries, so adding an attempt is
+    O(log size) and the worst kept attempt is the one evicted. Heaps are stored
+    sorted, which keeps them valid heaps and makes reading the top k a slice.
+    An attempt is one text version with its latest feedback.
+    """
+    
+    def __init__(self, target_cefr: Optional[str], size: int = LEADERBOARD_SIZE, seq: int = 0,
+                 rankings: Optional[Dict[str, List[Dict]]] = None):
+        self.target_cefr = target_cefr
+        self.size = size
+        self.seq = seq
+        self.heaps = {
+            ranking: [(self._key(entry, ranking), entry) for entry in (rankings or {}).get(ranking, [])]
+            for ranking in RANKINGS
+        }
+        for heap in self.heaps.values():
+            heapq.heapify(heap)
+    
+    def _key(self, entry: Dict, ranking: str) -> Tuple:
+        # Ties go to the earlier attempt, as for best_attempt
+        return rank_key(entry["cefr_compliance"], entry[ranking], self.target_cefr) + (-entry["seq"],)
+    
+    def add(self, entry: Dict) -> None:
+        """Add an attempt, replacing the entry of the same text version"""
+        self.seq += 1
+        entry = {**entry, "seq": self.seq}
+        for ranking, heap in self.heaps.items():
+            kept = [item for item in heap if item[1]["id"] != entry["id"]]
+            if len(kept) != len(heap):
+                heap[:] = kept
+                heapq.heapify(heap)
+            item = (self._key(entry, ranking), entry)
+            if len(heap) < self.size:
+                heapq.heappush(heap, item)
+            else:
+                heapq.heappushpop(heap, item)
+    
+    def top(self, ranking: str = DEFAULT_RANKING, k: int = LEADERBOARD_SIZE) -> List[Dict]:
+        return top_entries(self.to_dict(), ranking, k)
+    
+    def to_dict(self) -> Dict:
+        return {
+            "target_cefr": self.target_cefr,
+            "size": self.size,
+            "seq": self.seq,
+            "rankings": {ranking: [entry for _, entry in sorted(heap)] for ranking, heap in self.heaps.items()}
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Leaderboard":
+        return cls(data.get("target_cefr"), data.get("size", LEADERBOARD_SIZE), data.get("seq", 0), data.get("rankings"))
+    
+    @classmethod
+    def from_history(cls, history: History, target_cefr: Optional[str], size: int = LEADERBOARD_SIZE) -> "Leaderboard":
+        """Replay every feedback of a history, for sessions saved before the leaderboard or rescored offline"""
+        leaderboard = cls(target_cefr, size)
+        for attempt in read_attempts(history):
+            for index in attempt["feedback_indexes"]:
+                message = history.messages[index]
+                metadata = message.metadata or {}
+                metrics = metadata.get("metrics") or {}
+                leaderboard.add({
+                    "id": attempt["text_uuid"],
+                    "text_id": attempt["text_id"],
+                    "version": attempt["version"],
+                    "text_translated": attempt["text"],
+                    "cefr_compliance": metrics.get("cefr_compliance"),
+                    "bertscore": metrics.get("bertscore"),
+                    "meaningbert": metrics.get("meaningbert"),
+                    "grade": metadata.get("grade"),
+                    "approval": metadata.get("approval"),
+                    "feedback_id": metadata.get("feedback_id"),
+                    "created_at": message.timestamp.isoformat()
+                })
+        return leaderboard
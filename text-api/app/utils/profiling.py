@@ -0,0 +1,216 @@
+import cProfile
+import io
+import logging
+import os
+import pstats
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from time import perf_counter
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Header-triggered profiles are only taken when this is set to 1
+PROFILING_ENV = "TEXT_API_PROFILING"
+PROFILE_DIR_ENV = "TEXT_API_PROFILE_DIR"
+PROFILE_HEADER = b"x-profile"
+LATENCY_WINDOW = 1000  # latencies kept per route for percentiles
+
+
+class RequestCounters:
+    """
+    Storage and model work done while serving one request
+    Timings are in milliseconds.
+    """
+    __slots__ = ("files_opened", "bytes_read", "bytes_written", "models_validated", "cache_hits",
+                 "read_ms", "write_ms", "parse_ms", "validate_ms", "inference_ms")
+
+    def __init__(self):
+        for name in self.__slots__:
+            setattr(self, name, 0)
+
+    def as_dict(self) -> Dict[str, float]:
+        return {name: round(getattr(self, name), 3) for name in self.__slots__}
+
+
+_request_counters: ContextVar[Optional[RequestCounters]] = ContextVar("request_counters", default=None)
+
+
+def current_counters() -> Optional[RequestCounters]:
+    """Counters of the request being served, or None outside a request"""
+    return _request_counters.get()
+
+
+@contextmanager
+def timed(field: str):
+    """
+    Add the elapsed time of the block to a timing field of the current request
+    Examples:
+    - with timed("inference_ms"): model(text)
+    """
+    counters = _request_counters.get()
+    if counters is None:
+        yield
+        return
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        setattr(counters, field, getattr(counters, field) + (perf_counter() - start) * 1000)
+
+
+def _percentile(sorted_values, p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(p / 100 * len(sorted_values)))]
+
+
+class RouteStats:
+    """Per-route aggregates of request time, errors and storage counters"""
+
+    def __init__(self):
+        self.routes: Dict[str, Dict] = {}
+
+    def record(self, route: str, elapsed_ms: float, status: int, counters: RequestCounters):
+        entry = self.routes.get(route)
+        if entry is None:
+            entry = self.routes[route] = {
+                "requests": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0,
+                "latencies": deque(maxlen=LATENCY_WINDOW),
+                "counters": {name: 0 for name in RequestCounters.__slots__}
+            }
+        entry["requests"] += 1
+        entry["errors"] += status >= 500
+        entry["total_ms"] += elapsed_ms
+        entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+        entry["latencies"].append(elapsed_ms)
+        totals = entry["counters"]
+        for name in RequestCounters.__slots__:
+            totals[name] += getattr(counters, name)
+
+    def summary(self) -> Dict[str, Dict]:
+        summary = {}
+        for route, entry in sorted(self.routes.items()):
+            latencies = sorted(entry["latencies"])
+            requests = entry["requests"]
+            summary[route] = {
+                "requests": requests,
+                "errors": entry["errors"],
+                "mean_ms": round(entry["total_ms"] / requests, 3),
+                "p50_ms": round(_percentile(latencies, 50), 3),
+                "p95_ms": round(_percentile(latencies, 95), 3),
+                "p99_ms": round(_percentile(latencies, 99), 3),
+                "max_ms": round(entry["max_ms"], 3),
+                "per_request": {name: round(total / requests, 3) for name, total in entry["counters"].items()}
+            }
+        return summary
+
+    def reset(self):
+        self.routes.clear()
+
+
+route_stats = RouteStats()
+
+
+def profile_dir() -> Path:
+    return Path(os.environ.get(PROFILE_DIR_ENV, "data/profiles"))
+
+
+def profile_path(profile_id: str) -> Path:
+    return profile_dir() / f"{profile_id}.prof"
+
+
+def profile_summary(profile_id: str, limit: int = 40, sort: str = "cumulative") -> Optional[str]:
+    """pstats report of a stored profile, or None if it does not exist"""
+    path = profile_path(profile_id)
+    if not path.exists():
+        return None
+    output = io.StringIO()
+    pstats.Stats(str(path), stream=output).sort_stats(sort).print_stats(limit)
+    return output.getvalue()
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that times every request and counts its storage work
+    Aggregates go to route_stats; the response carries X-Process-Time and X-Storage-IO.
+    With TEXT_API_PROFILING=1, a request sent with "X-Profile: 1" is run under cProfile
+    and the profile is stored under its X-Profile-Id.
+    """
+
+    def __init__(self, app, stats: RouteStats = route_stats):
+        self.app = app
+        self.stats = stats
+        self.profiling_enabled = os.environ.get(PROFILING_ENV) == "1"
+        self.route_paths: Dict = {}
+
+    def route_name(self, scope) -> str:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return f"{scope['method']} <unmatched>"
+        path = self.route_paths.get(endpoint)
+        if path is None:
+            for route in getattr(scope.get("app"), "routes", []):
+                self.route_paths[getattr(route, "endpoint", None)] = getattr(route, "path", None)
+            path = self.route_paths.get(endpoint) or scope["path"]
+        return f"{scope['method']} {path}"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        counters = RequestCounters()
+        token = _request_counters.set(counters)
+        profiler = None
+        profile_id = None
+        if self.profiling_enabled and dict(scope["headers"]).get(PROFILE_HEADER) == b"1":
+            profile_id = uuid.uuid4().hex[:12]
+            profiler = cProfile.Profile()
+        status = 500
+        start = perf_counter()
+
+        async def send_with_headers(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-process-time", f"{(perf_counter() - start) * 1000:.3f}".encode()))
+                headers.append((b"x-storage-io", (
+                    f"files={counters.files_opened}; read={counters.bytes_read}; "
+                    f"written={counters.bytes_written}; models={counters.models_validated}; "
+                    f"cache_hits={counters.cache_hits}"
+                ).encode()))
+                if profile_id:
+                    headers.append((b"x-profile-id", profile_id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        if profiler is not None:
+            try:
+                profiler.enable()
+            except ValueError:
+                # Only one profiler can run at a time; another request is being profiled
+                logger.warning("Profiler busy, serving the request without a profile")
+                profiler = profile_id = None
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            elapsed_ms = (perf_counter() - start) * 1000
+            if profiler is not None:
+                profiler.disable()
+                self.save_profile(profiler, profile_id)
+            _request_counters.reset(token)
+            self.stats.record(self.route_name(scope), elapsed_ms, status, counters)
+
+    def save_profile(self, profiler: cProfile.Profile, profile_id: str):
+        try:
+            path = profile_path(profile_id)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            profiler.dump_stats(str(path))
+        except OSError as e:
+            logger.error(f"Could not store profile {profile_id}: {e}")
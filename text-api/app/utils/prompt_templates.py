@@ -0,0 +1,78 @@
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+PLACEHOLDER_PATTERN = re.compile(r'\{\{\s*(\w+)\s*\}\}')
+SECTION_PATTERN = re.compile(r'^#\s*(SYSTEM|QUERY) PROMPT\s*$', re.MULTILINE)
+
+
+class CompiledTemplate:
+    """
+    A prompt template split once into literal text and placeholder names
+    Examples:
+    - "Text:\\n{{ original_text }}" -> segments ["Text:\\n", "original_text", ""]
+    """
+
+    def __init__(self, name: str, source: str):
+        self.name = name
+        # re.split with a capture group alternates literal, placeholder, literal, ...
+        self.segments = PLACEHOLDER_PATTERN.split(source)
+        self.placeholders = list(dict.fromkeys(self.segments[1::2]))
+
+    def render(self, values: Dict[str, str]) -> str:
+        parts = self.segments[:]
+        for i in range(1, len(parts), 2):
+            parts[i] = values.get(parts[i], "")
+        return "".join(parts)
+
+
+class PromptTemplates:
+    """Loads the prompts/*.md templates and caches them compiled until the file changes"""
+
+    def __init__(self, prompts_path: Path):
+        self.prompts_path = Path(prompts_path)
+        self._cache: Dict[str, Tuple[int, CompiledTemplate]] = {}
+
+    def names(self) -> List[str]:
+        return sorted(p.stem for p in self.prompts_path.glob("*.md"))
+
+    def get(self, name: str) -> Optional[CompiledTemplate]:
+        """Compiled template by name (e.g. "a2_rewriter"), or None if it does not exist"""
+        if not re.fullmatch(r'\w+', name):
+            return None
+
+        path = self.prompts_path / f"{name}.md"
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+        cached = self._cache.get(name)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        logger.info(f"Compiling prompt template {path}")
+        template = CompiledTemplate(name, path.read_text(encoding='utf-8'))
+        self._cache[name] = (mtime, template)
+        return template
+
+
+def split_sections(prompt: str) -> Dict[str, str]:
+    """
+    Split a rendered prompt on its "# SYSTEM PROMPT" / "# QUERY PROMPT" headers
+    Returns: {"system_prompt": ..., "query_prompt": ...}; a prompt without
+    headers is returned whole as the query prompt.
+    """
+    sections = {"system_prompt": "", "query_prompt": ""}
+    matches = list(SECTION_PATTERN.finditer(prompt))
+    if not matches:
+        sections["query_prompt"] = prompt.strip()
+        return sections
+
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(prompt)
+        sections[f"{match.group(1).lower()}_prompt"] = prompt[match.end():end].strip()
+    return sections
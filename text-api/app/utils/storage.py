@@ -1,14 +1,169 @@
 import json
 import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
 from pathlib import Path
 from typing import Optional
 from datetime import datetime
-from ..models import CurrentState, History, LLMMessage, Text, Feedback
+from time import perf_counter
+from ..models import CurrentState, History, LLMMessage, Text, Feedback, MetricsEvaluation
+from .events import event_bus
+from .leaderboard import Leaderboard, rank_key
+from .profiling import current_counters
+
+try:
+    import fcntl
+except ImportError:  # Windows: session locks then only cover the threads of one process
+    fcntl = None
+
+# Parsed JSON files kept per storage instance
+FILE_CACHE_SIZE = 512
+# Files younger than this are re-read instead of cached (filesystem timestamp granularity)
+RACY_WINDOW_NS = 1_000_000_000
+# Set to 1 to validate every stored file on read, including the ones served as-is (see JSONStorage)
+STRICT_ENV = "TEXT_API_STRICT_STORAGE"
+# history.json is rewritten on every message and grows with the session; indenting it
+# makes json.dumps fall back to the pure-Python encoder (about 2.5x slower)
+HISTORY_INDENT = None
+
+class FileCache:
+    """
+    LRU cache of parsed JSON files, checked against the file identity on every read
+    Writes replace files by rename, which gives them a new inode, so a file written
+    by another worker process does not match a cached entry. Files modified less than
+    RACY_WINDOW_NS ago are not cached: with coarse timestamps, a file rewritten within
+    the same tick could otherwise reuse a freed inode and look unchanged.
+    """
+    
+    def __init__(self, maxsize: int = FILE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+    
+    def read(self, path: Path):
+        """Parsed content of a JSON file, or None if it does not exist; callers must not mutate it"""
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            return None
+        
+        with f:
+            stat = os.fstat(f.fileno())
+            key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            with self.lock:
+                entry = self.entries.get(path)
+                if entry is not None and entry[0] == key:
+                    self.entries.move_to_end(path)
+                    counters = current_counters()
+                    if counters is not None:
+                        counters.cache_hits += 1
+                    return entry[1]
+            data = _parse_json(f)
+        
+        with self.lock:
+            if time.time_ns() - stat.st_mtime_ns < RACY_WINDOW_NS:
+                self.entries.pop(path, None)
+                return data
+            self.entries[path] = (key, data)
+            self.entries.move_to_end(path)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+        return data
+    
+    def invalidate(self, path: Path):
+        with self.lock:
+            self.entries.pop(path, None)
+
+def _parse_json(f):
+    """Read and parse an open JSON file, counting the work for the current request"""
+    counters = current_counters()
+    if counters is None:
+        return json.loads(f.read())
+    
+    start = perf_counter()
+    raw = f.read()
+    parsed = perf_counter()
+    data = json.loads(raw)
+    counters.files_opened += 1
+    counters.bytes_read += len(raw)
+    counters.read_ms += (parsed - start) * 1000
+    counters.parse_ms += (perf_counter() - parsed) * 1000
+    return data
+
+def _write_json(path: Path, data, default=None, indent: Optional[int] = 2) -> None:
+    """
+    Serialize and atomically replace a JSON file, counting the work for the current request
+    The payload goes to a temporary file that is renamed over the target, so readers
+    in any process see either the old or the new file, never a partial write.
+    """
+    counters = current_counters()
+    start = perf_counter()
+    payload = json.dumps(data, indent=indent, default=default).encode('utf-8')
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    if counters is not None:
+        counters.files_opened += 1
+        counters.bytes_written += len(payload)
+        counters.write_ms += (perf_counter() - start) * 1000
+
+def _validate(model, data):
+    """Build a Pydantic model from stored data, counting the work for the current request"""
+    counters = current_counters()
+    if counters is None:
+        return model(**data)
+    
+    start = perf_counter()
+    instance = model(**data)
+    counters.models_validated += 1
+    counters.validate_ms += (perf_counter() - start) * 1000
+    return instance
+
+def _is_trusted(timestamp) -> bool:
+    """
+    Check whether a stored file is already in the JSON shape of its model
+    Files are written with model_dump(mode="json"), so their timestamps are ISO
+    ("2025-08-31T18:00:00"); files from older versions used str(datetime), with a space.
+    """
+    return isinstance(timestamp, str) and timestamp[10:11] == "T"
+
+def is_better_attempt(metrics: MetricsEvaluation, best_attempt: Optional[Text], target_cefr: str) -> bool:
+    """
+    Check whether an attempt scored with these metrics should replace the best attempt
+    Priority 1: matching the target CEFR level; priority 2: higher MeaningBERT
+    """
+    if best_attempt is None:
+        # No best attempt yet
+        return True
+    
+    return (rank_key(metrics.cefr_compliance, metrics.meaningbert, target_cefr)
+            > rank_key(best_attempt.metrics_cefr_compliance, best_attempt.metrics_meaningbert, target_cefr))
 
 class JSONStorage:
-    def __init__(self, base_path: str = "data/sessions"):
+    """
+    Session files under base_path, safe to share between threads and worker processes
+    Every read-modify-write of a session runs under session_lock, files are replaced
+    atomically, and current.json carries a state_version that increases on every write.
+    get_current/get_history build validated models; get_current_data/get_history_data
+    return the stored JSON as-is for endpoints that only re-serialize it, unless strict
+    (TEXT_API_STRICT_STORAGE=1), which validates every file on read.
+    """
+    
+    def __init__(self, base_path: str = "data/sessions", strict: Optional[bool] = None):
         self.base_path = Path(base_path)
         self.base_path.mkdir(parents=True, exist_ok=True)
+        self.strict = os.environ.get(STRICT_ENV) == "1" if strict is None else strict
+        self.cache = FileCache()
+        self._held_locks = threading.local()
+        self._thread_locks = {}
+        self._thread_locks_guard = threading.Lock()
     
     def _get_session_path(self, session_id: str) -> Path:
         session_path = self.base_path / session_id
@@ -21,6 +176,52 @@ class JSONStorage:
     def _get_history_file(self, session_id: str) -> Path:
         return self._get_session_path(session_id) / "history.json"
     
+    def _get_leaderboard_file(self, session_id: str) -> Path:
+        return self._get_session_path(session_id) / "leaderboard.json"
+    
+    def _thread_lock(self, session_id: str) -> threading.Lock:
+        with self._thread_locks_guard:
+            return self._thread_locks.setdefault(session_id, threading.Lock())
+    
+    @contextmanager
+    def session_lock(self, session_id: str):
+        """
+        Exclusive lock on a session across threads and worker processes
+        An advisory flock on the session's .lock file; re-entrant within a thread,
+        so storage methods can be called while the lock is held.
+        Examples:
+        - with storage.session_lock(session_id): current = storage.get_current(session_id); ...
+        """
+        held = self._held_locks.__dict__.setdefault("sessions", {})
+        if session_id in held:
+            held[session_id] += 1
+            try:
+                yield
+            finally:
+                held[session_id] -= 1
+            return
+        
+        if fcntl is None:
+            with self._thread_lock(session_id):
+                held[session_id] = 1
+                try:
+                    yield
+                finally:
+                    del held[session_id]
+            return
+        
+        fd = os.open(self._get_session_path(session_id) / ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            held[session_id] = 1
+            try:
+                yield
+            finally:
+                del held[session_id]
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+    
     def session_exists(self, session_id: str) -> bool:
         return self._get_session_path(session_id).exists()
     
@@ -33,200 +234,325 @@ class JSONStorage:
             messages=[]
         )
         
-        self._save_history(session_id, history)
-        
-        # Save session info including target CEFR
-        session_info = {
-            "session_id": session_id,
-            "target_cefr": target_cefr,
-            "created_at": history.created_at.isoformat()
-        }
-        session_info_file = session_path / "session_info.json"
-        with open(session_info_file, 'w', encoding='utf-8') as f:
-            json.dump(session_info, f, indent=2)
+        with self.session_lock(session_id):
+            self._save_history(session_id, history)
+            
+            # Save session info including target CEFR
+            session_info = {
+                "session_id": session_id,
+                "target_cefr": target_cefr,
+                "created_at": history.created_at.isoformat()
+            }
+            session_info_file = session_path / "session_info.json"
+            _write_json(session_info_file, session_info)
+            self.cache.invalidate(session_info_file)
+            self._save_leaderboard(session_id, Leaderboard(target_cefr))
         
         # Don't create current.json initially, only when text is added
         
         return {"session_id": session_id, "created_at": history.created_at, "target_cefr": target_cefr}
     
     def get_current(self, session_id: str) -> Optional[CurrentState]:
-        current_file = self._get_current_file(session_id)
-        if not current_file.exists():
+        data = self.cache.read(self._get_current_file(session_id))
+        
+        if data is None or data.get('text') is None:
             return None
         
-        with open(current_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            
-        if data.get('text') is None:
+        return _validate(CurrentState, data)
+    
+    def get_current_data(self, session_id: str) -> Optional[dict]:
+        """
+        Current state as JSON data, the same as get_current().model_dump(mode="json")
+        The result may be shared with the file cache and must not be mutated.
+        """
+        data = self.cache.read(self._get_current_file(session_id))
+        
+        if data is None or data.get('text') is None:
             return None
-            
-        return CurrentState(**data)
+        
+        return self._json_data(CurrentState, data, data['text'].get('created_at'))
+    
+    def get_state_version(self, session_id: str) -> int:
+        """Version of current.json, increased on every write of the session state; 0 before the first text"""
+        data = self.cache.read(self._get_current_file(session_id))
+        return data.get('state_version', 0) if data else 0
     
     def save_text(self, session_id: str, text: Text) -> None:
-        # Get existing current state to preserve attempt number and best attempt
-        existing_current = self.get_current(session_id)
-        attempt_number = 1
-        best_attempt = None
-        
-        if existing_current:
-            # Increment attempt number when saving new text
-            attempt_number = existing_current.attempt_number + 1
-            best_attempt = existing_current.best_attempt
-        
-        current = CurrentState(
-            text=text, 
-            feedback=None,
-            attempt_number=attempt_number,
-            best_attempt=best_attempt
-        )
-        self._save_current(session_id, current)
-        
-        self._add_to_history(
-            session_id,
-            LLMMessage(
-                role="user",
-                content=f"Text created/updated with CEFR level {text.cefr_level}",
-                metadata={
-                    "action": "text_update",
-                    "text_id": text.text_id,
-                    "version": text.version,
-                    "cefr_level": text.cefr_level
-                }
+        with self.session_lock(session_id):
+            # Get existing current state to preserve attempt number and best attempt
+            existing_current = self.get_current(session_id)
+            attempt_number = 1
+            best_attempt = None
+            
+            if existing_current:
+                # Increment attempt number when saving new text
+                attempt_number = existing_current.attempt_number + 1
+                best_attempt = existing_current.best_attempt
+            
+            current = CurrentState(
+                text=text,
+                feedback=None,
+                attempt_number=attempt_number,
+                best_attempt=best_attempt
             )
-        )
-        
-        self._add_to_history(
-            session_id,
-            LLMMessage(
-                role="assistant",
-                content=f"Text saved: {text.text_translated}",
-                metadata={
-                    "text_id": text.id,
-                    "version": text.version
-                }
+            self._save_current(session_id, current)
+            
+            self._add_to_history(
+                session_id,
+                LLMMessage(
+                    role="user",
+                    content=f"Text created/updated with CEFR level {text.cefr_level}",
+                    metadata={
+                        "action": "text_update",
+                        "text_id": text.text_id,
+                        "version": text.version,
+                        "cefr_level": text.cefr_level
+                    }
+                ),
+                LLMMessage(
+                    role="assistant",
+                    content=f"Text saved: {text.text_translated}",
+                    metadata={
+                        "text_id": text.id,
+                        "version": text.version
+                    }
+                )
             )
-        )
+            
+            event_bus.publish(session_id, "text_update", {
+                "id": text.id,
+                "text_id": text.text_id,
+                "version": text.version,
+                "cefr_level": text.cefr_level,
+                "text_translated": text.text_translated,
+                "attempt_number": attempt_number
+            }, current.state_version)
     
     def save_feedback(self, session_id: str, feedback: Feedback) -> None:
-        current = self.get_current(session_id)
-        if not current or not current.text:
-            raise ValueError("No text found for this session")
-        
-        current.feedback = feedback
-        
-        # Update best attempt if metrics are provided
-        if feedback.metrics:
+        with self.session_lock(session_id):
+            current = self.get_current(session_id)
+            if not current or not current.text:
+                raise ValueError("No text found for this session")
+            
+            current.feedback = feedback
             session_info = self.get_session_info(session_id)
             target_cefr = session_info.get("target_cefr") if session_info else None
             
-            if target_cefr:
-                # Check if this should be the new best attempt
-                should_update_best = False
-                
-                if current.best_attempt is None:
-                    # No best attempt yet
-                    should_update_best = True
-                else:
-                    # Compare with existing best attempt
-                    # Priority 1: Match target CEFR with better meaningbert
-                    if feedback.metrics.cefr_compliance.upper() == target_cefr.upper():
-                        if current.best_attempt.metrics_cefr_compliance.upper() != target_cefr.upper():
-                            # New one matches target, old one doesn't
-                            should_update_best = True
-                        elif current.best_attempt.metrics_meaningbert is not None:
-                            # Both match target, compare meaningbert
-                            if feedback.metrics.meaningbert > current.best_attempt.metrics_meaningbert:
-                                should_update_best = True
-                        else:
-                            # New one has metrics, old one doesn't
-                            should_update_best = True
-                    elif current.best_attempt.metrics_cefr_compliance.upper() != target_cefr.upper():
-                        # Neither matches target, compare meaningbert
-                        if current.best_attempt.metrics_meaningbert is not None:
-                            if feedback.metrics.meaningbert > current.best_attempt.metrics_meaningbert:
-                                should_update_best = True
-                        else:
-                            should_update_best = True
-                
-                if should_update_best:
-                    # Create a copy of the current text with metrics for best attempt
-                    from copy import deepcopy
-                    best_text = deepcopy(current.text)
-                    best_text.metrics_meaningbert = feedback.metrics.meaningbert
-                    best_text.metrics_cefr_compliance = feedback.metrics.cefr_compliance
-                    current.best_attempt = best_text
-        
-        self._save_current(session_id, current)
-        
-        metadata = {
-            "action": "feedback",
-            "feedback_id": feedback.id,
-            "grade": feedback.grade,
-            "approval": feedback.approval,
-            "feedback_text": feedback.feedback
-        }
-        
-        if feedback.metrics:
-            metadata["metrics"] = {
-                "cefr_compliance": feedback.metrics.cefr_compliance,
-                "bertscore": feedback.metrics.bertscore,
-                "meaningbert": feedback.metrics.meaningbert
+            best_attempt_changed = False
+            
+            # Update best attempt if metrics are provided
+            if feedback.metrics and target_cefr:
+                best_attempt_changed = is_better_attempt(feedback.metrics, current.best_attempt, target_cefr)
+                if best_attempt_changed:
+                    # Text only holds scalars, so a shallow copy with the metrics is enough
+                    current.best_attempt = current.text.model_copy(update={
+                        "metrics_meaningbert": feedback.metrics.meaningbert,
+                        "metrics_cefr_compliance": feedback.metrics.cefr_compliance
+                    })
+            
+            self._save_current(session_id, current)
+            
+            metadata = {
+                "action": "feedback",
+                "feedback_id": feedback.id,
+                "grade": feedback.grade,
+                "approval": feedback.approval,
+                "feedback_text": feedback.feedback
             }
-        
-        self._add_to_history(
-            session_id,
-            LLMMessage(
+            
+            if feedback.metrics:
+                metadata["metrics"] = {
+                    "cefr_compliance": feedback.metrics.cefr_compliance,
+                    "bertscore": feedback.metrics.bertscore,
+                    "meaningbert": feedback.metrics.meaningbert
+                }
+            
+            message = LLMMessage(
                 role="system",
                 content=f"Feedback received: Grade {feedback.grade}/10 - {feedback.approval}",
                 metadata=metadata
             )
-        )
+            self._add_to_history(session_id, message)
+            
+            leaderboard = self._load_leaderboard(session_id, target_cefr)
+            leaderboard.add({
+                "id": current.text.id,
+                "text_id": current.text.text_id,
+                "version": current.text.version,
+                "text_translated": current.text.text_translated,
+                "cefr_compliance": feedback.metrics.cefr_compliance if feedback.metrics else None,
+                "bertscore": feedback.metrics.bertscore if feedback.metrics else None,
+                "meaningbert": feedback.metrics.meaningbert if feedback.metrics else None,
+                "grade": feedback.grade,
+                "approval": feedback.approval,
+                "feedback_id": feedback.id,
+                "created_at": message.timestamp.isoformat()
+            })
+            self._save_leaderboard(session_id, leaderboard)
+            
+            event_bus.publish(session_id, "feedback", {
+                "feedback_id": feedback.id,
+                "grade": feedback.grade,
+                "approval": feedback.approval,
+                "metrics": metadata.get("metrics"),
+                "text": {"id": current.text.id, "version": current.text.version}
+            }, current.state_version)
+            if best_attempt_changed:
+                best = current.best_attempt
+                event_bus.publish(session_id, "best_attempt_changed", {
+                    "id": best.id,
+                    "version": best.version,
+                    "text_translated": best.text_translated,
+                    "metrics_cefr_compliance": best.metrics_cefr_compliance,
+                    "metrics_meaningbert": best.metrics_meaningbert
+                }, current.state_version)
     
     def get_history(self, session_id: str) -> Optional[History]:
-        history_file = self._get_history_file(session_id)
-        if not history_file.exists():
+        data = self.cache.read(self._get_history_file(session_id))
+        if data is None:
             return None
         
-        with open(history_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        return _validate(History, data)
+    
+    def get_history_data(self, session_id: str) -> Optional[dict]:
+        """
+        History as JSON data, the same as get_history().model_dump(mode="json")
+        The result may be shared with the file cache and must not be mutated.
+        Examples:
+        - return JSONResponse(storage.get_history_data(session_id))
+        """
+        data = self.cache.read(self._get_history_file(session_id))
+        if data is None:
+            return None
         
-        return History(**data)
+        return self._json_data(History, data, data.get('created_at'))
+    
+    def _json_data(self, model, data: dict, timestamp) -> dict:
+        """Stored data as-is when the file was written by this version, else validated and dumped"""
+        if not self.strict and _is_trusted(timestamp):
+            return data
+        
+        return _validate(model, data).model_dump(mode="json")
     
     def _save_current(self, session_id: str, current: CurrentState) -> None:
+        """Write current.json with the next state_version; call with the session lock held"""
         current_file = self._get_current_file(session_id)
+        current.state_version = self.get_state_version(session_id) + 1
         
         data = {
-            "text": current.text.model_dump() if current.text else None,
-            "feedback": current.feedback.model_dump() if current.feedback else None,
+            "text": current.text.model_dump(mode="json") if current.text else None,
+            "feedback": current.feedback.model_dump(mode="json") if current.feedback else None,
             "attempt_number": current.attempt_number,
-            "best_attempt": current.best_attempt.model_dump() if current.best_attempt else None
+            "best_attempt": current.best_attempt.model_dump(mode="json") if current.best_attempt else None,
+            "state_version": current.state_version
         }
         
-        with open(current_file, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, default=str)
+        _write_json(current_file, data)
+        self.cache.invalidate(current_file)
     
-    def get_session_info(self, session_id: str) -> Optional[dict]:
-        session_info_file = self._get_session_path(session_id) / "session_info.json"
-        if not session_info_file.exists():
-            return None
+    def _bump_state_version(self, session_id: str) -> None:
+        """Write a current.json without text that only carries the next state_version; call with the session lock held"""
+        current_file = self._get_current_file(session_id)
+        
+        data = {
+            "text": None,
+            "feedback": None,
+            "attempt_number": 0,
+            "best_attempt": None,
+            "state_version": self.get_state_version(session_id) + 1
+        }
         
-        with open(session_info_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        _write_json(current_file, data)
+        self.cache.invalidate(current_file)
+    
+    def get_session_info(self, session_id: str) -> Optional[dict]:
+        data = self.cache.read(self._get_session_path(session_id) / "session_info.json")
+        return dict(data) if data is not None else None
     
     def _save_history(self, session_id: str, history: History) -> None:
         history_file = self._get_history_file(session_id)
         
-        with open(history_file, 'w', encoding='utf-8') as f:
-            json.dump(history.model_dump(), f, indent=2, default=str)
+        _write_json(history_file, history.model_dump(mode="json"), indent=HISTORY_INDENT)
+        self.cache.invalidate(history_file)
     
-    def _add_to_history(self, session_id: str, message: LLMMessage) -> None:
-        history = self.get_history(session_id)
-        if not history:
-            history = History(
+    def _add_to_history(self, session_id: str, *messages: LLMMessage) -> None:
+        """
+        Append messages to the history in one write; call with the session lock held
+        The stored JSON is extended as-is (legacy files are normalized first), so the
+        existing messages are not validated and dumped again on every write.
+        """
+        history_file = self._get_history_file(session_id)
+        data = self.cache.read(history_file)
+        if data is None:
+            data = History(
                 session_id=session_id,
                 created_at=datetime.now(),
                 messages=[]
-            )
+            ).model_dump(mode="json")
+        else:
+            data = self._json_data(History, data, data.get('created_at'))
+        
+        # A new dict and list: the cached data is shared and must not be mutated
+        data = {**data, "messages": data["messages"] + [message.model_dump(mode="json") for message in messages]}
+        _write_json(history_file, data, indent=HISTORY_INDENT)
+        self.cache.invalidate(history_file)
+    
+    def get_leaderboard(self, session_id: str) -> Optional[dict]:
+        """
+        Stored top attempts of a session (see Leaderboard.to_dict), or None without history
+        Sessions saved before the leaderboard existed get it built from their history once.
+        The result may be shared with the file cache and must not be mutated.
+        Examples:
+        - top_entries(storage.get_leaderboard(session_id), "meaningbert", 3)
+        """
+        # Checked on the path itself, as _get_session_path would create the session directory
+        if not (self.base_path / session_id / "history.json").exists():
+            return None
+        
+        data = self.cache.read(self._get_leaderboard_file(session_id))
+        if data is not None:
+            return data
+        
+        with self.session_lock(session_id):
+            if self.get_history(session_id) is None:
+                return None
+            session_info = self.get_session_info(session_id)
+            leaderboard = self._load_leaderboard(session_id, session_info.get("target_cefr") if session_info else None)
+            self._save_leaderboard(session_id, leaderboard)
+            return leaderboard.to_dict()
+    
+    def _load_leaderboard(self, session_id: str, target_cefr: Optional[str]) -> Leaderboard:
+        """The session's leaderboard, rebuilt from the history if it has none; call with the session lock held"""
+        data = self.cache.read(self._get_leaderboard_file(session_id))
+        if data is not None:
+            return Leaderboard.from_dict(data)
+        
+        history = self.get_history(session_id)
+        if history is None:
+            return Leaderboard(target_cefr)
+        return Leaderboard.from_history(history, target_cefr)
+    
+    def replace_scored_history(self, session_id: str, history: History, current: Optional[CurrentState],
+                               target_cefr: Optional[str]) -> None:
+        """
+        Write back a history whose metrics were re-scored offline
+        Saves the history, the current state and the leaderboard rebuilt from the history
+        in one locked update. Without a current state the state_version is still bumped,
+        so the ETags of the rewritten history and leaderboard change. Read history and current state under the same
+        session_lock, so no write from the API falls between the read and this update.
+        Examples:
+        - with storage.session_lock(session_id): ...; storage.replace_scored_history(session_id, history, current, "A2")
+        """
+        with self.session_lock(session_id):
+            self._save_history(session_id, history)
+            self._save_leaderboard(session_id, Leaderboard.from_history(history, target_cefr))
+            if current is not None:
+                self._save_current(session_id, current)
+            else:
+                self._bump_state_version(session_id)
+    
+    def _save_leaderboard(self, session_id: str, leaderboard: Leaderboard) -> None:
+        leaderboard_file = self._get_leaderboard_file(session_id)
         
-        history.messages.append(message)
-        self._save_history(session_id, history)
\ No newline at end of file
+        _write_json(leaderboard_file, leaderboard.to_dict())
+        self.cache.invalidate(leaderboard_file)
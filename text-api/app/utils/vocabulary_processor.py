@@ -1,35 +1,183 @@
+import hashlib
 import json
+import logging
+import os
+import pickle
 import re
-from typing import Dict, List, Tuple, Set
+import threading
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, List, Optional, Tuple, Set
 from pathlib import Path
+from .inflections import IRREGULAR_FORMS, generate_inflections
+from .fuzzy import DeletionIndex
+
+logger = logging.getLogger(__name__)
+
+CEFR_LEVELS = ["A1", "A2", "B1", "B2", "C1", "C2"]
+LEVEL_RANK = {level: i for i, level in enumerate(CEFR_LEVELS)}
+
+TOKEN_PATTERN = re.compile(r'\b[\w\']+\b')
+
+# Bump when the layout of the compiled index changes so old artifacts get rebuilt
+INDEX_FORMAT_VERSION = 5
 
 class VocabularyProcessor:
     def __init__(self, vocab_path: str = "../vocabulary.json"):
-        self.vocab_path = Path(vocab_path)
-        self.vocabulary = self._load_vocabulary()
-        self.processed_vocab = self._process_vocabulary()
-        
-    def _load_vocabulary(self) -> Dict[str, List[str]]:
-        """Load vocabulary from JSON file"""
-        if not self.vocab_path.exists():
+        self.vocab_path = self._resolve_vocab_path(Path(vocab_path))
+        self.reload_lock = threading.Lock()
+        self.fuzzy_lock = threading.Lock()
+        self.last_reload: Optional[Dict[str, Any]] = None
+        # All derived data lives in a single dict so a reload can swap it atomically
+        self._index = self._load_index()
+    
+    @property
+    def vocabulary(self) -> Dict[str, List[str]]:
+        return self._index["vocabulary"]
+    
+    @property
+    def processed_vocab(self) -> Dict[str, Dict[str, str]]:
+        return self._index["processed_vocab"]
+    
+    @property
+    def word_index(self) -> Dict[str, Tuple[str, Dict[str, str]]]:
+        return self._index["word_index"]
+    
+    @property
+    def reverse_index(self) -> Dict[str, List[Tuple[str, str]]]:
+        return self._index["reverse_index"]
+    
+    @property
+    def sorted_levels(self) -> Dict[str, List[Tuple[str, str]]]:
+        return self._index["sorted_levels"]
+    
+    @property
+    def sorted_forms(self) -> List[str]:
+        return self._index["sorted_forms"]
+    
+    @property
+    def fuzzy_index(self) -> DeletionIndex:
+        """
+        Deletion index of the single-word forms, built on first use
+        It is the largest structure and only suggestions need it, so it is kept out
+        of the artifact; it is cached in the index dict and rebuilt after a reload.
+        """
+        index = self._index
+        if "fuzzy_index" not in index:
+            with self.fuzzy_lock:
+                if "fuzzy_index" not in index:
+                    single_words = [form for form in index["processed_vocab"] if form.isalpha()]
+                    index["fuzzy_index"] = DeletionIndex(single_words, max_distance=2)
+        return index["fuzzy_index"]
+    
+    @property
+    def source_hash(self) -> Optional[str]:
+        return self._index["source_hash"]
+    
+    @property
+    def artifact_path(self) -> Path:
+        """Compiled index stored next to the vocabulary file"""
+        return self.vocab_path.with_name(f"{self.vocab_path.stem}.index.pkl")
+    
+    def _resolve_vocab_path(self, vocab_path: Path) -> Path:
+        if not vocab_path.exists():
             # Try alternative path
             alt_path = Path(__file__).parent.parent.parent.parent / "vocabulary.json"
             if alt_path.exists():
-                self.vocab_path = alt_path
-            else:
-                return {"A1": [], "A2": [], "B1": [], "B2": [], "C1": []}
+                return alt_path
+        return vocab_path
+    
+    def _load_index(self) -> Dict[str, Any]:
+        """
+        Load the compiled vocabulary index, rebuilding it when the source changed
+        The artifact is stamped with the SHA-256 of vocabulary.json; a missing,
+        stale or unreadable artifact is rebuilt from source and saved again.
+        """
+        if not self.vocab_path.exists():
+            return self._build_index({"A1": [], "A2": [], "B1": [], "B2": [], "C1": []}, None)
+        
+        source = self.vocab_path.read_bytes()
+        source_hash = hashlib.sha256(source).hexdigest()
         
-        with open(self.vocab_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        index = self._read_artifact()
+        if index is not None and index.get("source_hash") == source_hash \
+                and index.get("format_version") == INDEX_FORMAT_VERSION:
+            return index
+        
+        logger.info(f"Compiling vocabulary index from {self.vocab_path}")
+        index = self._build_index(json.loads(source.decode('utf-8')), source_hash)
+        self._write_artifact(index)
+        return index
+    
+    def _read_artifact(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.artifact_path, 'rb') as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable vocabulary index {self.artifact_path}: {e}")
+            return None
     
-    def _process_vocabulary(self) -> Dict[str, Dict[str, str]]:
+    def _write_artifact(self, index: Dict[str, Any]) -> None:
+        # Write to a temporary file and rename so readers never see a partial artifact
+        tmp_path = self.artifact_path.with_name(f"{self.artifact_path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.artifact_path)
+        except OSError as e:
+            logger.warning(f"Could not write vocabulary index {self.artifact_path}: {e}")
+            tmp_path.unlink(missing_ok=True)
+    
+    def _build_index(self, vocabulary: Dict[str, List[str]], source_hash: Optional[str]) -> Dict[str, Any]:
+        """Build every lookup structure derived from the vocabulary"""
+        processed_vocab = self._process_vocabulary(vocabulary)
+        return {
+            "format_version": INDEX_FORMAT_VERSION,
+            "source_hash": source_hash,
+            "vocabulary": vocabulary,
+            "processed_vocab": processed_vocab,
+            "word_index": self._build_word_index(processed_vocab),
+            "reverse_index": self._build_reverse_index(vocabulary),
+            # (lowercase, original) pairs per level, for cursor pagination
+            "sorted_levels": {level: sorted((w.lower(), w) for w in words) for level, words in vocabulary.items()},
+            # All normalized forms, for prefix search
+            "sorted_forms": sorted(processed_vocab)
+        }
+    
+    def reload(self) -> Dict[str, Any]:
+        """
+        Rebuild the index from the vocabulary file and swap it into this processor
+        Requests keep using the previous index until the new one is complete.
+        Returns a summary of the reload; does nothing if a reload is already running.
+        """
+        if not self.reload_lock.acquire(blocking=False):
+            return {"status": "already_running"}
+        try:
+            previous_hash = self.source_hash
+            new_index = self._load_index()
+            self._index = new_index
+            self.last_reload = {
+                "status": "completed",
+                "previous_hash": previous_hash,
+                "source_hash": new_index["source_hash"],
+                "changed": previous_hash != new_index["source_hash"]
+            }
+        except Exception as e:
+            logger.error(f"Error reloading vocabulary: {e}")
+            self.last_reload = {"status": "failed", "error": str(e)}
+        finally:
+            self.reload_lock.release()
+        return self.last_reload
+    
+    def _process_vocabulary(self, vocabulary: Dict[str, List[str]]) -> Dict[str, Dict[str, str]]:
         """
         Process vocabulary to handle special cases
         Returns: Dict[normalized_word, Dict[original_form, level]]
         """
         processed = {}
         
-        for level, words in self.vocabulary.items():
+        for level, words in vocabulary.items():
             for word in words:
                 # Handle different cases
                 if '/' in word and '(' not in word:
@@ -68,6 +216,104 @@ class VocabularyProcessor:
         
         return processed
     
+    def _build_word_index(self, processed_vocab: Dict[str, Dict[str, str]]) -> Dict[str, Tuple[str, Dict[str, str]]]:
+        """
+        Build the lookup index used for tagging, covering surface forms and inflections
+        Returns: Dict[form, (lemma, Dict[original_form, level])]
+        - Surface forms map to themselves: "animal" -> ("animal", {...})
+        - Inflected forms map to their lemma: "animals" -> ("animal", {...}), "saw" -> ("see", {...})
+        Surface forms always win over inflections, and irregular forms over rule-generated ones.
+        """
+        index = {form: (form, entries) for form, entries in processed_vocab.items()}
+
+        # Irregular forms first so that e.g. "better" resolves to "good" rather than "bet"
+        for lemma, forms in IRREGULAR_FORMS.items():
+            if lemma not in processed_vocab:
+                continue
+            for form in forms:
+                if form not in index:
+                    index[form] = (lemma, processed_vocab[lemma])
+
+        for lemma, entries in processed_vocab.items():
+            if ' ' in lemma:
+                continue
+            for form in generate_inflections(lemma):
+                if form not in index:
+                    index[form] = (lemma, entries)
+
+        return index
+    
+    def _build_reverse_index(self, vocabulary: Dict[str, List[str]]) -> Dict[str, List[Tuple[str, str]]]:
+        """
+        Build the reverse index used by word checks
+        Returns: Dict[normalized_form, List[(level, original_form)]]
+        Covers direct matches, slash variants, parenthetical heads and (s) plurals,
+        keeping vocabulary order and one occurrence per (level, form).
+        """
+        index = {}
+        
+        for level, words in vocabulary.items():
+            for word in words:
+                forms = [word]
+                if '/' in word:
+                    forms.extend(self._expand_slash_variations(word))
+                if '(' in word:
+                    forms.append(self._extract_main_word(word))
+                    if word.endswith('(s)'):
+                        base = word.replace('(s)', '')
+                        forms.extend([base, base + 's'])
+                
+                occurrence = (level, word)
+                for form in forms:
+                    normalized = form.lower().strip()
+                    occurrences = index.setdefault(normalized, [])
+                    if occurrence not in occurrences:
+                        occurrences.append(occurrence)
+        
+        return index
+    
+    def check_word(self, word: str) -> List[Tuple[str, str]]:
+        """Return the (level, original_form) occurrences of a word in the vocabulary"""
+        return self.reverse_index.get(word.lower().strip(), [])
+    
+    def list_level(self, level: str, cursor: Optional[str] = None, limit: int = 100) -> Tuple[List[str], Optional[str]]:
+        """
+        Page through the words of a level in alphabetical order
+        cursor is the last word of the previous page; returns (words, next_cursor)
+        """
+        entries = self.sorted_levels[level]
+        start = bisect_right(entries, (cursor.lower(), cursor)) if cursor else 0
+        page = [word for _, word in entries[start:start + limit]]
+        next_cursor = page[-1] if page and start + limit < len(entries) else None
+        return page, next_cursor
+    
+    def search_prefix(self, prefix: str, limit: int = 20) -> List[str]:
+        """Normalized forms starting with prefix, in alphabetical order"""
+        prefix = prefix.lower().strip()
+        forms = self.sorted_forms
+        start = bisect_left(forms, prefix)
+        end = bisect_right(forms, prefix + '\uffff', lo=start)
+        return forms[start:min(end, start + limit)]
+    
+    def lowest_level(self, form: str) -> Optional[str]:
+        """Lowest CEFR level a normalized form (or inflection) is listed at"""
+        entry = self.word_index.get(form)
+        if entry is None:
+            return None
+        return min(entry[1].values(), key=lambda l: LEVEL_RANK.get(l, len(CEFR_LEVELS)))
+    
+    def suggest(self, word: str, max_distance: int = 1, limit: int = 5) -> List[Dict[str, Any]]:
+        """
+        Closest in-vocabulary words by edit distance
+        Examples:
+        - "bananna" -> [{"word": "banana", "distance": 1, "level": "A1"}]
+        """
+        matches = self.fuzzy_index.search(word.lower().strip(), max_distance)
+        return [
+            {"word": form, "distance": distance, "level": self.lowest_level(form)}
+            for distance, form in matches[:limit]
+        ]
+    
     def _expand_slash_variations(self, word: str) -> List[str]:
         """
         Expand slash variations
@@ -126,19 +372,23 @@ class VocabularyProcessor:
         """
         Tag words in text with their CEFR levels
         Returns: List of tagged words with format:
-        [{"word": "original_word", "tagged_as": "vocabulary_entry", "level": "A1"}]
+        [{"word": "original_word", "tagged_as": "vocabulary_entry", "level": "A1", "lemma": "matched_lemma"}]
+        Inflected words ("animals", "coming", "saw") are tagged through their lemma.
         """
         # Tokenize text (simple approach, can be improved)
-        words = re.findall(r'\b[\w\']+\b', text.lower())
+        text_lower = text.lower()
+        words = TOKEN_PATTERN.findall(text_lower)
         
         tagged = []
         seen = set()  # To avoid duplicates
+        word_index = self.word_index  # Same index for the whole text even if a reload swaps it
         
         for word in words:
             normalized = word.lower().strip()
             
-            if normalized in self.processed_vocab:
-                entries = self.processed_vocab[normalized]
+            match = word_index.get(normalized)
+            if match is not None:
+                lemma, entries = match
                 for original_form, level in entries.items():
                     tag_key = f"{word}_{original_form}_{level}"
                     if tag_key not in seen:
@@ -147,7 +397,8 @@ class VocabularyProcessor:
                             "word": word,
                             "tagged_as": original_form,
                             "level": level,
-                            "position": text.lower().find(word)
+                            "lemma": lemma,
+                            "position": text_lower.find(word)
                         })
         
         # Sort by position in text
@@ -159,6 +410,67 @@ class VocabularyProcessor:
         
         return tagged
     
+    def profile_text(self, text: str, target: str, suggest: bool = False) -> Dict[str, Any]:
+        """
+        Build the lexical level profile of a text in a single pass
+        Every word token is resolved to the lowest level it is listed at;
+        tokens without letters (numbers) are not counted.
+        Returns coverage ratios per level, the unknown ratio and the words
+        above the target level with their character spans. With suggest,
+        unknown words also get their closest in-vocabulary word.
+        """
+        target = target.upper()
+        target_rank = LEVEL_RANK[target]
+        word_index = self.word_index
+        
+        counts = {level: 0 for level in self.vocabulary}
+        unknown = 0
+        total = 0
+        above_target = []
+        suggestions = {}
+        
+        for match in TOKEN_PATTERN.finditer(text):
+            token = match.group()
+            if not any(c.isalpha() for c in token):
+                continue
+            total += 1
+            
+            entry = word_index.get(token.lower())
+            if entry is None:
+                unknown += 1
+                if suggest and token.isalpha() and token.lower() not in suggestions:
+                    closest = self.suggest(token, limit=1)
+                    suggestions[token.lower()] = closest[0] if closest else None
+                continue
+            
+            lemma, forms = entry
+            level = min(forms.values(), key=lambda l: LEVEL_RANK.get(l, len(CEFR_LEVELS)))
+            counts[level] = counts.get(level, 0) + 1
+            
+            if LEVEL_RANK.get(level, len(CEFR_LEVELS)) > target_rank:
+                above_target.append({
+                    "word": token,
+                    "lemma": lemma,
+                    "level": level,
+                    "start": match.start(),
+                    "end": match.end()
+                })
+        
+        def ratio(n: int) -> float:
+            return round(n / total, 4) if total else 0.0
+        
+        within_target = sum(n for level, n in counts.items() if LEVEL_RANK.get(level, len(CEFR_LEVELS)) <= target_rank)
+        
+        return {
+            "target": target,
+            "total_tokens": total,
+            "coverage": {level: ratio(n) for level, n in counts.items()},
+            "within_target_ratio": ratio(within_target),
+            "unknown_ratio": ratio(unknown),
+            "above_target": above_target,
+            "suggestions": suggestions
+        }
+    
     def get_vocabulary_stats(self) -> Dict[str, int]:
         """Get statistics about the vocabulary"""
         stats = {}
@@ -0,0 +1,121 @@
+import json
+import random
+import shutil
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+SESSIONS_PATH = Path(__file__).parent.parent / "data" / "sessions"
+
+# Used when no stored sessions are available
+FALLBACK_TEXT = ("Small animals are common in cities and towns. For example, there are birds, squirrels, "
+                 "mice and insects. More and more wild animals are coming into cities. ") * 3
+FALLBACK_FEEDBACK = ("FAIL: Meaning Preservation Failure. The MeaningBERT score is below the required threshold. "
+                     "Rephrase the final sentence to better capture the original's meaning. ") * 5
+
+
+def sample_shapes(sessions_path: Path = SESSIONS_PATH, max_sessions: int = 200, seed: int = 42) -> Dict[str, List]:
+    """
+    Collect real message shapes from stored sessions: saved texts, feedback texts and metrics
+    Examples:
+    - sample_shapes()["texts"][0] -> "You can often see small animals in cities and towns..."
+    """
+    shapes = {"texts": [], "feedback": [], "metrics": [], "text_ids": []}
+    if sessions_path.exists():
+        session_dirs = sorted(p for p in sessions_path.iterdir() if (p / "history.json").exists())
+        random.Random(seed).shuffle(session_dirs)
+        for session_dir in session_dirs[:max_sessions]:
+            with open(session_dir / "history.json", "r", encoding="utf-8") as f:
+                messages = json.load(f).get("messages", [])
+            for message in messages:
+                metadata = message.get("metadata") or {}
+                if message["role"] == "assistant" and message["content"].startswith("Text saved: "):
+                    shapes["texts"].append(message["content"][len("Text saved: "):])
+                elif metadata.get("action") == "feedback":
+                    shapes["feedback"].append(metadata.get("feedback_text", ""))
+                    if metadata.get("metrics"):
+                        shapes["metrics"].append(metadata["metrics"])
+                elif metadata.get("action") == "text_update":
+                    shapes["text_ids"].append(metadata.get("text_id"))
+
+    if not shapes["texts"]:
+        shapes["texts"] = [FALLBACK_TEXT]
+    if not shapes["feedback"]:
+        shapes["feedback"] = [FALLBACK_FEEDBACK]
+    if not shapes["metrics"]:
+        shapes["metrics"] = [{"cefr_compliance": "A2", "bertscore": 0.93, "meaningbert": 0.81}]
+    if not shapes["text_ids"]:
+        shapes["text_ids"] = ["01-a2"]
+    return shapes
+
+
+def build_session(base_path: Path, session_id: str, message_count: int, shapes: Dict[str, List], seed: int = 42):
+    """
+    Write a session with message_count history messages in the storage layout
+    Messages cycle through the real pattern: text_update, saved text, feedback with metrics.
+    """
+    rng = random.Random(seed)
+    session_path = base_path / session_id
+    session_path.mkdir(parents=True, exist_ok=True)
+    start = datetime(2025, 8, 31, 18, 0, 0)
+    text_id = rng.choice(shapes["text_ids"])
+
+    messages = []
+    version = 0
+    text = None
+    while len(messages) < message_count:
+        step = len(messages) % 3
+        timestamp = (start + timedelta(seconds=len(messages))).isoformat()
+        if step == 0:
+            version += 1
+            text = rng.choice(shapes["texts"])
+            messages.append({"role": "user", "content": "Text created/updated with CEFR level A2", "timestamp": timestamp,
+                             "metadata": {"action": "text_update", "text_id": text_id, "version": version, "cefr_level": "A2"}})
+        elif step == 1:
+            messages.append({"role": "assistant", "content": f"Text saved: {text}", "timestamp": timestamp,
+                             "metadata": {"text_id": f"text-{version}", "version": version}})
+        else:
+            messages.append({"role": "system", "content": "Feedback received: Grade 4/10 - FAIL", "timestamp": timestamp,
+                             "metadata": {"action": "feedback", "feedback_id": f"feedback-{version}", "grade": 4,
+                                          "approval": "FAIL", "feedback_text": rng.choice(shapes["feedback"]),
+                                          "metrics": rng.choice(shapes["metrics"])}})
+
+    history = {"session_id": session_id, "created_at": start.isoformat(), "messages": messages}
+    current = {
+        "text": {"id": f"text-{version}", "cefr_level": "A2", "text_id": text_id, "text_translated": text,
+                 "version": version, "created_at": start.isoformat(), "updated_at": start.isoformat(),
+                 "metrics_meaningbert": None, "metrics_cefr_compliance": None},
+        "feedback": None,
+        "attempt_number": version,
+        "best_attempt": None,
+        "state_version": version
+    }
+    session_info = {"session_id": session_id, "target_cefr": "A2", "created_at": start.isoformat()}
+
+    for name, data in (("history.json", history), ("current.json", current), ("session_info.json", session_info)):
+        with open(session_path / name, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+
+
+class SessionFixture:
+    """
+    A session of a given size that can be restored between iterations,
+    so benchmarks that append messages always start from the same state
+    """
+
+    def __init__(self, base_path: Path, message_count: int, shapes: Dict[str, List]):
+        self.session_id = f"bench-{message_count}"
+        self.path = base_path / self.session_id
+        build_session(base_path, self.session_id, message_count, shapes)
+        self.files = {p.name: p.read_bytes() for p in self.path.iterdir()}
+
+    def restore(self):
+        for name, data in self.files.items():
+            (self.path / name).write_bytes(data)
+
+
+def fixture_dir(path: Path) -> Path:
+    if path.exists():
+        shutil.rmtree(path)
+    path.mkdir(parents=True)
+    return path
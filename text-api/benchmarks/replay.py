@@ -0,0 +1,313 @@
+"""
+Load generator that replays recorded sessions as the n8n workflow call sequence
+
+Each recorded data/sessions/*/history.json is replayed as the calls the n8n agents
+make against the API: create the session, fetch examples, tag the original, then for
+every recorded text version tag it, evaluate its metrics, save it, save its feedback
+and read the current text, and finally read the attempt number and best attempt.
+
+By default the app runs in-process (ASGI, metrics models stubbed, sessions written
+to a temporary folder); pass --base-url to load a running server instead.
+
+Usage (from text-api/):
+    python -m benchmarks.replay --sessions 100 --concurrency 8 --think-time 0.05
+    python -m benchmarks.replay --base-url http://127.0.0.1:8001 --concurrency 4
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+from app.utils.example_store import DEFAULT_ORIGINALS, load_originals
+from app.utils.leaderboard import read_attempts
+from app.models import History
+from .fixtures import SESSIONS_PATH
+from .run import REPORTS_DIR
+
+logger = logging.getLogger(__name__)
+
+TRIAL_DATA_PATH = Path(__file__).parent.parent.parent / "tsar2025_trialdata.jsonl"
+PERCENTILES = [50, 95, 99]
+
+
+def load_workflows(sessions_path: Path, limit: int, originals: Dict[str, str], seed: int = 42) -> List[Dict]:
+    """
+    Turn recorded sessions into replayable workflows
+    Examples:
+    - load_workflows(SESSIONS_PATH, 1, {})[0]["attempts"][0] -> {"text": "...", "approval": "FAIL", ...}
+    """
+    session_dirs = sorted(p for p in sessions_path.iterdir() if (p / "history.json").exists())
+    random.Random(seed).shuffle(session_dirs)
+
+    workflows = []
+    for session_dir in session_dirs:
+        if len(workflows) >= limit:
+            break
+        with open(session_dir / "history.json", "r", encoding="utf-8") as f:
+            history = History(**json.load(f))
+        attempts = read_attempts(history)
+        if not attempts:
+            continue
+
+        replayed = []
+        for attempt in attempts:
+            feedback = {}
+            if attempt["feedback_indexes"]:
+                feedback = history.messages[attempt["feedback_indexes"][0]].metadata or {}
+            replayed.append({
+                "text": attempt["text"],
+                "cefr_level": attempt["cefr_level"] or "A2",
+                "approval": feedback.get("approval", "FAIL"),
+                "grade": feedback.get("grade", 1),
+                "feedback": feedback.get("feedback_text") or "No feedback recorded"
+            })
+        text_id = attempts[0]["text_id"] or "text_001"
+        workflows.append({
+            "source": session_dir.name,
+            "target_cefr": replayed[0]["cefr_level"],
+            "text_id": text_id,
+            "original": originals.get(text_id, replayed[0]["text"]),
+            "attempts": replayed
+        })
+    return workflows
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(p / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Recorder:
+    """Latency and status of every request, grouped by endpoint template"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    def add(self, endpoint: str, seconds: float, status: str, ok: bool):
+        self.latencies[endpoint].append(seconds * 1000)
+        self.statuses[endpoint][status] += 1
+        if not ok:
+            self.errors[endpoint] += 1
+
+    def summary(self, wall_seconds: float) -> Dict:
+        endpoints = {}
+        for endpoint, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            endpoints[endpoint] = {
+                "requests": len(values),
+                "errors": self.errors[endpoint],
+                "error_rate": round(self.errors[endpoint] / len(values), 4),
+                "throughput_rps": round(len(values) / wall_seconds, 2),
+                "mean_ms": round(sum(values) / len(values), 3),
+                **{f"p{p}_ms": round(percentile(values, p), 3) for p in PERCENTILES},
+                "max_ms": round(values[-1], 3),
+                "statuses": dict(self.statuses[endpoint])
+            }
+        requests = sum(len(v) for v in self.latencies.values())
+        errors = sum(self.errors.values())
+        all_values = sorted(v for values in self.latencies.values() for v in values)
+        return {
+            "requests": requests,
+            "errors": errors,
+            "error_rate": round(errors / requests, 4) if requests else 0.0,
+            "throughput_rps": round(requests / wall_seconds, 2),
+            **{f"p{p}_ms": round(percentile(all_values, p), 3) for p in PERCENTILES},
+            "endpoints": endpoints
+        }
+
+
+class WorkflowReplayer:
+    """Runs workflows with a fixed number of concurrent virtual users"""
+
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, think_time: float = 0.0,
+                 include_examples: bool = True, seed: int = 42):
+        self.client = client
+        self.recorder = recorder
+        self.think_time = think_time
+        self.include_examples = include_examples
+        self.rng = random.Random(seed)
+        self.completed = 0
+        self.failed = 0
+
+    async def call(self, method: str, endpoint: str, url: str, **kwargs) -> Optional[Dict]:
+        """One timed request; endpoint is the route template the latency is reported under"""
+        if self.think_time:
+            await asyncio.sleep(self.rng.expovariate(1 / self.think_time))
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            self.recorder.add(f"{method} {endpoint}", time.perf_counter() - start, type(e).__name__, ok=False)
+            return None
+        self.recorder.add(f"{method} {endpoint}", time.perf_counter() - start, str(response.status_code),
+                          ok=response.status_code < 400)
+        if response.status_code >= 400:
+            return None
+        if response.headers.get("content-type", "").startswith("application/json"):
+            return response.json()
+        return {}
+
+    async def replay(self, workflow: Dict):
+        session = await self.call("POST", "/api/v1/sessions/create", "/api/v1/sessions/create",
+                                  json={"target_cefr": workflow["target_cefr"]})
+        if session is None:
+            self.failed += 1
+            return
+        session_id = session["session_id"]
+        original = workflow["original"]
+
+        if self.include_examples:
+            await self.call("GET", "/api/v1/examples/get-examples", "/api/v1/examples/get-examples",
+                            params={"count": 10, "target_cefr": workflow["target_cefr"].lower(),
+                                    "text_id": workflow["text_id"]})
+        await self.call("POST", "/api/v1/vocabulary/tag", "/api/v1/vocabulary/tag", json={"text": original})
+
+        for attempt in workflow["attempts"]:
+            await self.call("POST", "/api/v1/vocabulary/tag", "/api/v1/vocabulary/tag", json={"text": attempt["text"]})
+            metrics = await self.call("POST", "/api/v1/metrics/evaluate", "/api/v1/metrics/evaluate",
+                                      json={"simplified_text": attempt["text"], "original_text": original})
+            await self.call("POST", "/api/v1/texts/create", "/api/v1/texts/create", json={
+                "session_id": session_id,
+                "cefr_level": attempt["cefr_level"],
+                "text_id": workflow["text_id"],
+                "text_translated": attempt["text"]
+            })
+            await self.call("POST", "/api/v1/feedback/create", "/api/v1/feedback/create", json={
+                "session_id": session_id,
+                "approval": attempt["approval"],
+                "grade": attempt["grade"],
+                "feedback": attempt["feedback"],
+                **(metrics or {})
+            })
+            await self.call("GET", "/api/v1/texts/{session_id}/current", f"/api/v1/texts/{session_id}/current")
+
+        await self.call("GET", "/api/v1/sessions/{session_id}/attempt-number",
+                        f"/api/v1/sessions/{session_id}/attempt-number")
+        await self.call("GET", "/api/v1/sessions/{session_id}/best-attempt",
+                        f"/api/v1/sessions/{session_id}/best-attempt")
+        self.completed += 1
+
+    async def run(self, workflows: List[Dict], concurrency: int):
+        queue: asyncio.Queue = asyncio.Queue()
+        for workflow in workflows:
+            queue.put_nowait(workflow)
+
+        async def user():
+            while not queue.empty():
+                await self.replay(queue.get_nowait())
+
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+
+
+def in_process_app(sessions_dir: str, model_latency: float):
+    """The FastAPI app with stubbed metrics models and session storage in sessions_dir"""
+    from app.main import app
+    from app.utils import JSONStorage
+    from .stubs import install_metrics_stubs
+
+    install_metrics_stubs(model_latency)
+    for name in ("sessions", "texts", "feedback", "history", "prompts"):
+        module = sys.modules.get(f"app.api.{name}")
+        if isinstance(getattr(module, "storage", None), JSONStorage):
+            module.storage = JSONStorage(sessions_dir)
+    return app
+
+
+async def run_load(workflows: List[Dict], concurrency: int, think_time: float, base_url: Optional[str],
+                   model_latency: float, include_examples: bool, timeout: float, seed: int) -> Dict:
+    recorder = Recorder()
+    with tempfile.TemporaryDirectory(prefix="text-api-replay-") as sessions_dir:
+        if base_url:
+            client = httpx.AsyncClient(base_url=base_url, timeout=timeout)
+        else:
+            transport = httpx.ASGITransport(app=in_process_app(sessions_dir, model_latency))
+            client = httpx.AsyncClient(transport=transport, base_url="http://replay", timeout=timeout)
+
+        async with client:
+            replayer = WorkflowReplayer(client, recorder, think_time, include_examples, seed)
+            start = time.perf_counter()
+            await replayer.run(workflows, concurrency)
+            wall_seconds = time.perf_counter() - start
+
+    return {
+        "config": {
+            "target": base_url or "in-process",
+            "concurrency": concurrency,
+            "think_time_s": think_time,
+            "model_latency_s": model_latency if not base_url else None,
+            "examples": include_examples
+        },
+        "wall_seconds": round(wall_seconds, 3),
+        "workflows": {"total": len(workflows), "completed": replayer.completed, "failed": replayer.failed,
+                      "per_second": round(replayer.completed / wall_seconds, 3)},
+        **recorder.summary(wall_seconds)
+    }
+
+
+def print_report(report: Dict):
+    print(f"\n{report['workflows']['completed']}/{report['workflows']['total']} workflows in "
+          f"{report['wall_seconds']}s against {report['config']['target']} "
+          f"(concurrency {report['config']['concurrency']}, think time {report['config']['think_time_s']}s)")
+    print(f"{'endpoint':<48} {'reqs':>6} {'err%':>6} {'rps':>8} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for endpoint, stats in report["endpoints"].items():
+        print(f"{endpoint:<48} {stats['requests']:>6} {100 * stats['error_rate']:>6.2f} {stats['throughput_rps']:>8.1f} "
+              f"{stats['p50_ms']:>9.2f} {stats['p95_ms']:>9.2f} {stats['p99_ms']:>9.2f}")
+    print(f"{'total':<48} {report['requests']:>6} {100 * report['error_rate']:>6.2f} {report['throughput_rps']:>8.1f} "
+          f"{report['p50_ms']:>9.2f} {report['p95_ms']:>9.2f} {report['p99_ms']:>9.2f}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Replay recorded sessions as the n8n workflow call sequence")
+    parser.add_argument("--sessions-path", default=str(SESSIONS_PATH), help="Recorded sessions to replay")
+    parser.add_argument("--sessions", type=int, default=50, help="Number of recorded sessions to replay")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent virtual users")
+    parser.add_argument("--think-time", type=float, default=0.0,
+                        help="Mean pause before each call in seconds (exponentially distributed; 0 disables)")
+    parser.add_argument("--base-url", help="Load a running server instead of the in-process app")
+    parser.add_argument("--model-latency", type=float, default=0.0,
+                        help="Seconds each stubbed metrics model call takes (in-process only)")
+    parser.add_argument("--no-examples", action="store_true", help="Skip the get-examples call")
+    parser.add_argument("--originals", action="append", default=None,
+                        help="JSONL file with text_id/original records (repeatable; default: gold and trial data)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=str(REPORTS_DIR / "replay-report.json"), help="JSON report to write")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    originals = load_originals([Path(p) for p in args.originals] if args.originals else DEFAULT_ORIGINALS)
+    workflows = load_workflows(Path(args.sessions_path), args.sessions, originals, args.seed)
+    if not workflows:
+        parser.error(f"No replayable sessions in {args.sessions_path}")
+
+    include_examples = not args.no_examples
+    if include_examples and not args.base_url and not TRIAL_DATA_PATH.exists():
+        logger.warning(f"{TRIAL_DATA_PATH} not found, skipping the get-examples call")
+        include_examples = False
+
+    report = asyncio.run(run_load(workflows, args.concurrency, args.think_time, args.base_url,
+                                  args.model_latency, include_examples, args.timeout, args.seed))
+    print_report(report)
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved: {args.output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+Benchmark suite for the text-api hot paths
+
+Fixtures are generated from the shapes of the stored sessions in data/sessions
+(saved texts, feedback texts, metrics) into a scratch folder, and the metrics
+models are replaced by stubs. Results go to a JSON report; pass an earlier
+report with --compare to see the change per benchmark.
+
+Usage (from text-api/):
+    python -m benchmarks.run                     # report in benchmarks/reports/
+    python -m benchmarks.run --output benchmarks/reports/bench-new.json --compare benchmarks/reports/benchmark-report.json
+    python -m benchmarks.run --only storage
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from .fixtures import SessionFixture, fixture_dir, sample_shapes
+from .stubs import install_metrics_stubs
+
+REPORT_VERSION = 1
+SESSION_SIZES = [10, 100, 1000]
+REGRESSION_THRESHOLD = 1.10  # median slower by more than 10%
+# Default folder of the JSON reports (gitignored)
+REPORTS_DIR = Path(__file__).parent / "reports"
+
+
+class Benchmark:
+    """A timed callable, with an untimed setup run before every iteration"""
+
+    def __init__(self, name: str, fn: Callable, setup: Optional[Callable] = None, repeat: int = 30):
+        self.name = name
+        self.fn = fn
+        self.setup = setup
+        self.repeat = repeat
+
+    def run(self, repeat_scale: float = 1.0, warmup: int = 1) -> Dict:
+        repeat = max(3, int(self.repeat * repeat_scale))
+        timings = []
+        for iteration in range(warmup + repeat):
+            if self.setup:
+                self.setup()
+            start = time.perf_counter_ns()
+            self.fn()
+            elapsed = (time.perf_counter_ns() - start) / 1e6
+            if iteration >= warmup:
+                timings.append(elapsed)
+        timings.sort()
+        return {
+            "iterations": repeat,
+            "mean_ms": round(statistics.fmean(timings), 4),
+            "median_ms": round(statistics.median(timings), 4),
+            "p95_ms": round(timings[min(len(timings) - 1, int(0.95 * len(timings)))], 4),
+            "min_ms": round(timings[0], 4),
+            "stdev_ms": round(statistics.stdev(timings), 4) if len(timings) > 1 else 0.0
+        }
+
+
+def storage_benchmarks(workdir: Path, shapes: Dict) -> List[Benchmark]:
+    from app.models import Feedback, MetricsEvaluation, Text
+    from app.utils.storage import JSONStorage
+
+    storage = JSONStorage(str(fixture_dir(workdir / "sessions")))
+    benchmarks = []
+    for size in SESSION_SIZES:
+        fixture = SessionFixture(storage.base_path, size, shapes)
+        session_id = fixture.session_id
+        text = Text(cefr_level="A2", text_id="01-a2", text_translated=shapes["texts"][0], version=2)
+        feedback = Feedback(approval="FAIL", grade=4, feedback=shapes["feedback"][0],
+                            metrics=MetricsEvaluation(**shapes["metrics"][0]))
+        repeat = 30 if size < 1000 else 10
+        benchmarks += [
+            Benchmark(f"storage.save_text[{size}]", lambda s=session_id: storage.save_text(s, text),
+                      setup=fixture.restore, repeat=repeat),
+            Benchmark(f"storage.save_feedback[{size}]", lambda s=session_id: storage.save_feedback(s, feedback),
+                      setup=fixture.restore, repeat=repeat),
+            Benchmark(f"storage.get_history[{size}]", lambda s=session_id: storage.get_history(s),
+                      setup=fixture.restore, repeat=repeat),
+            Benchmark(f"storage.get_history_data[{size}]", lambda s=session_id: storage.get_history_data(s),
+                      setup=fixture.restore, repeat=repeat)
+        ]
+    return benchmarks
+
+
+def vocabulary_benchmarks(shapes: Dict) -> List[Benchmark]:
+    from app.utils.vocabulary_processor import VocabularyProcessor
+
+    processor = VocabularyProcessor()
+    short_text = shapes["texts"][0].split(". ")[0] + "."
+    long_text = " ".join(shapes["texts"][:8])
+    words = [w.strip(".,;:!?\"'()").lower() for w in long_text.split()][:50]
+    return [
+        Benchmark("vocabulary.tag_text[short]", lambda: processor.tag_text(short_text), repeat=200),
+        Benchmark("vocabulary.tag_text[long]", lambda: processor.tag_text(long_text), repeat=50),
+        Benchmark("vocabulary.check_word[50 words]", lambda: [processor.check_word(w) for w in words], repeat=100)
+    ]
+
+
+def endpoint_benchmarks(workdir: Path, shapes: Dict) -> List[Benchmark]:
+    from fastapi.testclient import TestClient
+    from app.api import examples, history
+    from app.main import app
+    from app.utils.storage import JSONStorage
+
+    install_metrics_stubs()
+    client = TestClient(app)
+    benchmarks = []
+
+    history.storage = JSONStorage(str(workdir / "endpoint-sessions"))
+    fixture = SessionFixture(history.storage.base_path, SESSION_SIZES[-1], shapes)
+    # The endpoint itself, then with the gzip middleware compressing the response
+    benchmarks += [
+        Benchmark(f"history.get_history[{SESSION_SIZES[-1]}]",
+                  lambda: client.get(f"/api/v1/history/{fixture.session_id}", headers={"Accept-Encoding": "identity"}),
+                  repeat=20),
+        Benchmark(f"history.get_history[{SESSION_SIZES[-1]},gzip]",
+                  lambda: client.get(f"/api/v1/history/{fixture.session_id}", headers={"Accept-Encoding": "gzip"}),
+                  repeat=20)
+    ]
+
+    trial_data_path = Path(examples.__file__).parent.parent.parent.parent / "tsar2025_trialdata.jsonl"
+    if trial_data_path.exists():
+        def reset_trial_data():
+            examples.trial_data_cache = None
+            examples.example_retriever = None
+        source_text = shapes["texts"][0]
+        benchmarks += [
+            Benchmark("examples.load_trial_data[cold]", examples.load_trial_data, setup=reset_trial_data, repeat=20),
+            Benchmark("examples.get_examples[random]",
+                      lambda: client.get("/api/v1/examples/get-examples", params={"count": 10, "target_cefr": "a2"}),
+                      repeat=50),
+            Benchmark("examples.get_examples[similar]",
+                      lambda: client.get("/api/v1/examples/get-examples",
+                                         params={"count": 10, "target_cefr": "a2", "mode": "similar", "source_text": source_text}),
+                      repeat=50)
+        ]
+
+    payload = {"simplified_text": shapes["texts"][0], "original_text": shapes["texts"][-1]}
+    benchmarks.append(Benchmark("metrics.evaluate[stub models]",
+                                lambda: client.post("/api/v1/metrics/evaluate", json=payload), repeat=50))
+    return benchmarks
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def run_suite(only: Optional[str] = None, repeat_scale: float = 1.0) -> Dict:
+    shapes = sample_shapes()
+    results = {}
+    skipped = []
+    with tempfile.TemporaryDirectory(prefix="text-api-bench-") as tmp:
+        groups = [
+            ("storage", lambda: storage_benchmarks(Path(tmp), shapes)),
+            ("vocabulary", lambda: vocabulary_benchmarks(shapes)),
+            ("endpoints", lambda: endpoint_benchmarks(Path(tmp), shapes))
+        ]
+        for group, build in groups:
+            if only and only != group:
+                continue
+            for benchmark in build():
+                results[benchmark.name] = benchmark.run(repeat_scale)
+                print(f"{benchmark.name:<40} median {results[benchmark.name]['median_ms']:>10.3f} ms"
+                      f"   p95 {results[benchmark.name]['p95_ms']:>10.3f} ms")
+        if only == "endpoints" or not only:
+            if not any(name.startswith("examples.") for name in results):
+                skipped.append("examples.* (tsar2025_trialdata.jsonl not found)")
+
+    return {
+        "version": REPORT_VERSION,
+        "meta": {
+            "commit": git_commit(),
+            "created_at": datetime.now().isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "repeat_scale": repeat_scale,
+            "fixture_texts": len(shapes["texts"])
+        },
+        "skipped": skipped,
+        "results": results
+    }
+
+
+def compare(report: Dict, baseline: Dict, threshold: float = REGRESSION_THRESHOLD) -> List[Dict]:
+    """Median ratio (current / baseline) for each benchmark in both reports"""
+    rows = []
+    for name, result in report["results"].items():
+        base = baseline["results"].get(name)
+        if not base or not base["median_ms"]:
+            continue
+        ratio = result["median_ms"] / base["median_ms"]
+        rows.append({
+            "name": name,
+            "baseline_ms": base["median_ms"],
+            "current_ms": result["median_ms"],
+            "ratio": round(ratio, 3),
+            "status": "regression" if ratio > threshold else "improvement" if ratio < 1 / threshold else "same"
+        })
+    return rows
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark the text-api hot paths")
+    parser.add_argument("--output", default=str(REPORTS_DIR / "benchmark-report.json"), help="JSON report to write")
+    parser.add_argument("--compare", help="Earlier JSON report to compare against")
+    parser.add_argument("--only", choices=["storage", "vocabulary", "endpoints"], help="Run one group only")
+    parser.add_argument("--repeat-scale", type=float, default=1.0, help="Scale the iterations of every benchmark")
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.only, args.repeat_scale)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        report["comparison"] = {"baseline_commit": baseline.get("meta", {}).get("commit"),
+                                "rows": compare(report, baseline)}
+        print(f"\nCompared with {args.compare} ({report['comparison']['baseline_commit']}):")
+        for row in report["comparison"]["rows"]:
+            print(f"{row['name']:<40} {row['baseline_ms']:>10.3f} -> {row['current_ms']:>10.3f} ms"
+                  f"   x{row['ratio']:<6} {row['status']}")
+
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved: {args.output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
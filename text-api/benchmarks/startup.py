@@ -0,0 +1,129 @@
+"""
+Import-time report for the API startup
+
+Starts a fresh interpreter per deployment mode, imports app.main and serves one
+request, and reports the startup time, the slowest imports (from a second run
+under `python -X importtime`) and whether any ML module was loaded.
+
+Usage (from text-api/):
+    python -m benchmarks.startup
+    python -m benchmarks.startup --modes storage --top 30 --output startup.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+TEXT_API_ROOT = Path(__file__).parent.parent
+ML_MODULES = ["torch", "transformers", "evaluate", "numpy", "sklearn", "pandas"]
+
+# Runs in the child interpreter: import the app, then serve GET /health through ASGI
+CHILD_SCRIPT = """
+import asyncio, json, sys, time
+start = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+
+async def first_request():
+    messages = []
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+    async def send(message):
+        messages.append(message)
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+             "scheme": "http", "path": "/health", "raw_path": b"/health", "query_string": b"",
+             "root_path": "", "headers": [], "client": ("127.0.0.1", 0), "server": ("127.0.0.1", 80)}
+    await app(scope, receive, send)
+    return messages[0]["status"]
+
+status = asyncio.run(first_request())
+served = time.perf_counter()
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "first_request_ms": (served - imported) * 1000,
+    "status": status,
+    "ml_modules": [name for name in %r if name in sys.modules]
+}))
+""" % (ML_MODULES,)
+
+
+def parse_importtime(stderr: str) -> List[Dict]:
+    """Modules with their self and cumulative import time from -X importtime output"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append({
+            "module": name.strip(),
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000
+        })
+    return modules
+
+
+def run_child(mode: str, importtime: bool) -> subprocess.CompletedProcess:
+    env = {**os.environ, "TEXT_API_MODE": mode, "PYTHONPATH": str(TEXT_API_ROOT)}
+    flags = ["-X", "importtime"] if importtime else []
+    completed = subprocess.run([sys.executable, *flags, "-c", CHILD_SCRIPT], cwd=TEXT_API_ROOT,
+                               env=env, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"Startup failed in {mode} mode:\n{completed.stderr[-2000:]}")
+    return completed
+
+
+def measure(mode: str, top: int) -> Dict:
+    # Timings come from a plain run; -X importtime slows imports down, so its run only gives the breakdown
+    start = time.perf_counter()
+    completed = run_child(mode, importtime=False)
+    wall_ms = (time.perf_counter() - start) * 1000
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    modules = parse_importtime(run_child(mode, importtime=True).stderr)
+    app_modules = [m for m in modules if m["module"].startswith("app.")]
+    return {
+        "mode": mode,
+        "process_ms": round(wall_ms, 1),
+        "import_ms": round(result["import_ms"], 1),
+        "first_request_ms": round(result["first_request_ms"], 1),
+        "status": result["status"],
+        "ml_modules_loaded": result["ml_modules"],
+        "slowest_imports": [
+            {"module": m["module"], "cumulative_ms": round(m["cumulative_ms"], 1), "self_ms": round(m["self_ms"], 1)}
+            for m in sorted(modules, key=lambda m: m["cumulative_ms"], reverse=True)[:top]
+        ],
+        "app_modules": [
+            {"module": m["module"], "cumulative_ms": round(m["cumulative_ms"], 1)}
+            for m in sorted(app_modules, key=lambda m: m["cumulative_ms"], reverse=True)
+        ]
+    }
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Report the API import and startup time per deployment mode")
+    parser.add_argument("--modes", nargs="+", default=["full", "storage"], choices=["full", "storage"])
+    parser.add_argument("--top", type=int, default=15, help="Number of slowest imports to list")
+    parser.add_argument("--output", help="Also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = {"python": sys.version.split()[0], "modes": [measure(mode, args.top) for mode in args.modes]}
+    for entry in report["modes"]:
+        print(f"\n[{entry['mode']}] process {entry['process_ms']} ms, import app.main {entry['import_ms']} ms, "
+              f"first request {entry['first_request_ms']} ms (status {entry['status']})")
+        print(f"ML modules loaded at startup: {', '.join(entry['ml_modules_loaded']) or 'none'}")
+        print(f"{'module':<50} {'cumulative':>12} {'self':>10}")
+        for m in entry["slowest_imports"]:
+            print(f"{m['module']:<50} {m['cumulative_ms']:>10.1f}ms {m['self_ms']:>8.1f}ms")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved: {args.output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
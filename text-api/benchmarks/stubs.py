@@ -0,0 +1,74 @@
+import hashlib
+import time
+from typing import Dict, List
+
+CEFR_LABELS = ["A1", "A2", "B1", "B2"]
+
+
+def _unit(text: str) -> float:
+    """Deterministic pseudo-score in [0, 1) for a text"""
+    return int(hashlib.md5(text.encode("utf-8")).hexdigest()[:8], 16) / 0xFFFFFFFF
+
+
+class StubTokenizer:
+    """Whitespace tokenizer with the call signature of a Hugging Face tokenizer"""
+
+    def __call__(self, texts, add_special_tokens=True, truncation=False, max_length=None, **kwargs) -> Dict:
+        ids = []
+        for text in texts:
+            length = len(text.split()) + (2 if add_special_tokens else 0)
+            if truncation and max_length:
+                length = min(length, max_length)
+            ids.append([0] * length)
+        return {"input_ids": ids}
+
+
+class StubClassifier:
+    """Stands in for a text-classification pipeline"""
+
+    def __init__(self, seed: int, latency: float = 0.0):
+        self.seed = seed
+        self.latency = latency
+        self.tokenizer = StubTokenizer()
+
+    def _predict(self, text: str) -> Dict:
+        score = _unit(f"{self.seed}:{text}")
+        return {"label": CEFR_LABELS[int(score * len(CEFR_LABELS))], "score": score}
+
+    def __call__(self, texts, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        if isinstance(texts, str):
+            return [self._predict(texts)]
+        return [self._predict(text) for text in texts]
+
+
+class StubMeaningBERT:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+
+    def compute(self, predictions: List[str], references: List[str], **kwargs) -> Dict:
+        if self.latency:
+            time.sleep(self.latency)
+        return {"scores": [100 * _unit(p + r) for p, r in zip(predictions, references)]}
+
+
+class StubBERTScore:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+
+    def compute(self, predictions: List[str], references: List[str], **kwargs) -> Dict:
+        if self.latency:
+            time.sleep(self.latency)
+        return {"f1": [_unit(r + p) for p, r in zip(predictions, references)]}
+
+
+def install_metrics_stubs(latency: float = 0.0):
+    """
+    Replace the metrics models with stubs, so benchmarks measure the code around them
+    latency: seconds each stub model call sleeps, to simulate inference time
+    """
+    from app.api import metrics
+    metrics.cefr_models = [StubClassifier(seed, latency) for seed in range(3)]
+    metrics.meaning_bert = StubMeaningBERT(latency)
+    metrics.bertscore = StubBERTScore(latency)
@@ -0,0 +1,121 @@
+import asyncio
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api import events
+from app.models import Feedback, MetricsEvaluation, Text
+from app.utils import JSONStorage
+from app.utils.events import EventBus
+
+def _text(version: int) -> Text:
+    return Text(cefr_level="A2", text_id="t1", text_translated=f"v{version}", version=version)
+
+def _feedback() -> Feedback:
+    return Feedback(approval="PASS", grade=7, feedback="ok",
+                    metrics=MetricsEvaluation(cefr_compliance="A2", bertscore=0.9, meaningbert=0.8))
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = JSONStorage(str(tmp_path / "sessions"))
+    storage.create_session("s1", "A2")
+    return storage
+
+def _drain(subscriber):
+    return [subscriber.queue.get_nowait() for _ in range(subscriber.queue.qsize())]
+
+@pytest.mark.parametrize("session_id", ["s1", None])
+def test_watcher_finds_writes_of_other_workers(tmp_path, storage, session_id):
+    bus = EventBus()
+    watcher = bus.watch(storage, interval=60)
+    
+    async def run():
+        with bus.subscription(session_id) as subscriber:
+            storage.save_text("s1", _text(1))
+            await subscriber.prime()
+            
+            other_worker = JSONStorage(str(tmp_path / "sessions"))
+            other_worker.save_text("s1", _text(2))
+            other_worker.save_feedback("s1", _feedback())
+            
+            found = [(session, event_type, version, data.get("version")) for session, event_type, version, data in watcher.poll()]
+            assert found == [("s1", "text_update", 3, 2), ("s1", "feedback", 3, None), ("s1", "best_attempt_changed", 3, 2)]
+            assert watcher.poll() == []
+            await asyncio.sleep(0)
+            return _drain(subscriber)
+    
+    assert [event["type"] for event in asyncio.run(run())] == ["text_update", "feedback", "best_attempt_changed"]
+    watcher.poll()
+    assert watcher.stopped.is_set()
+
+def test_one_watcher_serves_every_stream(tmp_path, storage, monkeypatch):
+    storage.create_session("s2", "A2")
+    storage.save_text("s1", _text(1))
+    storage.save_text("s2", _text(1))
+    loaded = []
+    get_current_data = storage.get_current_data
+    monkeypatch.setattr(storage, "get_current_data", lambda session_id: loaded.append(session_id) or get_current_data(session_id))
+    bus = EventBus()
+    watcher = bus.watch(storage, interval=60)
+    
+    async def run():
+        with bus.subscription("s1") as first, bus.subscription("s1") as second, \
+                bus.subscription() as everything, bus.subscription() as also_everything:
+            for subscriber in (first, second, everything, also_everything):
+                await subscriber.prime()
+            assert loaded.count("s2") == 1
+            
+            other_worker = JSONStorage(str(tmp_path / "sessions"))
+            other_worker.save_text("s1", _text(2))
+            other_worker.save_text("s2", _text(2))
+            watcher.poll()
+            await asyncio.sleep(0)
+            return [sorted(event["session_id"] for event in _drain(subscriber)) for subscriber in (first, second, everything)]
+    
+    assert asyncio.run(run()) == [["s1"], ["s1"], ["s1", "s2"]]
+
+def test_event_published_and_found_on_disk_is_delivered_once(storage):
+    bus = EventBus()
+    watcher = bus.watch(storage, interval=60)
+    
+    async def run():
+        with bus.subscription("s1") as subscriber:
+            await subscriber.prime()
+            storage.save_text("s1", _text(1))
+            bus.publish("s1", "text_update", {"id": storage.get_current("s1").text.id}, 1)
+            watcher.poll()
+            await asyncio.sleep(0)
+            return _drain(subscriber)
+    
+    assert [event["type"] for event in asyncio.run(run())] == ["text_update"]
+
+def test_websocket_stays_open_after_client_messages(storage, monkeypatch):
+    monkeypatch.setattr(events, "storage", storage)
+    app = FastAPI()
+    app.include_router(events.router)
+    
+    with TestClient(app).websocket_connect("/api/v1/events/s1/ws") as websocket:
+        assert websocket.receive_json()["type"] == "snapshot"
+        websocket.send_text("hello")
+        storage.save_text("s1", _text(1))
+        assert websocket.receive_json()["type"] == "text_update"
+        websocket.send_json({"type": "ping"})
+        storage.save_feedback("s1", _feedback())
+        assert websocket.receive_json()["type"] == "feedback"
+
+def test_new_stream_does_not_get_writes_from_before_it(tmp_path, storage):
+    bus = EventBus()
+    watcher = bus.watch(storage, interval=60)
+    other_worker = JSONStorage(str(tmp_path / "sessions"))
+    
+    async def run():
+        with bus.subscription("s1") as earlier:
+            await earlier.prime()
+        other_worker.save_text("s1", _text(1))
+        with bus.subscription("s1") as later:
+            await later.prime()
+            other_worker.save_text("s1", _text(2))
+            watcher.poll()
+            await asyncio.sleep(0)
+            return [event["data"]["version"] for event in _drain(later)]
+    
+    assert asyncio.run(run()) == [2]
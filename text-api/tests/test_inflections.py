@@ -0,0 +1,39 @@
+import json
+import pytest
+from app.utils.inflections import generate_inflections
+from app.utils.vocabulary_processor import VocabularyProcessor
+
+# Function words and modals with the junk form the suffix rules used to give them
+SPURIOUS_FORMS = {
+    "we": "wed",
+    "the": "thes",
+    "and": "ands",
+    "he": "hes",
+    "can": "cans",
+    "may": "mays",
+}
+
+@pytest.mark.parametrize("lemma,form", sorted(SPURIOUS_FORMS.items()))
+def test_closed_class_words_are_not_inflected(lemma, form):
+    assert form not in generate_inflections(lemma)
+
+def test_open_class_words_are_still_inflected():
+    assert {"animals"} <= set(generate_inflections("animal"))
+    assert {"walked", "walking", "walks"} <= set(generate_inflections("walk"))
+
+def test_only_adjectives_get_comparatives():
+    assert {"taller", "tallest"} <= generate_inflections("tall")
+    assert {"bigger", "happiest", "nicer"} <= generate_inflections("big") | generate_inflections("happy") | generate_inflections("nice")
+    assert "rubber" not in generate_inflections("rub")
+    assert "printer" not in generate_inflections("print")
+    assert "walkest" not in generate_inflections("walk")
+
+def test_spurious_forms_are_not_indexed(tmp_path):
+    vocab_path = tmp_path / "vocabulary.json"
+    vocab_path.write_text(json.dumps({"A1": sorted(SPURIOUS_FORMS) + ["animal"], "A2": [], "B1": [], "B2": [], "C1": []}))
+    processor = VocabularyProcessor(str(vocab_path))
+    
+    for form in SPURIOUS_FORMS.values():
+        assert form not in processor.word_index
+    assert [tag["word"] for tag in processor.tag_text("wed thes ands hes cans mays")] == []
+    assert processor.word_index["animals"][0] == "animal"
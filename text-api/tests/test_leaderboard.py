@@ -0,0 +1,50 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api import sessions
+from app.models import Feedback, MetricsEvaluation, Text
+from app.utils import JSONStorage
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    storage = JSONStorage(str(tmp_path / "sessions"))
+    monkeypatch.setattr(sessions, "storage", storage)
+    return storage
+
+@pytest.fixture
+def client(storage):
+    app = FastAPI()
+    app.include_router(sessions.router)
+    return TestClient(app)
+
+def test_unknown_session_is_404_and_not_created(client, storage):
+    response = client.get("/api/v1/sessions/missing/leaderboard")
+    
+    assert response.status_code == 404
+    assert not (storage.base_path / "missing").exists()
+
+def test_entries_are_ranked_without_internal_fields(client, storage):
+    storage.create_session("s1", "A2")
+    for version, (level, meaningbert) in enumerate([("A2", 0.6), ("B1", 0.9), ("A2", 0.8)], 1):
+        storage.save_text("s1", Text(cefr_level="A2", text_id="t1", text_translated=f"v{version}", version=version))
+        storage.save_feedback("s1", Feedback(approval="PASS", grade=5, feedback="ok",
+                                             metrics=MetricsEvaluation(cefr_compliance=level, bertscore=0.5, meaningbert=meaningbert)))
+    
+    response = client.get("/api/v1/sessions/s1/leaderboard", params={"k": 3})
+    
+    assert response.status_code == 200
+    attempts = response.json()["attempts"]
+    assert [(a["rank"], a["version"]) for a in attempts] == [(1, 3), (2, 1), (3, 2)]
+    assert all("seq" not in a for a in attempts)
+
+def test_rescored_history_without_current_state_changes_etag(client, storage):
+    storage.create_session("s1", "A2")
+    etag = client.get("/api/v1/sessions/s1/leaderboard").headers["ETag"]
+    
+    with storage.session_lock("s1"):
+        storage.replace_scored_history("s1", storage.get_history("s1"), None, "A2")
+    
+    response = client.get("/api/v1/sessions/s1/leaderboard", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert storage.get_current("s1") is None
@@ -0,0 +1,44 @@
+import json
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api import prompts
+from app.models import Feedback, MetricsEvaluation, Text
+from app.utils import JSONStorage
+
+ORIGINAL = "The municipal government approved an ambitious proposal."
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    storage = JSONStorage(str(tmp_path / "sessions"))
+    monkeypatch.setattr(prompts, "storage", storage)
+    app = FastAPI()
+    app.include_router(prompts.router)
+    
+    storage.create_session("s1", "A2")
+    storage.save_text("s1", Text(cefr_level="A2", text_id="t1", text_translated="The city accepted a big plan.", version=1))
+    storage.save_feedback("s1", Feedback(approval="PASS", grade=4, feedback="Good.",
+                                         metrics=MetricsEvaluation(cefr_compliance="A2", bertscore=0.9, meaningbert=0.8)))
+    storage.save_text("s1", Text(cefr_level="A2", text_id="t1", text_translated="The municipal government said yes.", version=2))
+    return TestClient(app)
+
+def _render(client, template):
+    response = client.post("/api/v1/prompts/render", json={
+        "session_id": "s1", "template": template, "original_text": ORIGINAL, "example_count": 0
+    })
+    assert response.status_code == 200
+    return response.json()
+
+@pytest.mark.parametrize("template", ["a2_rewriter", "b1_rewriter"])
+def test_rewriter_renders_best_attempt_and_vocabulary_profile(client, template):
+    data = _render(client, template)
+    
+    assert "```\nThe city accepted a big plan.\n```" in data["query_prompt"]
+    assert "best_attempt" not in data["empty_placeholders"]
+    assert "vocabulary_profile" not in data["empty_placeholders"]
+    
+    profile_json = data["query_prompt"].split("Vocabulary Profile of the Failed Attempt:\n", 1)[1].strip()
+    profile = json.loads(profile_json)
+    assert profile["target"] == "A2"
+    assert profile["total_tokens"] == 5
+    assert "{{" not in data["prompt"]
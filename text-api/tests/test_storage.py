@@ -0,0 +1,32 @@
+import json
+from app.models import Text
+from app.utils import JSONStorage, storage as storage_module
+
+def test_appending_to_a_legacy_history_normalizes_it(tmp_path):
+    storage = JSONStorage(str(tmp_path))
+    storage.create_session("s1", "A2")
+    (tmp_path / "s1" / "history.json").write_text(json.dumps({
+        "session_id": "s1",
+        "created_at": "2025-01-01 10:00:00",
+        "messages": [{"role": "user", "content": "hi", "timestamp": "2025-01-01 10:00:01", "metadata": None}]
+    }))
+    
+    storage.save_text("s1", Text(cefr_level="A2", text_id="t1", text_translated="v1", version=1))
+    
+    data = storage.get_history_data("s1")
+    assert data["created_at"] == "2025-01-01T10:00:00"
+    assert [m["role"] for m in data["messages"]] == ["user", "user", "assistant"]
+    assert storage.get_history("s1").model_dump(mode="json") == data
+
+def test_appending_does_not_mutate_cached_history(tmp_path, monkeypatch):
+    # Cache files right away, so the data read before the write is the cached one
+    monkeypatch.setattr(storage_module, "RACY_WINDOW_NS", 0)
+    storage = JSONStorage(str(tmp_path))
+    storage.create_session("s1", "A2")
+    before = storage.get_history_data("s1")
+    assert storage.get_history_data("s1") is before
+    
+    storage.save_text("s1", Text(cefr_level="A2", text_id="t1", text_translated="v1", version=1))
+    
+    assert before["messages"] == []
+    assert len(storage.get_history_data("s1")["messages"]) == 2
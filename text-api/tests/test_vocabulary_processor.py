@@ -0,0 +1,31 @@
+import json
+import pickle
+from app.utils.vocabulary_processor import VocabularyProcessor
+
+def _processor(tmp_path) -> VocabularyProcessor:
+    vocab_path = tmp_path / "vocabulary.json"
+    vocab_path.write_text(json.dumps({"A1": ["animal", "city center"], "A2": ["government", "movement"], "B1": [], "B2": [], "C1": []}))
+    return VocabularyProcessor(str(vocab_path))
+
+def test_fuzzy_index_is_not_stored_in_artifact(tmp_path):
+    processor = _processor(tmp_path)
+    
+    with open(processor.artifact_path, 'rb') as f:
+        assert "fuzzy_index" not in pickle.load(f)
+    assert [s["word"] for s in processor.suggest("goverment", max_distance=2)] == ["government", "movement"]
+
+def test_fuzzy_index_is_rebuilt_after_reload(tmp_path):
+    processor = _processor(tmp_path)
+    assert processor.suggest("animel")[0]["word"] == "animal"
+    
+    processor.vocab_path.write_text(json.dumps({"A1": ["camel"], "A2": [], "B1": [], "B2": [], "C1": []}))
+    assert processor.reload()["changed"]
+    assert [s["word"] for s in processor.suggest("animel")] == []
+    assert processor.suggest("cammel")[0]["word"] == "camel"
+
+def test_suggest_rejects_words_longer_than_any_form(tmp_path):
+    processor = _processor(tmp_path)
+    
+    assert processor.fuzzy_index.longest == len("government")
+    assert processor.suggest("x" * 400, max_distance=2) == []
+    assert processor.suggest("governmentt", max_distance=1)[0]["word"] == "government"
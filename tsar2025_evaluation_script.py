@@ -1,182 +1,670 @@
-import os, json, random
-import numpy as np
-import pandas as pd
-from sklearn.metrics import f1_score, root_mean_squared_error
-from transformers import pipeline # IMPORTANT: Please ensure your transformers version is v4.55
-import evaluate
-
-# ---------------- Config ----------------
-GOLD_FILE = "tsar2025_test.jsonl"   # gold file next to this script
-SUBMISSIONS_DIR = "submissions"     # folder with submission files
-SEED = 42                           # for reproducibility
-BATCH_SIZE = 32                     # adjust for your GPU
-
-# ---------------- Seed ------------------
-random.seed(SEED)
-np.random.seed(SEED)
-try:
-    import torch
-    torch.manual_seed(SEED)
-    torch.cuda.manual_seed_all(SEED)
-    torch.backends.cudnn.deterministic = True
-    torch.backends.cudnn.benchmark = False
-except Exception:
-    pass
-
-# ---------------- IO --------------------
-def read_jsonl(path: str):
-    with open(path, "r", encoding="utf-8") as f:
-        return [json.loads(line) for line in f]
-
-def read_gold(path: str):
-    data = read_jsonl(path)
-    if not data:
-        raise ValueError(f"Gold file is empty: {path}")
-    try:
-        original = [e["original"] for e in data]
-        reference = [e["reference"] for e in data]
-        target   = [e["target_cefr"] for e in data]   # case handled later
-        text_ids = [e["text_id"] for e in data]
-    except KeyError as ke:
-        raise KeyError(f"Gold file missing key {ke}. First item keys: {list(data[0].keys())}")
-    return original, reference, target, text_ids
-
-def read_submission(path: str):
-    data = read_jsonl(path)
-    if not data:
-        raise ValueError(f"Submission is empty: {path}")
-    first_keys = list(data[0].keys())
-    if "simplified" not in data[0]:
-        raise KeyError(f"{path} must contain 'simplified'. Found keys: {first_keys}")
-    if "text_id" not in data[0]:
-        raise KeyError(f"{path} must contain 'text_id'. Found keys: {first_keys}")
-    return [e["simplified"] for e in data], [e["text_id"] for e in data], len(data)
-
-# Align system outputs to ANY overlapping gold ids (supports partial submissions)
-def align_intersection(hyps, sys_ids, gold_ids, gold_orig, gold_ref, gold_tgt):
-    gid2idx = {g:i for i,g in enumerate(gold_ids)}
-    pairs = [(gid2idx[sid], hyp) for hyp, sid in zip(hyps, sys_ids) if sid in gid2idx]
-    if not pairs:
-        return None
-    pairs.sort(key=lambda x: x[0])
-    sel_idx = [i for i,_ in pairs]
-    aligned_hyps = [h for _,h in pairs]
-    aligned_orig = [gold_orig[i] for i in sel_idx]
-    aligned_ref  = [gold_ref[i]  for i in sel_idx]
-    aligned_tgt  = [gold_tgt[i]  for i in sel_idx]
-    coverage_n   = len(sel_idx)
-    coverage_pct = round(100.0 * coverage_n / len(gold_ids), 2)
-    missing_ids  = [g for g in gold_ids if g not in set(sys_ids)]
-    extra_ids    = [s for s in sys_ids if s not in set(gold_ids)]
-    return {
-        "hyps": aligned_hyps,
-        "orig": aligned_orig,
-        "ref":  aligned_ref,
-        "tgt":  aligned_tgt,
-        "coverage_n": coverage_n,
-        "coverage_pct": coverage_pct,
-        "missing_ids": missing_ids,
-        "extra_ids": extra_ids
-    }
-
-# ------------- Models/Metrics -----------
-cefr_labeler1 = pipeline("text-classification",
-    model="AbdullahBarayan/ModernBERT-base-doc_en-Cefr", device=0, torch_dtype="auto")
-cefr_labeler2 = pipeline("text-classification",
-    model="AbdullahBarayan/ModernBERT-base-doc_sent_en-Cefr", device=0, torch_dtype="auto")
-cefr_labeler3 = pipeline("text-classification",
-    model="AbdullahBarayan/ModernBERT-base-reference_AllLang2-Cefr2", device=0, torch_dtype="auto")
-
-meaning_bert = evaluate.load("davebulaval/meaningbert")
-bertscore    = evaluate.load("bertscore")
-
-CEFR = ["A1","A2","B1","B2","C1","C2"]
-L2I  = {l:i for i,l in enumerate(CEFR)}
-
-def cefr_labels(hyps, models, batch_size=BATCH_SIZE):
-    p1 = models[0](hyps, batch_size=batch_size, truncation=True)
-    p2 = models[1](hyps, batch_size=batch_size, truncation=True)
-    p3 = models[2](hyps, batch_size=batch_size, truncation=True)
-    def top1(x):
-        if isinstance(x, dict): return x
-        if isinstance(x, list) and x: return max(x, key=lambda d: d["score"])
-    outs = []
-    for d1, d2, d3 in zip(p1, p2, p3):
-        best = max((top1(d1), top1(d2), top1(d3)), key=lambda d: d["score"])
-        outs.append(best["label"].strip().upper())
-    return outs
-
-def score_cefr(hyps, ref_lvls, models):
-    gold  = [str(l).strip().upper() for l in ref_lvls]
-    preds = [str(l).strip().upper() for l in cefr_labels(hyps, models, batch_size=BATCH_SIZE)]
-    f1 = f1_score(gold, preds, average="weighted")
-    t  = np.array([L2I[l] for l in gold])
-    p  = np.array([L2I[l] for l in preds])
-    adj  = (np.abs(t - p) <= 1).mean()
-    rmse = root_mean_squared_error(t, p)
-    return {"weighted_f1": round(float(f1),4),
-            "adj_accuracy": round(float(adj),4),
-            "rmse": round(float(rmse),4)}
-
-def score_meaningbert(hyps, refs):
-    res = meaning_bert.compute(predictions=hyps, references=refs)
-    return round(float(np.mean(res["scores"])) / 100.0, 4)
-
-def score_bertscore(hyps, refs, scoretype="f1"):
-    res = bertscore.compute(references=refs, predictions=hyps, lang="en")
-    return round(float(np.mean(res[scoretype])), 4)
-
-# ------------- Main ---------------------
-if not os.path.isfile(GOLD_FILE):
-    raise FileNotFoundError(f"Gold file not found: {GOLD_FILE}")
-gold_orig, gold_ref, gold_tgt, gold_ids = read_gold(GOLD_FILE)
-
-if not os.path.isdir(SUBMISSIONS_DIR):
-    raise FileNotFoundError(f"Submissions folder not found: {SUBMISSIONS_DIR}")
-
-# Get all .jsonl files directly from submissions folder
-run_files = sorted([f for f in os.listdir(SUBMISSIONS_DIR) if f.endswith(".jsonl")])
-
-if not run_files:
-    print(f"[warn] No .jsonl files found in {SUBMISSIONS_DIR}")
-
-results = []
-for run in run_files:
-    run_path = os.path.join(SUBMISSIONS_DIR, run)
-    print(f"Evaluating {run} ...")
-    hyps, sys_ids, num_instances = read_submission(run_path)
-
-    aligned = align_intersection(hyps, sys_ids, gold_ids, gold_orig, gold_ref, gold_tgt)
-    if aligned is None:
-        print(f"[{run}] no overlap with gold; skipping.")
-        row = {"modelname": run,
-               "num_instances": num_instances,
-               "coverage_n": 0, "coverage_pct": 0.0,
-               "weighted_f1": "n/a", "adj_accuracy": "n/a", "rmse": "n/a",
-               "meaningbert-orig": "n/a", "bertscore-orig": "n/a",
-               "meaningbert-ref": "n/a", "bertscore-ref": "n/a"}
-    else:
-        if aligned["missing_ids"]:
-            print(f"[{run}] missing {len(aligned['missing_ids'])} ids.")
-        if aligned["extra_ids"]:
-            print(f"[{run}] extra {len(aligned['extra_ids'])} ids (ignored).")
-        hyps_i, orig_i, ref_i, tgt_i = aligned["hyps"], aligned["orig"], aligned["ref"], aligned["tgt"]
-        cefr = score_cefr(hyps_i, tgt_i, [cefr_labeler1, cefr_labeler2, cefr_labeler3])
-        mb_o = score_meaningbert(hyps_i, orig_i)
-        bs_o = score_bertscore(hyps_i, orig_i, "f1")
-        mb_r = score_meaningbert(hyps_i, ref_i)
-        bs_r = score_bertscore(hyps_i, ref_i, "f1")
-        row = {"modelname": run,
-               "num_instances": num_instances,
-               "coverage_n": aligned["coverage_n"],
-               "coverage_pct": aligned["coverage_pct"],
-               "weighted_f1": cefr["weighted_f1"], "adj_accuracy": cefr["adj_accuracy"], "rmse": cefr["rmse"],
-               "meaningbert-orig": mb_o, "bertscore-orig": bs_o,
-               "meaningbert-ref": mb_r, "bertscore-ref": bs_r}
-    results.append(row)
-
-df = pd.DataFrame(results)
-print("\n=== Results ===")
-print(df.to_string(index=False))
-df.to_excel("results.xlsx", index=False)
-print("\nSaved: results.xlsx")
+import os, sys, csv, json, random, argparse, hashlib, sqlite3, time, importlib.util
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from sklearn.metrics import f1_score, root_mean_squared_error
+
+# ---------------- Config ----------------
+GOLD_FILE = "tsar2025_test.jsonl"   # gold file next to this script
+SUBMISSIONS_DIR = "submissions"     # folder with submission files
+SEED = 42                           # for reproducibility
+BATCH_SIZE = 32                     # adjust for your GPU
+CPU_BATCH_SIZE = 8                  # default batch size in --cpu mode
+TOKEN_BUDGET = 16384                # padded tokens per length bucket (GPU)
+CPU_TOKEN_BUDGET = 4096             # padded tokens per length bucket in --cpu mode
+SHARDS_PER_WORKER = 4               # smaller shards balance the load across CPU workers
+CHUNK_SIZE = 4096                   # items scored at a time; bounds memory on large submissions
+CACHE_FILE = ".eval_cache.sqlite"   # per-item score cache, see ItemCache
+ITEMS_DIR = "items"                 # per-item tables, one CSV per run (see tsar2025_significance.py)
+
+# ---------------- Batching --------------
+def _load_batching():
+    # Length-bucketed batching is shared with the API (text-api/app/utils/batching.py).
+    # It is loaded by path so that the API package and its dependencies are not imported.
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "text-api", "app", "utils", "batching.py")
+    spec = importlib.util.spec_from_file_location("tsar2025_batching", path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module    # so PaddingReport pickles to and from CPU workers
+    spec.loader.exec_module(module)
+    return module
+
+batching = _load_batching()
+
+# ---------------- Seed ------------------
+def set_seed(seed=SEED):
+    random.seed(seed)
+    np.random.seed(seed)
+    try:
+        import torch
+        torch.manual_seed(seed)
+        torch.cuda.manual_seed_all(seed)
+        torch.backends.cudnn.deterministic = True
+        torch.backends.cudnn.benchmark = False
+    except Exception:
+        pass
+
+# ---------------- IO --------------------
+def iter_jsonl(path: str):
+    """Yield records one line at a time (blank lines are skipped)."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def read_gold(path: str):
+    original, reference, target, text_ids = [], [], [], []
+    for e in iter_jsonl(path):
+        try:
+            original.append(e["original"])
+            reference.append(e["reference"])
+            target.append(e["target_cefr"])    # case handled later
+            text_ids.append(e["text_id"])
+        except KeyError as ke:
+            raise KeyError(f"Gold file missing key {ke}. First item keys: {list(e.keys())}")
+    if not text_ids:
+        raise ValueError(f"Gold file is empty: {path}")
+    return original, reference, target, text_ids
+
+def iter_submission(path: str):
+    """Yield (text_id, simplified) pairs, checking the keys on the first record."""
+    empty = True
+    for e in iter_jsonl(path):
+        if empty:
+            first_keys = list(e.keys())
+            if "simplified" not in e:
+                raise KeyError(f"{path} must contain 'simplified'. Found keys: {first_keys}")
+            if "text_id" not in e:
+                raise KeyError(f"{path} must contain 'text_id'. Found keys: {first_keys}")
+            empty = False
+        yield e["text_id"], e["simplified"]
+    if empty:
+        raise ValueError(f"Submission is empty: {path}")
+
+RESULT_COLUMNS = ["modelname", "num_instances", "coverage_n", "coverage_pct",
+                  "weighted_f1", "adj_accuracy", "rmse",
+                  "meaningbert-orig", "bertscore-orig", "meaningbert-ref", "bertscore-ref"]
+
+class ResultsWriter:
+    """
+    Writes one results row per run as soon as the run is scored.
+    The CSV is flushed after every row, so it shows progress on long evaluations;
+    the XLSX is streamed with openpyxl's write-only mode and completed on close().
+    """
+
+    def __init__(self, xlsx_path=None, csv_path=None):
+        self.xlsx_path = xlsx_path
+        self.workbook = self.sheet = None
+        self.csv_file = self.csv = None
+        if xlsx_path:
+            from openpyxl import Workbook
+            self.workbook = Workbook(write_only=True)
+            self.sheet = self.workbook.create_sheet("Sheet1")
+            self.sheet.append(RESULT_COLUMNS)
+        if csv_path:
+            self.csv_file = open(csv_path, "w", encoding="utf-8", newline="")
+            self.csv = csv.writer(self.csv_file)
+            self.csv.writerow(RESULT_COLUMNS)
+            self.csv_file.flush()
+
+    def write(self, row):
+        values = [row[c] for c in RESULT_COLUMNS]
+        if self.sheet is not None:
+            self.sheet.append(values)
+        if self.csv is not None:
+            self.csv.writerow(values)
+            self.csv_file.flush()
+
+    def close(self):
+        if self.workbook is not None:
+            self.workbook.save(self.xlsx_path)
+        if self.csv_file is not None:
+            self.csv_file.close()
+
+ITEM_COLUMNS = ["text_id", "target_cefr", "predicted_cefr",
+                "meaningbert-orig", "bertscore-orig", "meaningbert-ref", "bertscore-ref"]
+
+def write_item_table(path, rows):
+    """Per-item metric table of one run; MeaningBERT on the same 0-1 scale as the results."""
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(ITEM_COLUMNS)
+        writer.writerows(rows)
+
+# ------------- Models/Metrics -----------
+CEFR = ["A1","A2","B1","B2","C1","C2"]
+L2I  = {l:i for i,l in enumerate(CEFR)}
+
+METRICS = ["meaningbert-orig", "bertscore-orig", "meaningbert-ref", "bertscore-ref"]
+CEFR_MODEL_NAMES = ["AbdullahBarayan/ModernBERT-base-doc_en-Cefr",
+                    "AbdullahBarayan/ModernBERT-base-doc_sent_en-Cefr",
+                    "AbdullahBarayan/ModernBERT-base-reference_AllLang2-Cefr2"]
+MEANINGBERT_NAME = "davebulaval/meaningbert"
+BERTSCORE_NAME   = "bertscore"
+
+def load_models(device=0):
+    # device: GPU index, or -1 for CPU
+    from transformers import pipeline # IMPORTANT: Please ensure your transformers version is v4.55
+    import evaluate
+    cefr_models = [pipeline("text-classification", model=name, device=device, torch_dtype="auto")
+                   for name in CEFR_MODEL_NAMES]
+    meaning_bert = evaluate.load(MEANINGBERT_NAME)
+    bertscore    = evaluate.load(BERTSCORE_NAME)
+    return {"cefr": cefr_models, "meaningbert": meaning_bert, "bertscore": bertscore}
+
+def model_signature():
+    """Identifies the models and library versions behind cached scores."""
+    import transformers
+    import evaluate
+    return json.dumps({"cefr": CEFR_MODEL_NAMES,
+                       "meaningbert": MEANINGBERT_NAME,
+                       "bertscore": BERTSCORE_NAME,
+                       "transformers": getattr(transformers, "__version__", None),
+                       "evaluate": getattr(evaluate, "__version__", None)}, sort_keys=True)
+
+def cefr_labels(hyps, models, batch_size=BATCH_SIZE, token_budget=TOKEN_BUDGET, lengths=None, report=None):
+    # Each classifier runs on length buckets; lengths can be passed in when already tokenized
+    if lengths is None:
+        lengths = batching.token_lengths(models[0].tokenizer, hyps)
+    def classify(model):
+        return batching.run_bucketed(hyps, lengths, lambda b: model(b, batch_size=len(b), truncation=True),
+                                     token_budget, report=report, fixed_batch_size=batch_size)
+    p1 = classify(models[0])
+    p2 = classify(models[1])
+    p3 = classify(models[2])
+    def top1(x):
+        if isinstance(x, dict): return x
+        if isinstance(x, list) and x: return max(x, key=lambda d: d["score"])
+    outs = []
+    for d1, d2, d3 in zip(p1, p2, p3):
+        best = max((top1(d1), top1(d2), top1(d3)), key=lambda d: d["score"])
+        outs.append(best["label"].strip().upper())
+    return outs
+
+def score_cefr(preds, ref_lvls):
+    gold  = [str(l).strip().upper() for l in ref_lvls]
+    preds = [str(l).strip().upper() for l in preds]
+    f1 = f1_score(gold, preds, average="weighted")
+    t  = np.array([L2I[l] for l in gold])
+    p  = np.array([L2I[l] for l in preds])
+    adj  = (np.abs(t - p) <= 1).mean()
+    rmse = root_mean_squared_error(t, p)
+    return {"weighted_f1": round(float(f1),4),
+            "adj_accuracy": round(float(adj),4),
+            "rmse": round(float(rmse),4)}
+
+# MeaningBERT items stay on the model's 0-100 scale; averages are divided by 100
+def meaningbert_items(meaning_bert, hyps, refs, **kwargs):
+    res = meaning_bert.compute(predictions=hyps, references=refs, **kwargs)
+    return [float(s) for s in res["scores"]]
+
+def bertscore_items(bertscore, hyps, refs, scoretype="f1", **kwargs):
+    res = bertscore.compute(references=refs, predictions=hyps, lang="en", **kwargs)
+    return [float(s) for s in res[scoretype]]
+
+def score_item_batch(models, hyps, origs, refs, batch_size=BATCH_SIZE, token_budget=TOKEN_BUDGET, report=None):
+    """
+    Score items given as parallel lists of hypothesis, gold original and gold reference.
+    CEFR labels are predicted once per distinct hypothesis; MeaningBERT and BERTScore
+    cover the items against originals and against references in one bucketed pass each.
+    Every model runs on length buckets under token_budget (see text-api/app/utils/batching.py);
+    lengths come from the first CEFR classifier's tokenizer.
+    """
+    n = len(hyps)
+    distinct = list(dict.fromkeys(hyps))
+    both_hyps = hyps + hyps
+    both_gold = origs + refs
+
+    tokenizer = models["cefr"][0].tokenizer
+    hyp_len = dict(zip(distinct, batching.token_lengths(tokenizer, distinct)))
+    gold_text = list(dict.fromkeys(both_gold))
+    gold_len = dict(zip(gold_text, batching.token_lengths(tokenizer, gold_text)))
+    pairs = list(zip(both_hyps, both_gold))
+
+    labels = dict(zip(distinct, cefr_labels(distinct, models["cefr"], batch_size, token_budget,
+                                            [hyp_len[h] for h in distinct], report)))
+    # MeaningBERT encodes hypothesis and gold text as one sequence; BERTScore pads each side on its own
+    mb = batching.run_bucketed(
+        pairs, [hyp_len[h] + gold_len[g] for h, g in pairs],
+        lambda b: meaningbert_items(models["meaningbert"], [h for h, _ in b], [g for _, g in b]),
+        token_budget, report=report, fixed_batch_size=batch_size)
+    bs = batching.run_bucketed(
+        pairs, [max(hyp_len[h], gold_len[g]) for h, g in pairs],
+        lambda b: bertscore_items(models["bertscore"], [h for h, _ in b], [g for _, g in b], "f1",
+                                  batch_size=len(b)),
+        token_budget, report=report, fixed_batch_size=batch_size)
+    return [{"cefr": labels[h],
+             "meaningbert-orig": mb[k], "bertscore-orig": bs[k],
+             "meaningbert-ref": mb[n + k], "bertscore-ref": bs[n + k]}
+            for k, h in enumerate(hyps)]
+
+# ------------- CPU sharding -------------
+# Each pool worker loads the models once (in the initializer) and then scores shards
+_worker_models = None
+_worker_batch_size = CPU_BATCH_SIZE
+_worker_token_budget = CPU_TOKEN_BUDGET
+
+def _init_worker(threads, batch_size, token_budget):
+    global _worker_models, _worker_batch_size, _worker_token_budget
+    # Cap intra-op threads so that workers x threads does not exceed the core count
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    os.environ["TOKENIZERS_PARALLELISM"] = "false"
+    try:
+        import torch
+        torch.set_num_threads(threads)
+        torch.set_num_interop_threads(1)
+    except Exception:
+        pass
+    _worker_batch_size = batch_size
+    _worker_token_budget = token_budget
+    _worker_models = load_models(device=-1)
+
+def _score_shard(shard):
+    hyps, origs, refs = shard
+    start = time.perf_counter()
+    report = batching.PaddingReport()
+    scores = score_item_batch(_worker_models, hyps, origs, refs, _worker_batch_size, _worker_token_budget, report)
+    return scores, time.perf_counter() - start, report
+
+class ShardedScorer:
+    """
+    Scores items on a CPU process pool that lives for the whole evaluation,
+    so workers load the models once however many chunks are scored. Each chunk
+    is split into contiguous shards and the results come back in input order.
+    With baseline, the chunks are kept and scored again in this process on close,
+    to measure the speedup over single-process scoring.
+    """
+
+    def __init__(self, workers, batch_size=CPU_BATCH_SIZE, token_budget=CPU_TOKEN_BUDGET, report=None,
+                 baseline=False):
+        self.workers = max(1, workers)
+        self.threads = max(1, (os.cpu_count() or 1) // self.workers)
+        self.batch_size = batch_size
+        self.token_budget = token_budget
+        self.report = report    # PaddingReport the workers' padding counts are merged into
+        self.pool = None
+        self.items = 0
+        self.wall = 0.0    # time spent in score(), pool start-up and model loading included
+        self.busy = 0.0    # summed per-shard scoring time
+        self.chunks = [] if baseline else None    # scored chunks, timed again in one process on close
+
+    def score(self, hyps, origs, refs):
+        start = time.perf_counter()
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                            initargs=(self.threads, self.batch_size, self.token_budget))
+        size = max(1, -(-len(hyps) // (self.workers * SHARDS_PER_WORKER)))
+        shards = [(hyps[i:i + size], origs[i:i + size], refs[i:i + size]) for i in range(0, len(hyps), size)]
+        scores = []
+        for shard_scores, seconds, report in self.pool.map(_score_shard, shards):
+            scores.extend(shard_scores)
+            self.busy += seconds
+            if self.report is not None:
+                self.report.merge(report)
+        self.items += len(hyps)
+        self.wall += time.perf_counter() - start
+        if self.chunks is not None:
+            self.chunks.append((hyps, origs, refs))
+        return scores
+
+    def single_process_wall(self):
+        """
+        Score the same chunks in this process with every core, as an unsharded run
+        would, model loading included like self.wall.
+        """
+        start = time.perf_counter()
+        _init_worker(os.cpu_count() or 1, self.batch_size, self.token_budget)
+        for hyps, origs, refs in self.chunks:
+            score_item_batch(_worker_models, hyps, origs, refs, self.batch_size, self.token_budget)
+        return time.perf_counter() - start
+
+    def close(self):
+        """
+        Shut the pool down and report how busy the workers were. busy/wall is the
+        average number of shards in flight; with baseline, the speedup is the wall
+        time of single-process scoring over the wall time of sharded scoring.
+        """
+        if self.pool is None:
+            return
+        self.pool.shutdown()
+        self.pool = None
+        busy_per_wall = self.busy / self.wall if self.wall else 0.0
+        print(f"CPU sharding: {self.items} items on {self.workers} workers x {self.threads} threads; "
+              f"shards busy {self.busy:.1f}s over wall {self.wall:.1f}s -> busy/wall {busy_per_wall:.2f}, "
+              f"parallel efficiency {busy_per_wall / self.workers:.0%} (wall includes model loading)")
+        if self.chunks is not None:
+            single = self.single_process_wall()
+            print(f"Single process: the same {self.items} items with {os.cpu_count() or 1} threads in {single:.1f}s "
+                  f"-> speedup {single / self.wall:.2f}x over sharded scoring (both include model loading)")
+
+# ------------- Cache --------------------
+def sha256(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+class ItemCache:
+    """
+    Cache of per-item scores (SQLite), on disk or in memory (path ":memory:").
+
+    An item is keyed by its text_id, the hashes of the hypothesis and of the
+    gold original/reference, and the model signature, so an edited output,
+    an edited gold item or a model/library upgrade simply misses the cache.
+    """
+
+    def __init__(self, path, signature, rebuild=False):
+        self.path = path
+        self.signature = signature
+        self.conn = sqlite3.connect(path)
+        if rebuild:
+            self.conn.execute("DROP TABLE IF EXISTS items")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS items (key TEXT PRIMARY KEY, scores TEXT NOT NULL)")
+        self.conn.commit()
+
+    def item_key(self, text_id, hyp, orig, ref):
+        return sha256(json.dumps([text_id, sha256(hyp), sha256(orig), sha256(ref), self.signature]))
+
+    def get_many(self, keys):
+        found = {}
+        keys = list(keys)
+        for start in range(0, len(keys), 500):   # stay under SQLite's bound-parameter limit
+            chunk = keys[start:start + 500]
+            rows = self.conn.execute(
+                f"SELECT key, scores FROM items WHERE key IN ({','.join('?' * len(chunk))})", chunk)
+            found.update((k, json.loads(v)) for k, v in rows)
+        return found
+
+    def put_many(self, entries):
+        self.conn.executemany("INSERT OR REPLACE INTO items (key, scores) VALUES (?, ?)",
+                              [(k, json.dumps(v)) for k, v in entries.items()])
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+# ------------- Engine -------------------
+class RunScores:
+    """Per-item results of one run, kept as compact arrays rather than texts."""
+
+    def __init__(self, name):
+        self.name  = name
+        self.idx   = array("q")    # gold index of each item
+        self.preds = []            # predicted CEFR label of each item
+        self.metrics = {metric: array("d") for metric in METRICS}
+        self.num_instances = 0     # records read, aligned or not
+        self.extra   = 0           # records whose text_id is not in the gold data
+        self.seen    = set()       # gold indexes covered by the run
+        self.pending = 0           # items queued in the engine but not scored yet
+        self.scored  = 0           # items the models scored; the others came from the cache
+
+    def __len__(self):
+        return len(self.idx)
+
+    def add(self, idx, scores):
+        self.idx.append(idx)
+        self.preds.append(scores["cefr"])
+        for metric in METRICS:
+            self.metrics[metric].append(scores[metric])
+
+class EvaluationEngine:
+    """
+    Scores submissions against the gold data with shared, bounded model work.
+
+    Submissions are streamed and aligned to the gold data through a text_id
+    hash map. Aligned items of all runs are queued together and scored
+    chunk_size at a time, so small runs share batches and memory stays
+    bounded by the chunk size plus a few numbers per item:
+    - CEFR labels are predicted once per distinct hypothesis in a chunk.
+    - MeaningBERT and BERTScore run once per chunk and metric, covering both
+      the gold originals and the gold references.
+    - Every scored item goes to the ItemCache (in memory when no cache file
+      is used), so items repeated within or across runs are scored once.
+    """
+
+    def __init__(self, gold_orig, gold_ref, gold_tgt, gold_ids, models=None, cache=None,
+                 device=0, workers=1, batch_size=BATCH_SIZE, token_budget=TOKEN_BUDGET,
+                 chunk_size=CHUNK_SIZE, items_dir=None, baseline=False):
+        self.gold_orig = gold_orig
+        self.gold_ref  = gold_ref
+        self.gold_tgt  = gold_tgt
+        self.gold_ids  = gold_ids
+        self.gid2idx   = {g: i for i, g in enumerate(gold_ids)}
+        self._models   = models
+        self.cache     = cache if cache is not None else ItemCache(":memory:", "")
+        self.device    = device      # GPU index, or -1 for CPU
+        self.batch_size = batch_size
+        self.token_budget = token_budget
+        self.padding   = batching.PaddingReport()
+        self.chunk_size = chunk_size
+        self.items_dir = items_dir   # per-item tables are written here when set
+        if items_dir:
+            os.makedirs(items_dir, exist_ok=True)
+        # workers > 1 shards CPU scoring over a process pool; baseline also times it unsharded
+        self.sharded   = (ShardedScorer(workers, batch_size, token_budget, self.padding, baseline)
+                          if workers > 1 and models is None else None)
+        self.pending   = []          # (run, hypothesis, gold idx) items of any run, waiting to be scored
+
+    @property
+    def models(self):
+        # Loaded on first use, so a run fully served from the cache never loads them
+        if self._models is None:
+            self._models = load_models(self.device)
+        return self._models
+
+    def compute_items(self, pairs):
+        """Run the models on (hypothesis, gold idx) pairs in combined batches."""
+        # Gold order, so CPU shards cover contiguous gold items
+        pairs = sorted(pairs, key=lambda pair: pair[1])
+        hyps  = [h for h, _ in pairs]
+        origs = [self.gold_orig[i] for _, i in pairs]
+        refs  = [self.gold_ref[i] for _, i in pairs]
+        if self.sharded is not None:
+            scores = self.sharded.score(hyps, origs, refs)
+        else:
+            scores = score_item_batch(self.models, hyps, origs, refs, self.batch_size, self.token_budget, self.padding)
+        return dict(zip(pairs, scores))
+
+    def score_chunk(self, chunk):
+        """
+        Scores for a list of (hypothesis, gold idx) pairs, from the cache where possible,
+        and the set of pairs the models had to score.
+        """
+        keys = {pair: self.cache.item_key(self.gold_ids[pair[1]], pair[0],
+                                          self.gold_orig[pair[1]], self.gold_ref[pair[1]])
+                for pair in chunk}
+        cached = self.cache.get_many(keys.values())
+        todo = [pair for pair, key in keys.items() if key not in cached]
+        if todo:
+            computed = self.compute_items(todo)
+            new_entries = {keys[pair]: computed[pair] for pair in todo}
+            self.cache.put_many(new_entries)
+            cached.update(new_entries)
+        return [cached[keys[pair]] for pair in chunk], set(todo)
+
+    def add_submission(self, name, records):
+        """
+        Stream one submission's (text_id, simplified) records into the pending items.
+        Whenever chunk_size items are pending they are scored together, whichever
+        runs they come from. The run's results row comes from finish_run().
+        """
+        run = RunScores(name)
+        for sid, hyp in records:
+            run.num_instances += 1
+            i = self.gid2idx.get(sid)
+            if i is None:
+                run.extra += 1
+                continue
+            run.seen.add(i)
+            run.pending += 1
+            self.pending.append((run, hyp, i))
+            if len(self.pending) >= self.chunk_size:
+                self.score_pending()
+        return run
+
+    def score_pending(self):
+        """Score the pending items of every run in one chunk and hand the scores back per run."""
+        if not self.pending:
+            return
+        chunk, self.pending = self.pending, []
+        scores, computed = self.score_chunk([(hyp, i) for _, hyp, i in chunk])
+        for (run, hyp, i), item in zip(chunk, scores):
+            run.add(i, item)
+            run.pending -= 1
+            if (hyp, i) in computed:
+                # Counted once, for the first run that needed it
+                computed.discard((hyp, i))
+                run.scored += 1
+
+    def evaluate_submission(self, name, records):
+        """Stream one submission's (text_id, simplified) records and return its results row."""
+        return self.finish_run(self.add_submission(name, records))
+
+    def finish_run(self, run):
+        """Results row of a run added with add_submission(), scoring its pending items first."""
+        if run.pending:
+            self.score_pending()
+        name = run.name
+        num_instances = run.num_instances
+        if not len(run):
+            print(f"[{name}] no overlap with gold; skipping.")
+            return {"modelname": name,
+                    "num_instances": num_instances,
+                    "coverage_n": 0, "coverage_pct": 0.0,
+                    "weighted_f1": "n/a", "adj_accuracy": "n/a", "rmse": "n/a",
+                    "meaningbert-orig": "n/a", "bertscore-orig": "n/a",
+                    "meaningbert-ref": "n/a", "bertscore-ref": "n/a"}
+        missing = len(self.gold_ids) - len(run.seen)
+        if missing:
+            print(f"[{name}] missing {missing} ids.")
+        if run.extra:
+            print(f"[{name}] extra {run.extra} ids (ignored).")
+        print(f"[{name}] {len(run)} items: {len(run) - run.scored} cached, {run.scored} scored.")
+
+        # Aggregate in gold order, whatever order the submission was streamed in
+        order = np.argsort(np.frombuffer(run.idx, dtype=np.int64), kind="stable")
+        if self.items_dir:
+            write_item_table(os.path.join(self.items_dir, os.path.splitext(name)[0] + ".csv"),
+                             ([self.gold_ids[run.idx[k]], str(self.gold_tgt[run.idx[k]]).strip().upper(), run.preds[k],
+                               *(round(run.metrics[m][k] / (100.0 if m.startswith("meaningbert") else 1.0), 6) for m in METRICS)]
+                              for k in order))
+        cefr = score_cefr([run.preds[k] for k in order], [self.gold_tgt[run.idx[k]] for k in order])
+        def mean_of(metric):
+            scale = 100.0 if metric.startswith("meaningbert") else 1.0
+            values = np.frombuffer(run.metrics[metric], dtype=np.float64)[order]
+            return round(float(np.mean(values)) / scale, 4)
+        return {"modelname": name,
+                "num_instances": num_instances,
+                "coverage_n": len(run),
+                "coverage_pct": round(100.0 * len(run) / len(self.gold_ids), 2),
+                "weighted_f1": cefr["weighted_f1"], "adj_accuracy": cefr["adj_accuracy"], "rmse": cefr["rmse"],
+                **{metric: mean_of(metric) for metric in METRICS}}
+
+    def close(self):
+        if self.sharded is not None:
+            self.sharded.close()
+        padding = self.padding.summary()
+        if padding["batches"]:
+            print(f"Length bucketing: {padding['batches']} batches, padding {100 * padding['bucketed_padding_ratio']:.1f}% "
+                  f"vs {100 * padding['fixed_padding_ratio']:.1f}% with fixed batches of {self.batch_size} "
+                  f"({100 * padding['saved_ratio']:.1f}% fewer padded tokens)")
+
+def evaluate_submissions(gold_path, submission_paths, engine_options=None, writer=None):
+    """
+    Evaluate submission files against a gold file and return one results row per file.
+    Importable entry point; engine_options are passed to EvaluationEngine. Items of
+    consecutive files are scored in shared chunks, and rows are handed to the
+    ResultsWriter (if any) in file order as soon as each file is fully scored.
+    """
+    gold_orig, gold_ref, gold_tgt, gold_ids = read_gold(gold_path)
+    engine = EvaluationEngine(gold_orig, gold_ref, gold_tgt, gold_ids, **(engine_options or {}))
+    results = []
+    unfinished = deque()    # runs read but not reported yet, in file order
+
+    def report(ready_only):
+        while unfinished and (not ready_only or unfinished[0].pending == 0):
+            row = engine.finish_run(unfinished.popleft())
+            results.append(row)
+            if writer is not None:
+                writer.write(row)
+
+    try:
+        for path in submission_paths:
+            name = os.path.basename(path)
+            print(f"Reading {name} ...")
+            unfinished.append(engine.add_submission(name, iter_submission(path)))
+            report(ready_only=True)
+        report(ready_only=False)
+    finally:
+        engine.close()
+    return results
+
+# ------------- Main ---------------------
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate TSAR 2025 submissions against the gold file.")
+    parser.add_argument("--gold", default=GOLD_FILE, help="gold JSONL file")
+    parser.add_argument("--submissions", default=SUBMISSIONS_DIR, help="folder with submission .jsonl files")
+    parser.add_argument("--output", default="results.xlsx", help="results spreadsheet")
+    parser.add_argument("--csv", default="results.csv", help="results CSV, written as each run completes ('' to skip)")
+    parser.add_argument("--items-dir", default=ITEMS_DIR, help="folder for per-item tables ('' to skip)")
+    parser.add_argument("--bootstrap", type=int, default=0,
+                        help="run tsar2025_significance with this many resamples on the item tables (0 to skip)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="items scored at a time")
+    parser.add_argument("--cache-file", default=CACHE_FILE, help="per-item score cache")
+    cache = parser.add_mutually_exclusive_group()
+    cache.add_argument("--no-cache", action="store_true", help="ignore the cache: score everything, read and write nothing")
+    cache.add_argument("--rebuild-cache", action="store_true", help="discard the cache and fill it again from scratch")
+    parser.add_argument("--cpu", action="store_true", help="run the models on CPU, sharded over a process pool")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="CPU mode: number of worker processes (default: core count)")
+    parser.add_argument("--baseline", action="store_true",
+                        help="CPU mode: score the items again in one process and report the speedup of sharding")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help=f"fixed batch size the padding report compares against (default: {BATCH_SIZE} on GPU, {CPU_BATCH_SIZE} on CPU)")
+    parser.add_argument("--token-budget", type=int, default=None,
+                        help=f"padded tokens per length bucket (default: {TOKEN_BUDGET} on GPU, {CPU_TOKEN_BUDGET} on CPU)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    set_seed()
+
+    if not os.path.isfile(args.gold):
+        raise FileNotFoundError(f"Gold file not found: {args.gold}")
+
+    if not os.path.isdir(args.submissions):
+        raise FileNotFoundError(f"Submissions folder not found: {args.submissions}")
+
+    # Get all .jsonl files directly from submissions folder
+    run_files = sorted([f for f in os.listdir(args.submissions) if f.endswith(".jsonl")])
+
+    if not run_files:
+        print(f"[warn] No .jsonl files found in {args.submissions}")
+
+    cache = None if args.no_cache else ItemCache(args.cache_file, model_signature(), rebuild=args.rebuild_cache)
+    engine_options = {"cache": cache, "chunk_size": args.chunk_size, "items_dir": args.items_dir}
+    if args.cpu:
+        engine_options.update(device=-1, workers=args.workers, batch_size=args.batch_size or CPU_BATCH_SIZE,
+                              token_budget=args.token_budget or CPU_TOKEN_BUDGET, baseline=args.baseline)
+    else:
+        engine_options.update(batch_size=args.batch_size or BATCH_SIZE, token_budget=args.token_budget or TOKEN_BUDGET)
+
+    writer = ResultsWriter(args.output, args.csv)
+    try:
+        results = evaluate_submissions(args.gold, [os.path.join(args.submissions, run) for run in run_files],
+                                       engine_options, writer)
+    finally:
+        writer.close()
+        if cache is not None:
+            cache.close()
+
+    df = pd.DataFrame(results, columns=RESULT_COLUMNS)
+    print("\n=== Results ===")
+    print(df.to_string(index=False))
+    print(f"\nSaved: {', '.join(p for p in (args.output, args.csv) if p)}")
+
+    if args.bootstrap and args.items_dir:
+        from tsar2025_significance import run_significance
+        run_significance(args.items_dir, resamples=args.bootstrap)
+
+if __name__ == "__main__":
+    main()
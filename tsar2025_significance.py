@@ -0,0 +1,187 @@
+import os, csv, argparse
+import numpy as np
+
+# ---------------- Config ----------------
+ITEMS_DIR = "items"                 # per-item tables written by tsar2025_evaluation_script.py
+RESAMPLES = 10000                   # bootstrap resamples
+ALPHA = 0.05                        # 95% confidence intervals
+SEED = 42                           # for reproducibility
+MAX_BLOCK_CELLS = 20_000_000        # resamples x items drawn per index matrix (bounds memory)
+
+CEFR = ["A1","A2","B1","B2","C1","C2"]
+L2I  = {l:i for i,l in enumerate(CEFR)}
+METRICS = ["weighted_f1", "adj_accuracy", "rmse",
+           "meaningbert-orig", "bertscore-orig", "meaningbert-ref", "bertscore-ref"]
+MEAN_METRICS = METRICS[3:]
+
+# ---------------- IO --------------------
+def read_item_table(path: str):
+    """
+    Read one per-item table into arrays, keyed by text_id.
+    Columns: text_id, target_cefr, predicted_cefr and one column per mean metric.
+    """
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+    if not rows:
+        raise ValueError(f"Item table is empty: {path}")
+    return {
+        "text_id": np.array([r["text_id"] for r in rows]),
+        "gold": np.array([L2I[r["target_cefr"].strip().upper()] for r in rows], dtype=np.int64),
+        "pred": np.array([L2I[r["predicted_cefr"].strip().upper()] for r in rows], dtype=np.int64),
+        **{m: np.array([float(r[m]) for r in rows]) for m in MEAN_METRICS},
+    }
+
+def read_item_tables(items_dir: str):
+    files = sorted(f for f in os.listdir(items_dir) if f.endswith(".csv"))
+    return {os.path.splitext(f)[0]: read_item_table(os.path.join(items_dir, f)) for f in files}
+
+def restrict(table, text_ids):
+    """Rows of a table for the given text_ids, in that order (first row per text_id)."""
+    first = {}
+    for i, t in enumerate(table["text_id"]):
+        first.setdefault(t, i)
+    rows = np.array([first[t] for t in text_ids], dtype=np.int64)
+    return {k: v[rows] for k, v in table.items()}
+
+# ------------- Vectorized metrics -------
+def resampled_metrics(table, samples):
+    """
+    All metrics for every resample at once.
+    samples: (B, n) matrix of row indices into the table; returns {metric: (B,) array}.
+    Weighted F1 matches sklearn's f1_score(average="weighted"): per-label F1
+    weighted by gold support, 0 where a label is neither predicted nor gold.
+    """
+    B, n = samples.shape
+    k = len(CEFR)
+    gold = table["gold"][samples]
+    pred = table["pred"][samples]
+
+    # Per-resample label counts through a single bincount over offset labels
+    offset = (np.arange(B, dtype=np.int64) * k)[:, None]
+    def counts(labels, mask=None):
+        flat = (labels + offset).ravel()
+        weights = None if mask is None else mask.ravel().astype(np.float64)
+        return np.bincount(flat, weights=weights, minlength=B * k).reshape(B, k)
+    gold_n = counts(gold)
+    pred_n = counts(pred)
+    tp     = counts(gold, gold == pred)
+    denom  = gold_n + pred_n
+    f1 = np.divide(2.0 * tp, denom, out=np.zeros((B, k)), where=denom > 0)
+
+    diff = gold - pred
+    out = {"weighted_f1": (f1 * gold_n).sum(axis=1) / n,
+           "adj_accuracy": (np.abs(diff) <= 1).mean(axis=1),
+           "rmse": np.sqrt((diff.astype(np.float64) ** 2).mean(axis=1))}
+    for m in MEAN_METRICS:
+        out[m] = table[m][samples].mean(axis=1)
+    return out
+
+def point_metrics(table):
+    n = len(table["gold"])
+    return {m: float(v[0]) for m, v in resampled_metrics(table, np.arange(n)[None, :]).items()}
+
+def bootstrap(tables, resamples=RESAMPLES, seed=SEED):
+    """
+    Paired bootstrap: every table (aligned on the same items) is evaluated on the same
+    resampled index matrices. Resamples are drawn in blocks of at most MAX_BLOCK_CELLS
+    indices. Returns {name: {metric: (resamples,) array}}.
+    """
+    rng = np.random.default_rng(seed)
+    n = len(next(iter(tables.values()))["gold"])
+    block = max(1, min(resamples, MAX_BLOCK_CELLS // n))
+    parts = {name: {m: [] for m in METRICS} for name in tables}
+    done = 0
+    while done < resamples:
+        size = min(block, resamples - done)
+        samples = rng.integers(0, n, size=(size, n))
+        for name, table in tables.items():
+            for m, values in resampled_metrics(table, samples).items():
+                parts[name][m].append(values)
+        done += size
+    return {name: {m: np.concatenate(v) for m, v in ms.items()} for name, ms in parts.items()}
+
+# ------------- Reports ------------------
+def confidence_intervals(tables, resamples=RESAMPLES, alpha=ALPHA, seed=SEED):
+    """Percentile bootstrap CIs for every run and metric, each run over its own items."""
+    rows = []
+    for name, table in tables.items():
+        point = point_metrics(table)
+        dist = bootstrap({name: table}, resamples, seed)[name]
+        for m in METRICS:
+            low, high = np.quantile(dist[m], [alpha / 2, 1 - alpha / 2])
+            rows.append({"run": name, "metric": m, "n": len(table["gold"]), "value": round(point[m], 4),
+                         "ci_low": round(float(low), 4), "ci_high": round(float(high), 4)})
+    return rows
+
+def pairwise_tests(tables, resamples=RESAMPLES, alpha=ALPHA, seed=SEED):
+    """
+    Paired bootstrap test for every pair of runs, on the items both runs cover.
+    delta = run_a - run_b; p_value is two-sided, from the bootstrap distribution
+    of delta shifted to the null (|delta* - delta| >= |delta|).
+    """
+    rows = []
+    names = list(tables)
+    for a_pos, a in enumerate(names):
+        for b in names[a_pos + 1:]:
+            shared = np.intersect1d(tables[a]["text_id"], tables[b]["text_id"])
+            if not len(shared):
+                continue
+            pair = {a: restrict(tables[a], shared), b: restrict(tables[b], shared)}
+            point = {name: point_metrics(t) for name, t in pair.items()}
+            dist = bootstrap(pair, resamples, seed)
+            for m in METRICS:
+                delta = point[a][m] - point[b][m]
+                deltas = dist[a][m] - dist[b][m]
+                low, high = np.quantile(deltas, [alpha / 2, 1 - alpha / 2])
+                p = float(np.mean(np.abs(deltas - delta) >= abs(delta) - 1e-12))
+                rows.append({"run_a": a, "run_b": b, "metric": m, "n": len(shared),
+                             "delta": round(delta, 4), "ci_low": round(float(low), 4),
+                             "ci_high": round(float(high), 4), "p_value": round(p, 4)})
+    return rows
+
+def write_csv(path, rows):
+    if not rows:
+        return
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+def run_significance(items_dir=ITEMS_DIR, resamples=RESAMPLES, alpha=ALPHA, seed=SEED,
+                     ci_path="significance_ci.csv", pairs_path="significance_pairs.csv"):
+    import pandas as pd
+    tables = read_item_tables(items_dir)
+    if not tables:
+        print(f"[warn] No item tables found in {items_dir}")
+        return [], []
+    ci = confidence_intervals(tables, resamples, alpha, seed)
+    pairs = pairwise_tests(tables, resamples, alpha, seed)
+    print(f"\n=== {100 * (1 - alpha):g}% bootstrap confidence intervals ({resamples} resamples) ===")
+    print(pd.DataFrame(ci).to_string(index=False))
+    if pairs:
+        print("\n=== Paired bootstrap: run_a - run_b ===")
+        print(pd.DataFrame(pairs).to_string(index=False))
+    write_csv(ci_path, ci)
+    write_csv(pairs_path, pairs)
+    print(f"\nSaved: {ci_path}, {pairs_path}")
+    return ci, pairs
+
+# ------------- Main ---------------------
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Bootstrap CIs and pairwise significance tests between TSAR 2025 runs.")
+    parser.add_argument("--items-dir", default=ITEMS_DIR, help="folder with per-item tables (one CSV per run)")
+    parser.add_argument("--resamples", type=int, default=RESAMPLES)
+    parser.add_argument("--alpha", type=float, default=ALPHA)
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--ci-output", default="significance_ci.csv")
+    parser.add_argument("--pairs-output", default="significance_pairs.csv")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not os.path.isdir(args.items_dir):
+        raise FileNotFoundError(f"Item tables folder not found: {args.items_dir}")
+    run_significance(args.items_dir, args.resamples, args.alpha, args.seed, args.ci_output, args.pairs_output)
+
+if __name__ == "__main__":
+    main()